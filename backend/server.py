@@ -1,5 +1,6 @@
-from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, UploadFile, File, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -7,16 +8,29 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from array import array
 import asyncio
 import aiohttp
-import json
+import orjson
 import re
+import bisect
+import math
+import functools
+import statistics
+import hashlib
+import inspect
+import socket
+import zlib
 import base58
+import base64
+import codecs
 from io import StringIO
-from bson import ObjectId
+from bson import ObjectId, json_util
+from pymongo import DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
@@ -29,17 +43,40 @@ from bs4 import BeautifulSoup
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, OrderedDict, deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from storage import create_client
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Storage backend: MongoDB via Motor, or one of the embedded engines in storage.py
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')  # mongo | sqlite | memory
+SQLITE_PATH = os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'tracker.db'))
+
+if STORAGE_BACKEND == 'mongo':
+    mongo_url = os.environ['MONGO_URL']
+    client = AsyncIOMotorClient(mongo_url)
+else:
+    client = create_client(STORAGE_BACKEND, SQLITE_PATH)
 db = client[os.environ['DB_NAME']]
 
+# JSON serialization - one orjson-based path for HTTP responses, exports and WebSocket frames
+def json_default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_json(content: Any) -> bytes:
+    """Serialize Mongo documents (ObjectId, datetime) straight to JSON bytes"""
+    return orjson.dumps(content, default=json_default)
+
+class MongoJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
 # Create the main app without a prefix
-app = FastAPI(title="Twitter/X Meme Token Tracker")
+app = FastAPI(title="Twitter/X Meme Token Tracker", default_response_class=MongoJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -49,8 +86,126 @@ TWITTER_API_KEY = os.environ.get('TWITTER_API_KEY', '')
 APIFY_API_BASE = "https://api.apify.com/v2"
 TWITTER_SCRAPER_ACTOR_ID = "61RPP7dywgiy0JPD0"  # apidojo/tweet-scraper
 
+# Account import tuning
+IMPORT_BATCH_SIZE = 1000  # Usernames per existence query / insert_many
+IMPORT_CHUNK_BYTES = 64 * 1024  # Upload read size for streamed imports
+
+# Alert write-behind: persist alert mutations in batches instead of per tweet
+ALERT_WRITE_BEHIND = os.environ.get('ALERT_WRITE_BEHIND', 'false').lower() == 'true'
+ALERT_FLUSH_INTERVAL_MS = int(os.environ.get('ALERT_FLUSH_INTERVAL_MS', '250'))
+ALERT_FLUSH_MAX_OPS = int(os.environ.get('ALERT_FLUSH_MAX_OPS', '500'))
+ALERT_MAX_LOSS_MS = int(os.environ.get('ALERT_MAX_LOSS_MS', '1000'))  # Oldest unflushed mutation age bound
+ALERT_CACHE_SIZE = int(os.environ.get('ALERT_CACHE_SIZE', '10000'))  # Tokens whose live alert (or its absence) is cached, and CA contracts known to exist
+
+# Version snapshots: a full "base" every SNAPSHOT_BASE_INTERVAL versions, "delta" changes in between
+SNAPSHOT_BASE_INTERVAL = 10
+VERSION_SAVE_ATTEMPTS = 3  # Saves racing another worker for the same version_number
+SNAPSHOT_COLLECTIONS = {
+    "accounts": "twitter_accounts",
+    "name_alerts": "name_alerts",
+    "ca_alerts": "ca_alerts",
+    "blacklist": "blacklist",
+}
+
+# Alert processing lanes: CA work gets reserved workers and HTTP connections, name-quorum work yields to it
+CA_LANE_WORKERS = int(os.environ.get('CA_LANE_WORKERS', '4'))
+NAME_LANE_WORKERS = int(os.environ.get('NAME_LANE_WORKERS', '4'))
+CA_HTTP_CONNECTIONS = int(os.environ.get('CA_HTTP_CONNECTIONS', '8'))
+NAME_HTTP_CONNECTIONS = int(os.environ.get('NAME_HTTP_CONNECTIONS', '8'))
+NAME_LANE_QUEUE_SIZE = int(os.environ.get('NAME_LANE_QUEUE_SIZE', '10000'))  # Name work beyond this is shed
+
+# Live account monitoring: desired accounts are reconciled against running browser threads
+MONITOR_RECONCILE_SECONDS = int(os.environ.get('MONITOR_RECONCILE_SECONDS', '30'))  # Backstop; account changes wake it at once
+MONITOR_WARM_DRIVERS = int(os.environ.get('MONITOR_WARM_DRIVERS', '4'))  # Idle Chrome drivers kept for the next account
+
+# Historical backfill of newly added accounts
+BACKFILL_WORKERS = int(os.environ.get('BACKFILL_WORKERS', '8'))  # Parallel browser sessions
+BACKFILL_SCROLL_PAUSE_SECONDS = float(os.environ.get('BACKFILL_SCROLL_PAUSE_SECONDS', '1.0'))
+BACKFILL_MAX_STALLED_SCROLLS = 3  # Scrolls without new tweets before a timeline counts as exhausted
+BACKFILL_INSERT_BATCH = 1000
+
+# Per-account performance metrics (TwitterAccount.performance)
+PERFORMANCE_RECONCILE_SECONDS = int(os.environ.get('PERFORMANCE_RECONCILE_SECONDS', '3600'))  # Full rebuild from alerts
+PERFORMANCE_PUBLISH_SECONDS = float(os.environ.get('PERFORMANCE_PUBLISH_SECONDS', '5'))  # Coalesces performance_changed
+PERFORMANCE_LEAD_SAMPLES = 100  # Most recent lead times per account the median is taken over
+LEADERBOARD_SORTS = ("first_calls", "median_lead_seconds", "alerts", "name_alerts", "ca_alerts")
+
+# Trending detection over every extracted token: count-min sketches per time bucket, fixed memory
+TRENDING_BUCKET_SECONDS = int(os.environ.get('TRENDING_BUCKET_SECONDS', '60'))
+TRENDING_BUCKETS = int(os.environ.get('TRENDING_BUCKETS', '15'))  # Sliding window = buckets x bucket seconds
+TRENDING_SKETCH_WIDTH = int(os.environ.get('TRENDING_SKETCH_WIDTH', '2048'))
+TRENDING_SKETCH_DEPTH = int(os.environ.get('TRENDING_SKETCH_DEPTH', '4'))
+TRENDING_TOP_K = int(os.environ.get('TRENDING_TOP_K', '50'))
+TRENDING_SPIKE_MIN_MENTIONS = int(os.environ.get('TRENDING_SPIKE_MIN_MENTIONS', '5'))  # In the current bucket
+TRENDING_SPIKE_RATIO = float(os.environ.get('TRENDING_SPIKE_RATIO', '3.0'))  # Current bucket vs earlier-bucket average
+
+# Quorum window checkpoint interval
+QUORUM_CHECKPOINT_SECONDS = int(os.environ.get('QUORUM_CHECKPOINT_SECONDS', '30'))
+
+# Alert archival
+ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('ARCHIVE_INTERVAL_SECONDS', '3600'))
+ARCHIVE_BATCH_SIZE = 1000  # Alerts per compressed archive chunk
+ARCHIVE_COLLECTIONS = ("name_alerts", "ca_alerts")
+ARCHIVE_LEASE_SECONDS = 600  # A crashed archiver's lease lapses after this long
+NAME_ALERT_EXPIRY_INDEX = "name_alert_expiry"
+LEGACY_NAME_ALERT_TTL_INDEX = "unpromoted_name_alert_ttl"  # Threshold-derived index, dropped at startup
+
+# Restore staging
+RESTORE_STAGING_SUFFIX = "__restore"
+RESTORE_BATCH_SIZE = 5000
+RESTORE_GATE_TIMEOUT_SECONDS = 30  # Reads held during a restore's swap proceed anyway after this long
+
+# Listing endpoint page sizes
+DEFAULT_PAGE_LIMIT = 200
+MAX_PAGE_LIMIT = 1000
+UPDATES_MAX_WAIT_SECONDS = 30  # Longest /api/updates long-poll hold
+
+# Response cache for read endpoints, invalidated by the write paths of each collection
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+# WebSocket fan-out: bounded per-client queues, each drained by its own writer task
+WS_QUEUE_SIZE = int(os.environ.get('WS_QUEUE_SIZE', '256'))
+WS_SLOW_CLIENT_POLICY = os.environ.get('WS_SLOW_CLIENT_POLICY', 'drop_oldest')  # drop_oldest | coalesce | disconnect
+WS_SEND_TIMEOUT_SECONDS = float(os.environ.get('WS_SEND_TIMEOUT_SECONDS', '10'))
+
+# WebSocket frame encodings, chosen per client with /api/ws?encoding=...
+# json: text frames. zlib: binary frames of zlib-compressed JSON, compressed once per broadcast.
+WS_ENCODINGS = ("json", "zlib")
+WS_ZLIB_LEVEL = int(os.environ.get('WS_ZLIB_LEVEL', '6'))
+# Transport-level permessage-deflate for plain json clients (compresses per connection)
+WS_PER_MESSAGE_DEFLATE = os.environ.get('WS_PER_MESSAGE_DEFLATE', 'true').lower() == 'true'
+
+# WebSocket replay: broadcasts carry a sequence number and the latest ones are kept for resuming clients
+WS_REPLAY_BUFFER_SIZE = int(os.environ.get('WS_REPLAY_BUFFER_SIZE', '1000'))
+WS_REPLAY_PERSIST = os.environ.get('WS_REPLAY_PERSIST', 'false').lower() == 'true'  # Keep history across restarts
+
+# WebSocket subscription topics and the broadcast types they cover
+WS_TOPICS = {
+    "ca": {"ca_alert"},
+    "name": {"name_alert", "name_alert_update"},
+    "trending": {"trending_spike"},
+}
+
+# Event bus between API workers: alert broadcasts and monitoring control reach every worker,
+# so any worker can serve any WebSocket client
+BUS_BACKEND = os.environ.get('BUS_BACKEND', 'local')  # local | mongo | redis
+BUS_POLL_INTERVAL_MS = int(os.environ.get('BUS_POLL_INTERVAL_MS', '200'))  # Mongo bus without change streams
+BUS_GAP_TIMEOUT_SECONDS = 5  # Polling gives up waiting for a missing seq after this long
+BUS_RETENTION_SECONDS = 3600
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')  # memory:// is the in-process stand-in
+REDIS_KEY_PREFIX = os.environ.get('REDIS_KEY_PREFIX', 'tracker:bus')
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+CONTROL_CACHE_TAGS = {  # Cached responses each control action makes stale (settings invalidate on refresh)
+    "accounts_changed": ("accounts",),
+    "versions_changed": ("versions",),
+    "alerts_changed": ("name_alerts", "ca_alerts", "accounts"),  # Accounts carry alert-derived performance
+    "performance_changed": ("accounts",),
+    "restored": ("accounts", "versions", "name_alerts", "ca_alerts"),
+}
+
 # Global state for monitoring
 monitoring_active = False
+monitor_wakeup = asyncio.Event()  # Set when accounts or monitoring state change, so reconciliation runs now
 tracked_accounts = set()
 websocket_connections = []
 
@@ -61,6 +216,7 @@ class TwitterAccount(BaseModel):
     display_name: Optional[str] = None
     is_active: bool = True
     added_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    backfilled_at: Optional[datetime] = None
     performance: Dict[str, Any] = Field(default_factory=dict)
 
 class NameAlert(BaseModel):
@@ -68,7 +224,8 @@ class NameAlert(BaseModel):
     token_name: str
     first_seen: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     quorum_count: int = 1
-    accounts: List[Dict[str, str]] = Field(default_factory=list)  # [{"username": "user1", "tweet_id": "123", "tweet_url": "..."}]
+    accounts: List[Dict[str, Any]] = Field(default_factory=list)  # [{"username": "user1", "tweet_id": "123", "tweet_url": "...", "lead_seconds": 42.0}]
+    last_seen: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     is_active: bool = True
 
 class CAAlert(BaseModel):
@@ -91,7 +248,10 @@ class AppVersion(BaseModel):
     version_number: int
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     tag: Optional[str] = None
-    snapshot_data: Dict[str, Any]  # Complete app state
+    kind: str = "base"  # "base" (complete app state) or "delta" (changes since the previous version)
+    base_version: Optional[int] = None  # version_number of the base this version builds on
+    payload: Optional[bytes] = None  # zlib-compressed base/delta document
+    snapshot_data: Optional[Dict[str, Any]] = None  # Legacy uncompressed complete app state
     is_current: bool = False
 
 class BlacklistItem(BaseModel):
@@ -108,29 +268,1888 @@ class AppSettings(BaseModel):
     max_versions: int = 20
     monitoring_enabled: bool = False
     min_quorum_threshold: int = 3  # Minimum accounts needed to trigger name alert
+    quorum_window_minutes: int = 60  # Accounts only count toward quorum within this sliding window
+    name_alert_ttl_hours: int = 24  # Name alerts stored below quorum expire this long after first_seen (0 = keep)
+    archive_after_days: int = 30  # Alerts older than this move to the archive (0 = never)
     max_token_age_minutes: int = 10  # Maximum age for new token alerts (default 10 minutes)
+    backfill_new_accounts: bool = True  # Backfill history for accounts as they are added
+    backfill_max_tweets: int = 200  # Timeline depth per account
+    backfill_days: int = 7  # ...or back to this many days, whichever comes first
+
+class BackfillRequest(BaseModel):
+    usernames: Optional[List[str]] = None  # Default: every account not backfilled yet
+    max_tweets: Optional[int] = None  # Defaults from settings
+    since: Optional[datetime] = None
 
 # WebSocket Manager
-class ConnectionManager:
+def encode_frame(text: str, encoding: str):
+    """Wire frame for one client encoding: str for text frames, bytes for binary frames"""
+    if encoding == "zlib":
+        return zlib.compress(text.encode(), WS_ZLIB_LEVEL)
+    return text
+
+def coalesce_key(message: Dict[str, Any]) -> Optional[tuple]:
+    """Messages carrying full state, which a newer message with the same key supersedes"""
+    if message.get("type") == "name_alert_update":
+        return message["type"], message["data"].get("id")
+    return None
+
+class Subscription(BaseModel):
+    """Server-side broadcast filter set with {"type": "subscribe", ...} - empty fields match everything"""
+    topics: List[str] = []  # WS_TOPICS names or broadcast types
+    tokens: List[str] = []
+    accounts: List[str] = []
+    min_quorum: int = 0  # Applies to name alerts only
+
+def event_types(topics: List[str]) -> set:
+    return set().union(*(WS_TOPICS.get(topic, {topic}) for topic in topics))
+
+def event_accounts(data: Dict[str, Any]) -> List[str]:
+    if data.get("account_username"):
+        return [data["account_username"]]
+    return [acc.get("username") for acc in data.get("accounts") or [] if acc.get("username")]
+
+class SubscriptionIndex:
+    """Clients indexed by broadcast type, token and account so routing a message
+    only touches the clients it matches. Clients without a filter on a dimension
+    sit in that dimension's "any" set."""
+    
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.subscriptions: Dict[Any, Subscription] = {}
+        self.by_type: Dict[str, set] = {}
+        self.by_token: Dict[str, set] = {}
+        self.by_account: Dict[str, set] = {}
+        self.any_type = set()
+        self.any_token = set()
+        self.any_account = set()
+        self.min_quorum: Dict[Any, int] = {}  # Only clients with a quorum filter
+    
+    def entries(self, subscription: Subscription):
+        yield self.by_type, self.any_type, event_types(subscription.topics)
+        yield self.by_token, self.any_token, {token.upper() for token in subscription.tokens}
+        yield self.by_account, self.any_account, {account.lower().lstrip("@") for account in subscription.accounts}
+    
+    def add(self, client, subscription: Subscription):
+        self.remove(client)
+        self.subscriptions[client] = subscription
+        for index, any_set, keys in self.entries(subscription):
+            if not keys:
+                any_set.add(client)
+            for key in keys:
+                index.setdefault(key, set()).add(client)
+        if subscription.min_quorum > 0:
+            self.min_quorum[client] = subscription.min_quorum
+    
+    def remove(self, client):
+        subscription = self.subscriptions.pop(client, None)
+        if subscription is None:
+            return
+        for index, any_set, keys in self.entries(subscription):
+            any_set.discard(client)
+            for key in keys:
+                index[key].discard(client)
+                if not index[key]:
+                    del index[key]
+        self.min_quorum.pop(client, None)
+    
+    def match(self, message: Dict[str, Any]) -> set:
+        data = message.get("data") if isinstance(message.get("data"), dict) else {}
+        clients = self.by_type.get(message.get("type"), set()) | self.any_type
+        token = data.get("token_name")
+        if token and clients:
+            clients &= self.by_token.get(token.upper(), set()) | self.any_token
+        accounts = event_accounts(data)
+        if accounts and clients:
+            clients &= self.any_account.union(*(self.by_account.get(a.lower(), set()) for a in accounts))
+        quorum = data.get("quorum_count")
+        if quorum is not None and self.min_quorum:
+            clients = {c for c in clients if self.min_quorum.get(c, 0) <= quorum}
+        return clients
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+class EventLog:
+    """Sequenced broadcast history for resuming WebSocket clients.
+    
+    Every broadcast gets the next seq - or keeps the one the event bus assigned, so
+    seqs agree across workers - and the latest `size` events stay in a buffer (plus
+    ws_events when persisted). The stream id changes whenever the history starts
+    over, so a last_seq from an earlier stream forces a resync.
+    """
+    
+    def __init__(self, size: int, persist: bool):
+        self.size = size
+        self.persist = persist
+        self.stream = str(uuid.uuid4())
+        self.seq = 0
+        self.evicted = 0  # Highest seq dropped from the buffer
+        self.appended = 0  # Arrival position - bus seqs from several workers can arrive out of order
+        self.events = deque()  # [message, encoded text or None, arrival position]
+        self.unsaved: List[Dict[str, Any]] = []
+        self.updated = asyncio.Event()  # Set (and replaced) on every change - long-polls wait on it
+    
+    def notify(self):
+        self.updated.set()
+        self.updated = asyncio.Event()
+    
+    def restart(self, stream: str):
+        self.stream = stream
+        self.seq = self.evicted = 0
+        self.events.clear()
+        self.unsaved = []
+        self.notify()
+    
+    def append(self, message: Dict[str, Any], stream: Optional[str] = None) -> list:
+        if stream is not None and stream != self.stream:
+            self.restart(stream)
+        seq = message.get("seq") or self.seq + 1
+        self.seq = max(self.seq, seq)
+        self.appended += 1
+        event = [{**message, "seq": seq}, None, self.appended]
+        if len(self.events) == self.size:
+            self.evicted = max(self.evicted, self.events.popleft()[0]["seq"])
+        self.events.append(event)
+        if self.persist:
+            self.unsaved.append(event[0])
+        self.notify()
+        return event
+    
+    def text(self, event: list) -> str:
+        if event[1] is None:
+            event[1] = dumps_json(event[0]).decode()
+        return event[1]
+    
+    def since(self, last_seq: int, stream: Optional[str]) -> Optional[List[list]]:
+        """Events after last_seq, or None when they can't be replayed (other stream, or already evicted)"""
+        if stream != self.stream or last_seq > self.seq or last_seq < self.evicted:
+            return None
+        return sorted((event for event in self.events if event[0]["seq"] > last_seq), key=lambda e: e[0]["seq"])
+    
+    async def load(self):
+        if not self.persist:
+            return
+        latest = await db.ws_events.find_one({}, {"_id": 0, "stream": 1}, sort=[("_id", -1)])
+        if not latest:
+            return
+        docs = await db.ws_events.find({"stream": latest["stream"]}, {"_id": 0}).sort("seq", -1).limit(self.size).to_list(self.size)
+        self.stream = latest["stream"]
+        self.seq = docs[0]["seq"]
+        self.evicted = docs[-1]["seq"] - 1  # Anything older was not kept, so it can't be replayed
+        self.events.extend([doc["message"], None, 0] for doc in reversed(docs))
+    
+    async def save(self):
+        if not self.unsaved:
+            return
+        batch, self.unsaved = self.unsaved, []
+        try:
+            # Upserts by seq - every worker on a shared bus saves the same events
+            await db.ws_events.bulk_write([
+                ReplaceOne({"stream": self.stream, "seq": m["seq"]}, {"stream": self.stream, "seq": m["seq"], "message": m},
+                           upsert=True)
+                for m in batch
+            ], ordered=False)
+            await db.ws_events.delete_many({"$or": [{"stream": {"$ne": self.stream}},
+                                                    {"seq": {"$lte": self.seq - self.size}}]})
+        except Exception as e:
+            logger.warning(f"Could not persist {len(batch)} WebSocket events: {e}")
 
+class ClientConnection:
+    """One dashboard connection: a bounded outbound queue and the writer task draining it"""
+    
+    def __init__(self, websocket: WebSocket, queue_size: int, policy: str, encoding: str):
+        self.websocket = websocket
+        self.queue_size = queue_size
+        self.policy = policy
+        self.encoding = encoding
+        self.connected_position = 0  # Events up to here predate the connection - replayed, never sent live
+        self.queue = deque()  # (enqueued_at, coalesce_key, frame)
+        self.ready = asyncio.Event()
+        self.connected_at = datetime.now(timezone.utc)
+        self.sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.task: Optional[asyncio.Task] = None
+    
+    def enqueue(self, frame, key: Optional[tuple] = None) -> bool:
+        """Queue a frame, applying the slow-client policy. False means disconnect the client."""
+        if self.policy == "coalesce" and key is not None:
+            for i, (enqueued_at, queued_key, _) in enumerate(self.queue):
+                if queued_key == key:
+                    self.queue[i] = (enqueued_at, key, frame)
+                    self.coalesced += 1
+                    return True
+        if len(self.queue) >= self.queue_size:
+            if self.policy == "disconnect":
+                return False
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append((time.monotonic(), key, frame))
+        self.ready.set()
+        return True
+    
+    async def run(self):
+        while True:
+            if not self.queue:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            enqueued_at, _, frame = self.queue.popleft()
+            send = self.websocket.send_bytes(frame) if isinstance(frame, bytes) else self.websocket.send_text(frame)
+            await asyncio.wait_for(send, timeout=WS_SEND_TIMEOUT_SECONDS)
+            self.bytes_sent += len(frame)
+            self.last_lag = time.monotonic() - enqueued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            self.sent += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        client = self.websocket.client
+        return {
+            "client": f"{client.host}:{client.port}" if client else None,
+            "encoding": self.encoding,
+            "connected_at": self.connected_at,
+            "queued": len(self.queue),
+            "sent": self.sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "lag_ms": round((time.monotonic() - self.queue[0][0]) * 1000, 1) if self.queue else 0.0,
+            "last_send_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
+
+class ConnectionManager:
+    """WebSocket fan-out that never waits on a client.
+    
+    broadcast() only appends to an outbox. A dispatcher task serializes each message
+    once per encoding in use and copies the frame into every client's bounded
+    queue; per-client writer tasks do the sends, so a stalled dashboard only ever
+    delays itself.
+    """
+    
+    def __init__(self, queue_size: int, policy: str, events: EventLog):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.events = events
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.subscriptions = SubscriptionIndex()
+        self.outbox = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def connect(self, websocket: WebSocket, encoding: str = "json"):
+        await websocket.accept()
+        client = ClientConnection(websocket, self.queue_size, self.policy, encoding)
+        client.connected_position = self.events.appended
+        client.task = asyncio.create_task(self.write(client))
+        self.clients[websocket] = client
+        self.subscriptions.add(client, Subscription())
+    
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        client = self.clients.pop(websocket, None)
+        if client:
+            self.subscriptions.remove(client)
+            if client.task is not asyncio.current_task():
+                client.task.cancel()
+    
+    def subscribe(self, websocket: WebSocket, subscription: Subscription):
+        client = self.clients.get(websocket)
+        if client:
+            self.subscriptions.add(client, subscription)
+    
+    async def write(self, client: ClientConnection):
+        try:
+            await client.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket send failed for {client.websocket.client}, disconnecting: {e}")
+            self.disconnect(client.websocket)
+            # Best effort - a stalled client only learns it should reconnect from the close frame
+            try:
+                await asyncio.wait_for(client.websocket.close(code=1013), timeout=WS_SEND_TIMEOUT_SECONDS)
+            except Exception:
+                pass
+    
+    def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one client, behind anything already queued for it"""
+        client = self.clients.get(websocket)
+        if client:
+            client.enqueue(encode_frame(dumps_json(message).decode(), client.encoding))
+    
+    def resume(self, websocket: WebSocket, last_seq: int, stream: Optional[str]):
+        """Replay the broadcasts a reconnecting client missed, or tell it to resync"""
+        client = self.clients.get(websocket)
+        if not client:
+            return
+        events = self.events.since(last_seq, stream)
+        if events is not None:
+            events = [event for event in events if event[2] <= client.connected_position]
+        if events is None or len(events) > self.queue_size:
+            self.send(websocket, {"type": "resync", "stream": self.events.stream, "seq": self.events.seq})
+            return
+        for event in events:
+            if client in self.subscriptions.match(event[0]):
+                client.enqueue(encode_frame(self.events.text(event), client.encoding))
+    
+    async def broadcast(self, message: dict, stream: Optional[str] = None):
+        event = self.events.append(message, stream)
+        if self.clients:
+            self.outbox.append(event)
+        if self.clients or self.events.unsaved:
+            self._wakeup.set()
+    
+    async def notify(self, message: dict):
+        """Send a transient message to subscribed clients, outside the replay log"""
+        if self.clients:
+            self.outbox.append([message, None, math.inf])
+            self._wakeup.set()
+    
+    async def dispatch(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.outbox:
+                event = self.outbox.popleft()
+                message, text = event[0], self.events.text(event)
+                frames = {}  # encoding -> frame, shared by every client using it
+                key = coalesce_key(message)
+                for client in self.subscriptions.match(message):
+                    websocket = client.websocket
+                    if event[2] <= client.connected_position:
+                        continue  # Replayed to this client instead
+                    if client.encoding not in frames:
+                        frames[client.encoding] = encode_frame(text, client.encoding)
+                    if not client.enqueue(frames[client.encoding], key):
+                        logger.warning(f"Disconnecting slow WebSocket client {websocket.client} "
+                                       f"({len(client.queue)} frames queued)")
+                        self.disconnect(websocket)
+                        asyncio.create_task(websocket.close(code=1013))
+                await asyncio.sleep(0)  # Let writers drain between messages of a burst
+            await self.events.save()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "pending_broadcasts": len(self.outbox),
+            "clients": [{**client.stats(), "subscription": self.subscriptions.subscriptions[client].dict()}
+                        for client in self.clients.values()],
+        }
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.dispatch())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        writers = [client.task for client in self.clients.values()]
+        for websocket in list(self.clients):
+            self.disconnect(websocket)
+        await asyncio.gather(*writers, return_exceptions=True)
+        await self.events.save()
+
+manager = ConnectionManager(WS_QUEUE_SIZE, WS_SLOW_CLIENT_POLICY, EventLog(WS_REPLAY_BUFFER_SIZE, WS_REPLAY_PERSIST))
+
+# Settings Cache
+class SettingsCache:
+    """Process-wide cache of the single app_settings document"""
+
+    def __init__(self):
+        self._settings: Optional[Dict[str, Any]] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    async def get(self) -> Dict[str, Any]:
+        """Return cached settings, loading them on first use"""
+        if self._settings is None:
+            return await self.refresh()
+        return self._settings
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Reload settings from the database"""
+        previous = self._settings
+        self._settings = await db.app_settings.find_one({}, {"_id": 0}) or {}
+        if self._settings != previous:
+            response_cache.invalidate("settings")
+        if previous is not None and previous.get('min_quorum_threshold') != self._settings.get('min_quorum_threshold'):
+            dashboard_counters.invalidate()
+            account_metrics.invalidate()
+        return self._settings
+
+    def invalidate(self):
+        """Drop cached settings so the next read reloads them"""
+        self._settings = None
+
+    async def watch(self):
+        """Follow app_settings changes made by other processes (requires a replica set)"""
+        while True:
+            try:
+                async with db.app_settings.watch() as stream:
+                    async for _ in stream:
+                        await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Standalone servers don't support change streams - local invalidation still applies
+                logger.info(f"Settings change stream unavailable: {e}")
+                return
+            except Exception as e:
+                logger.warning(f"Settings change stream error, reconnecting: {e}")
+                await asyncio.sleep(5)
+
+    def start_watching(self):
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch())
+
+    def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections[:]:  # Copy list to avoid modification during iteration
+settings_cache = SettingsCache()
+
+# Dashboard Counters
+class DashboardCounters:
+    """In-memory dashboard counters, maintained incrementally by the write paths.
+    
+    A full recount only happens on first use, after a restore and when the
+    quorum threshold changes (which redefines what counts as a name alert).
+    Increments arriving while a count query runs are added on top of it.
+    """
+    
+    def __init__(self):
+        self.total_accounts = 0
+        self.total_name_alerts = 0
+        self.total_ca_alerts = 0
+        self.loaded = False
+        self.arrived: Optional[Dict[str, int]] = None  # Increments since each field's count query started
+        self._lock = asyncio.Lock()
+    
+    async def recompute(self):
+        async with self._lock:
+            # Write-behind alerts are already counted by their increments - get them into the counts too
+            await alert_store.flush()
+            settings = await settings_cache.get()
+            min_threshold = settings.get('min_quorum_threshold', 3)
+            queries = (
+                ("total_accounts", db.twitter_accounts, {"is_active": True}),
+                ("total_name_alerts", db.name_alerts, {"is_active": True, "quorum_count": {"$gte": min_threshold}}),
+                ("total_ca_alerts", db.ca_alerts, {}),
+            )
+            self.arrived = {}
+            try:
+                counts = {}
+                for field, collection, query in queries:
+                    self.arrived[field] = 0
+                    counts[field] = await collection.count_documents(query)
+                for field, count in counts.items():
+                    setattr(self, field, max(0, count + self.arrived[field]))
+            finally:
+                self.arrived = None
+            self.loaded = True
+    
+    def invalidate(self):
+        self.loaded = False
+    
+    async def get(self) -> Dict[str, int]:
+        if not self.loaded:
+            await self.recompute()
+        return {
+            "total_accounts": self.total_accounts,
+            "total_name_alerts": self.total_name_alerts,
+            "total_ca_alerts": self.total_ca_alerts
+        }
+    
+    def add(self, field: str, count: int):
+        setattr(self, field, max(0, getattr(self, field) + count))
+        if self.arrived is not None and field in self.arrived:
+            self.arrived[field] += count
+    
+    def accounts_added(self, count: int = 1):
+        self.add("total_accounts", count)
+    
+    def accounts_removed(self, count: int = 1):
+        self.add("total_accounts", -count)
+    
+    def name_alert_reached_quorum(self):
+        self.add("total_name_alerts", 1)
+    
+    def name_alert_retired(self):
+        self.add("total_name_alerts", -1)
+    
+    def ca_alert_created(self):
+        self.add("total_ca_alerts", 1)
+
+dashboard_counters = DashboardCounters()
+
+# Account Performance
+class AccountMetrics:
+    """Per-account performance, materialized on TwitterAccount.performance.
+    
+    Each alert is applied to its accounts with atomic $inc/$push updates, so
+    workers never overwrite each other's counts. The last
+    PERFORMANCE_LEAD_SAMPLES lead times are kept in the account's lead_samples
+    field and median_lead_seconds is recomputed from them. A background
+    rebuild from the alert collections - at startup, every reconcile_seconds
+    and soon after invalidate() - corrects drift; archived alerts drop out of
+    the metrics there. Changes are announced with at most one
+    performance_changed per publish_seconds, not one per alert.
+    """
+    
+    def __init__(self, reconcile_seconds: int, publish_seconds: float):
+        self.reconcile_seconds = reconcile_seconds
+        self.publish_seconds = publish_seconds
+        self.account_ids: Dict[str, str] = {}  # username -> account id
+        self.reconciled_at: Optional[datetime] = None
+        self.changed = False  # Metrics written since the last performance_changed
+        self.wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def empty() -> Dict[str, Any]:
+        return {"alerts": 0, "name_alerts": 0, "ca_alerts": 0, "first_calls": 0}
+    
+    @staticmethod
+    def median(samples: List[float]) -> Optional[float]:
+        return round(statistics.median(samples), 1) if samples else None
+    
+    def invalidate(self):
+        """Rebuild from the alert collections soon, in the background"""
+        self.wakeup.set()
+    
+    async def account_id(self, username: str) -> Optional[str]:
+        if username not in self.account_ids:
+            account = await db.twitter_accounts.find_one({"username": username}, {"_id": 0, "id": 1})
+            if account is None:
+                return None  # Removed since the tweet was seen
+            self.account_ids[username] = account["id"]
+        return self.account_ids[username]
+    
+    async def reconcile(self):
+        """Rebuild every account's metrics from the alert collections"""
+        await alert_store.flush()
+        settings = await settings_cache.get()
+        min_threshold = settings.get('min_quorum_threshold', 3)
+        
+        # Stored values are read before the alerts, so a live update landing during the
+        # scan shows up as a changed alerts count below and that account is left alone
+        stored = {}
+        async for account in db.twitter_accounts.find({}, {"_id": 0, "id": 1, "username": 1, "performance": 1}):
+            self.account_ids[account["username"]] = account["id"]
+            stored[account["username"]] = (account["id"], account.get("performance") or {})
+        metrics = {username: self.empty() for username in stored}
+        samples: Dict[str, List[float]] = {username: [] for username in stored}
+        
+        name_alerts = db.name_alerts.find(
+            {"quorum_count": {"$gte": min_threshold}}, {"_id": 0, "accounts": 1}
+        ).sort("first_seen", 1)
+        async for alert in name_alerts:
+            for position, account in enumerate(alert.get("accounts", [])):
+                performance = metrics.get(account.get("username"))
+                if performance is None:
+                    continue
+                performance["alerts"] += 1
+                performance["name_alerts"] += 1
+                performance["first_calls"] += position == 0
+                if account.get("lead_seconds") is not None:
+                    samples[account["username"]].append(account["lead_seconds"])
+        async for alert in db.ca_alerts.find({}, {"_id": 0, "account_username": 1}):
+            performance = metrics.get(alert.get("account_username"))
+            if performance is not None:
+                performance["alerts"] += 1
+                performance["ca_alerts"] += 1
+        
+        operations = []
+        for username, performance in metrics.items():
+            lead_samples = samples[username][-PERFORMANCE_LEAD_SAMPLES:]
+            if lead_samples:
+                performance["median_lead_seconds"] = self.median(lead_samples)
+            account_id, current = stored[username]
+            if performance != current:
+                snapshot_journal.touch("accounts", account_id)
+                operations.append(UpdateOne(
+                    {"id": account_id, "performance.alerts": current.get("alerts")},
+                    {"$set": {"performance": performance, "lead_samples": lead_samples}}
+                ))
+        if operations:
+            result = await db.twitter_accounts.bulk_write(operations, ordered=False)
+            if result.modified_count:
+                self.changed = True
+        self.reconciled_at = datetime.now(timezone.utc)
+    
+    async def record(self, changes: List[Tuple[str, Dict[str, int], Optional[float]]]):
+        """Apply one alert's (username, increments, lead_seconds) changes to its accounts"""
+        async def apply(username: str, increments: Dict[str, int], lead_seconds: Optional[float]) -> bool:
+            account_id = await self.account_id(username)
+            if account_id is None:
+                return False
+            # Every counter, zeros included, so a first update stores the same shape a rebuild does
+            update: Dict[str, Any] = {"$inc": {f"performance.{field}": increments.get(field, 0) for field in self.empty()}}
+            if lead_seconds is not None:
+                update["$push"] = {"lead_samples": {"$each": [lead_seconds], "$slice": -PERFORMANCE_LEAD_SAMPLES}}
+            account = await alert_store.update_account_performance(account_id, update)
+            if account is None:
+                return False  # Written behind - the median catches up at the next rebuild
+            if lead_seconds is not None:
+                # Unless a newer update already landed - that one sets the median from more samples
+                await db.twitter_accounts.update_one(
+                    {"id": account_id, "performance.alerts": account["performance"]["alerts"]},
+                    {"$set": {"performance.median_lead_seconds": self.median(account["lead_samples"])}}
+                )
+            return True
+        
+        written = await asyncio.gather(*(apply(*change) for change in changes))
+        if any(written):
+            self.changed = True
+    
+    async def name_alert_reached_quorum(self, accounts: List[Dict[str, Any]]):
+        """Accounts come earliest first, each with its lead over the quorum"""
+        await self.record([
+            (account["username"], {"alerts": 1, "name_alerts": 1, "first_calls": int(position == 0)},
+             account.get("lead_seconds"))
+            for position, account in enumerate(accounts)
+        ])
+    
+    async def name_alert_joined(self, username: str):
+        await self.record([(username, {"alerts": 1, "name_alerts": 1}, None)])
+    
+    async def ca_alert_created(self, username: str):
+        await self.record([(username, {"alerts": 1, "ca_alerts": 1}, None)])
+    
+    async def run(self):
+        reconcile_at = 0.0
+        while True:
+            if self.wakeup.is_set() or time.monotonic() >= reconcile_at:
+                self.wakeup.clear()
+                try:
+                    await self.reconcile()
+                except Exception as e:
+                    logger.error(f"Account metrics reconcile failed: {e}")
+                reconcile_at = time.monotonic() + self.reconcile_seconds
+            if self.changed:
+                # Cached account listings on every worker go stale - once per tick, however many alerts
+                self.changed = False
+                try:
+                    await publish_control("performance_changed")
+                except Exception as e:
+                    self.changed = True
+                    logger.warning(f"Could not publish performance_changed: {e}")
             try:
-                await connection.send_json(message)
-            except:
-                self.active_connections.remove(connection)
+                await asyncio.wait_for(self.wakeup.wait(), self.publish_seconds)
+            except asyncio.TimeoutError:
+                pass
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+account_metrics = AccountMetrics(PERFORMANCE_RECONCILE_SECONDS, PERFORMANCE_PUBLISH_SECONDS)
+
+# Trending Tokens
+class CountMinSketch:
+    """Fixed-size frequency table: estimates never undercount, and overcount by
+    about total/width at worst in all but a 2^-depth share of cases"""
+    
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.table = array("I", bytes(4 * width * depth))
+    
+    def cells(self, key: str) -> List[int]:
+        """One cell per row, from two halves of a single hash"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+    
+    def add(self, cells: List[int], count: int = 1):
+        # Conservative update: only raise the cells that would otherwise undercount
+        target = min(self.table[cell] for cell in cells) + count
+        for cell in cells:
+            if self.table[cell] < target:
+                self.table[cell] = target
+    
+    def estimate(self, cells: List[int]) -> int:
+        return min(self.table[cell] for cell in cells)
+    
+    def clear(self):
+        self.table = array("I", bytes(4 * self.width * self.depth))
+
+class TrendingTokens:
+    """Streaming trending detector over every extracted token name, in fixed memory.
+    
+    Mentions are counted in a ring of count-min sketches, one per bucket_seconds,
+    covering the last `buckets` of them; the top_k tokens by windowed count are
+    kept as heavy-hitter candidates. A token spikes when its current-bucket count
+    reaches spike_min_mentions and spike_ratio times its average over the earlier
+    buckets - often well before it reaches quorum. Nothing is written per mention;
+    the ranking is mirrored to trending_tokens once per bucket for other workers.
+    """
+    
+    def __init__(self, bucket_seconds: int, buckets: int, width: int, depth: int, top_k: int,
+                 spike_min_mentions: int, spike_ratio: float):
+        self.bucket_seconds = bucket_seconds
+        self.sketches = [CountMinSketch(width, depth) for _ in range(max(2, buckets))]
+        self.top_k = top_k
+        self.spike_min_mentions = spike_min_mentions
+        self.spike_ratio = spike_ratio
+        self.current: Optional[int] = None  # Absolute index (epoch // bucket_seconds) of the newest bucket
+        self.top: Dict[str, int] = {}  # Heavy-hitter candidates -> windowed estimate
+        self.spiked = set()  # Tokens already reported in the current bucket
+        self.mentions = 0
+        self.dirty = False
+        self._task: Optional[asyncio.Task] = None
+    
+    def advance(self, now: float):
+        bucket = int(now // self.bucket_seconds)
+        if self.current is None:
+            self.current = bucket
+        if bucket <= self.current:
+            return
+        for expired in range(max(self.current + 1, bucket - len(self.sketches) + 1), bucket + 1):
+            self.sketches[expired % len(self.sketches)].clear()
+        self.current = bucket
+        self.spiked.clear()
+        # Re-rank the candidates against the shifted window
+        self.top = {token: count for token in self.top if (count := sum(self.counts(token)))}
+    
+    def counts(self, token: str) -> List[int]:
+        """Estimated mentions per bucket, current bucket first"""
+        cells = self.sketches[0].cells(token)
+        size = len(self.sketches)
+        return [self.sketches[(self.current - age) % size].estimate(cells) for age in range(size)]
+    
+    def record(self, token: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Count a mention; returns a spike event the first time the token spikes in this bucket"""
+        now = now or time.time()
+        self.advance(now)
+        sketch = self.sketches[self.current % len(self.sketches)]
+        sketch.add(sketch.cells(token))
+        self.mentions += 1
+        self.dirty = True
+        
+        counts = self.counts(token)
+        window = sum(counts)
+        if token in self.top or len(self.top) < self.top_k:
+            self.top[token] = window
+        else:
+            weakest = min(self.top, key=self.top.get)
+            if window > self.top[weakest]:
+                del self.top[weakest]
+                self.top[token] = window
+        
+        current, baseline = counts[0], self.baseline(counts)
+        if token in self.spiked or current < self.spike_min_mentions or current < self.spike_ratio * baseline:
+            return None
+        self.spiked.add(token)
+        return {**self.describe(token, counts), "detected_at": datetime.fromtimestamp(now, timezone.utc)}
+    
+    @staticmethod
+    def baseline(counts: List[int]) -> float:
+        return sum(counts[1:]) / (len(counts) - 1)
+    
+    def describe(self, token: str, counts: List[int]) -> Dict[str, Any]:
+        baseline = self.baseline(counts)
+        return {
+            "token_name": token,
+            "mentions": sum(counts),
+            "current": counts[0],
+            "baseline": round(baseline, 2),
+            "velocity": round(counts[0] / max(baseline, 1), 2),
+            "bucket_seconds": self.bucket_seconds,
+        }
+    
+    def trending(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Heavy-hitter candidates, fastest rising first"""
+        self.advance(now or time.time())
+        rows = [self.describe(token, self.counts(token)) for token in self.top]
+        rows = [row for row in rows if row["mentions"]]
+        return sorted(rows, key=lambda row: (row["velocity"], row["mentions"]), reverse=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "window_seconds": self.bucket_seconds * len(self.sketches),
+            "sketch_bytes": sum(sketch.table.itemsize * len(sketch.table) for sketch in self.sketches),
+            "mentions": self.mentions,
+            "candidates": len(self.top),
+        }
+    
+    async def save(self):
+        self.dirty = False
+        await db.trending_tokens.replace_one(
+            {"_id": "trending"},
+            {"_id": "trending", "worker": WORKER_ID, "updated_at": datetime.now(timezone.utc),
+             "tokens": self.trending(), **self.stats()},
+            upsert=True
+        )
+    
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.bucket_seconds)
+            if self.dirty:
+                try:
+                    await self.save()
+                except Exception as e:
+                    logger.error(f"Saving trending tokens failed: {e}")
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+trending_tokens = TrendingTokens(TRENDING_BUCKET_SECONDS, TRENDING_BUCKETS, TRENDING_SKETCH_WIDTH, TRENDING_SKETCH_DEPTH,
+                                 TRENDING_TOP_K, TRENDING_SPIKE_MIN_MENTIONS, TRENDING_SPIKE_RATIO)
 
-manager = ConnectionManager()
+# Alert Store
+class AlertStore:
+    """Alert persistence with optional write-behind batching.
+    
+    With write-behind enabled, mutations are applied to in-memory alert state
+    first and flushed to Mongo as ordered bulk_write batches every
+    flush_interval_ms or max_ops operations, whichever comes first. Unflushed
+    mutations never get older than max_loss_ms, and stop() flushes everything.
+    Live name alerts (per token) and known CA contracts are cached, each
+    LRU-bounded to cache_size entries; entries with unflushed writes stay cached
+    until they are flushed.
+    """
+    
+    def __init__(self, write_behind: bool, flush_interval_ms: int, max_ops: int, max_loss_ms: int, cache_size: int):
+        self.write_behind = write_behind
+        self.flush_interval = min(flush_interval_ms, max_loss_ms) / 1000
+        self.max_ops = max_ops
+        self.max_loss = max_loss_ms / 1000
+        self.cache_size = cache_size
+        self.name_alerts: OrderedDict = OrderedDict()  # token_name -> active alert (None if absent), LRU order
+        self.unflushed_tokens = set()  # Cached tokens with pending writes - the database is behind, so never evicted
+        self.ca_contracts: OrderedDict = OrderedDict()  # contract_address -> None, LRU order
+        self.unflushed_contracts = set()
+        self.pending: Dict[str, List[Any]] = {"name_alerts": [], "ca_alerts": [], "twitter_accounts": []}
+        self.pending_count = 0
+        self.oldest_pending: Optional[float] = None
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def find_name_alert(self, token_name: str) -> Optional[Dict[str, Any]]:
+        if not self.write_behind:
+            return await db.name_alerts.find_one({"token_name": token_name, "is_active": True})
+        if token_name in self.name_alerts:
+            self.name_alerts.move_to_end(token_name)
+            return self.name_alerts[token_name]
+        alert = await db.name_alerts.find_one({"token_name": token_name, "is_active": True})
+        self._remember(token_name, alert, unflushed=False)
+        return alert
+    
+    def _remember(self, token_name: str, alert: Optional[Dict[str, Any]], unflushed: bool = True):
+        self.name_alerts[token_name] = alert
+        self.name_alerts.move_to_end(token_name)
+        if unflushed:
+            self.unflushed_tokens.add(token_name)
+        while len(self.name_alerts) > self.cache_size:
+            evictable = next((token for token in self.name_alerts if token not in self.unflushed_tokens), None)
+            if evictable is None:
+                break
+            del self.name_alerts[evictable]
+    
+    def _remember_contract(self, contract_address: str, unflushed: bool = True):
+        self.ca_contracts[contract_address] = None
+        self.ca_contracts.move_to_end(contract_address)
+        if unflushed:
+            self.unflushed_contracts.add(contract_address)
+        while len(self.ca_contracts) > self.cache_size:
+            evictable = next((ca for ca in self.ca_contracts if ca not in self.unflushed_contracts), None)
+            if evictable is None:
+                break
+            del self.ca_contracts[evictable]
+    
+    def forget(self, token_name: str):
+        """Drop a cached token so the next lookup reads the database"""
+        self.name_alerts.pop(token_name, None)
+    
+    async def insert_name_alert(self, alert: Dict[str, Any]):
+        snapshot_journal.touch("name_alerts", alert["id"])
+        if not self.write_behind:
+            await db.name_alerts.insert_one(alert)
+            return
+        alert["_id"] = ObjectId()
+        self._remember(alert["token_name"], alert)
+        await self._enqueue("name_alerts", InsertOne(alert))
+    
+    async def add_name_alert_account(self, alert: Dict[str, Any], account: Dict[str, str], quorum_count: int):
+        last_seen = datetime.now(timezone.utc)
+        update = {"$set": {"quorum_count": quorum_count, "last_seen": last_seen}, "$push": {"accounts": account}}
+        if "expires_at" in alert:
+            update["$unset"] = {"expires_at": ""}
+        snapshot_journal.touch("name_alerts", alert["id"])
+        if not self.write_behind:
+            await db.name_alerts.update_one({"_id": alert["_id"]}, update)
+            return
+        self._remember(alert["token_name"], {
+            **{k: v for k, v in alert.items() if k != "expires_at"},
+            "quorum_count": quorum_count,
+            "last_seen": last_seen,
+            "accounts": alert.get("accounts", []) + [account]
+        })
+        await self._enqueue("name_alerts", UpdateOne({"_id": alert["_id"]}, update))
+    
+    async def deactivate_name_alert(self, alert: Dict[str, Any]):
+        update = {"$set": {"is_active": False}}
+        snapshot_journal.touch("name_alerts", alert["id"])
+        if not self.write_behind:
+            await db.name_alerts.update_one({"_id": alert["_id"]}, update)
+            return
+        self._remember(alert["token_name"], None)
+        await self._enqueue("name_alerts", UpdateOne({"_id": alert["_id"]}, update))
+    
+    async def ca_alert_exists(self, contract_address: str) -> bool:
+        if self.write_behind and contract_address in self.ca_contracts:
+            self.ca_contracts.move_to_end(contract_address)
+            return True
+        exists = await db.ca_alerts.find_one({"contract_address": contract_address}, {"_id": 1}) is not None
+        if exists and self.write_behind:
+            self._remember_contract(contract_address, unflushed=False)
+        return exists
+    
+    async def insert_ca_alert(self, alert: Dict[str, Any]):
+        snapshot_journal.touch("ca_alerts", alert["id"])
+        if not self.write_behind:
+            await db.ca_alerts.insert_one(alert)
+            return
+        alert["_id"] = ObjectId()
+        self._remember_contract(alert["contract_address"])
+        await self._enqueue("ca_alerts", InsertOne(alert))
+    
+    async def update_account_performance(self, account_id: str, update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply a performance update; the updated account when written through, None when queued"""
+        snapshot_journal.touch("accounts", account_id)
+        if not self.write_behind:
+            return await db.twitter_accounts.find_one_and_update(
+                {"id": account_id}, update, {"_id": 0, "performance": 1, "lead_samples": 1},
+                return_document=ReturnDocument.AFTER
+            )
+        await self._enqueue("twitter_accounts", UpdateOne({"id": account_id}, update))
+        return None
+    
+    async def _enqueue(self, collection: str, operation):
+        self.pending[collection].append(operation)
+        self.pending_count += 1
+        if self.oldest_pending is None:
+            self.oldest_pending = time.monotonic()
+        
+        if self.pending_count >= self.max_ops:
+            self._wakeup.set()
+        # Durability bound - flush inline if the background flusher is falling behind
+        if time.monotonic() - self.oldest_pending >= self.max_loss:
+            await self.flush()
+    
+    async def flush(self):
+        """Write all pending alert mutations to Mongo"""
+        async with self._flush_lock:
+            if not self.pending_count:
+                return
+            flushed = self.pending_count
+            batches = self.pending
+            unflushed_tokens, self.unflushed_tokens = self.unflushed_tokens, set()
+            unflushed_contracts, self.unflushed_contracts = self.unflushed_contracts, set()
+            oldest = self.oldest_pending
+            self.pending = {"name_alerts": [], "ca_alerts": [], "twitter_accounts": []}
+            self.pending_count = 0
+            self.oldest_pending = None
+            
+            for collection, operations in batches.items():
+                if not operations:
+                    continue
+                try:
+                    await db[collection].bulk_write(operations, ordered=True)
+                except BulkWriteError as e:
+                    # Ordered batch stopped at a bad operation - drop it and retry the rest
+                    failed_index = e.details["writeErrors"][0]["index"]
+                    logger.error(f"Dropping failed {collection} write: {e.details['writeErrors'][0].get('errmsg')}")
+                    self._requeue(collection, operations[failed_index + 1:], oldest)
+                    if collection == "name_alerts":
+                        self.unflushed_tokens |= unflushed_tokens
+                    elif collection == "ca_alerts":
+                        self.unflushed_contracts |= unflushed_contracts
+                except Exception as e:
+                    logger.error(f"Alert flush to {collection} failed, will retry: {e}")
+                    self._requeue(collection, operations, oldest)
+                    if collection == "name_alerts":
+                        self.unflushed_tokens |= unflushed_tokens
+                    elif collection == "ca_alerts":
+                        self.unflushed_contracts |= unflushed_contracts
+        if self.pending_count < flushed:
+            # Listings read the collections - cached ones may predate these writes
+            await publish_control("alerts_changed")
+    
+    def _requeue(self, collection: str, operations: List[Any], oldest: float):
+        if not operations:
+            return
+        self.pending[collection][:0] = operations
+        self.pending_count += len(operations)
+        self.oldest_pending = oldest
+    
+    def reset(self):
+        """Forget cached alert state (e.g. after the collections were replaced)"""
+        self.name_alerts.clear()
+        self.unflushed_tokens.clear()
+        self.ca_contracts.clear()
+        self.unflushed_contracts.clear()
+    
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+    
+    def start(self):
+        if self.write_behind and self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+alert_store = AlertStore(ALERT_WRITE_BEHIND, ALERT_FLUSH_INTERVAL_MS, ALERT_FLUSH_MAX_OPS, ALERT_MAX_LOSS_MS,
+                         ALERT_CACHE_SIZE)
+
+# Snapshot Journal
+class SnapshotJournal:
+    """Ids of documents changed since the last version snapshot, per snapshot collection.
+    
+    The journal is only trusted for a delta when its anchor is the latest
+    version; after a restart or restore the next snapshot is a full base.
+    """
+    
+    def __init__(self):
+        self.anchor: Optional[int] = None
+        self.changed: Dict[str, set] = {key: set() for key in SNAPSHOT_COLLECTIONS}
+    
+    def touch(self, collection: str, doc_id: str):
+        self.changed[collection].add(doc_id)
+    
+    def take(self):
+        """Hand over the current changes and start a fresh, unanchored journal"""
+        anchor, changed = self.anchor, self.changed
+        self.anchor = None
+        self.changed = {key: set() for key in SNAPSHOT_COLLECTIONS}
+        return anchor, changed
+    
+    def invalidate(self):
+        self.anchor = None
+
+snapshot_journal = SnapshotJournal()
+
+# Quorum Window
+class QuorumWindow:
+    """Sliding-window quorum engine: distinct accounts mentioning each token recently.
+    
+    Mentions live in memory and are evicted once older than the window. The
+    state is checkpointed to the quorum_window collection periodically so a
+    restart doesn't forget accounts that are still inside their window.
+    """
+    
+    def __init__(self, checkpoint_seconds: int):
+        self.checkpoint_seconds = checkpoint_seconds
+        self.mentions: Dict[str, Dict[str, Dict[str, Any]]] = {}  # token -> username -> mention
+        self.expiry = deque()  # (seen_at, token, username) in arrival order
+        self.dirty = set()  # tokens changed since the last checkpoint
+        self._task: Optional[asyncio.Task] = None
+    
+    def evict(self, window_seconds: int, now: Optional[float] = None):
+        cutoff = (now or time.time()) - window_seconds
+        while self.expiry and self.expiry[0][0] < cutoff:
+            seen_at, token, username = self.expiry.popleft()
+            token_mentions = self.mentions.get(token)
+            # Skip entries superseded by a later mention from the same account
+            if token_mentions and token_mentions.get(username, {}).get("seen_at") == seen_at:
+                del token_mentions[username]
+                if not token_mentions:
+                    del self.mentions[token]
+                self.dirty.add(token)
+    
+    def record(self, token: str, account: Dict[str, str], window_seconds: int, now: Optional[float] = None) -> bool:
+        """Add a mention (seen at `now`, default the current time); returns False if the account already counts"""
+        now = now or time.time()
+        self.evict(window_seconds, now)
+        token_mentions = self.mentions.setdefault(token, {})
+        is_new = account["username"] not in token_mentions
+        if is_new:
+            token_mentions[account["username"]] = {**account, "seen_at": now}
+        elif token_mentions[account["username"]]["seen_at"] < now:
+            token_mentions[account["username"]]["seen_at"] = now
+        else:
+            return is_new  # Backfilled mention older than the one already counted
+        if self.expiry and now < self.expiry[-1][0]:
+            bisect.insort(self.expiry, (now, token, account["username"]))
+        else:
+            self.expiry.append((now, token, account["username"]))
+        self.dirty.add(token)
+        return is_new
+    
+    def count(self, token: str) -> int:
+        return len(self.mentions.get(token, {}))
+    
+    def accounts(self, token: str, quorum_at: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Accounts counting toward `token`, earliest first - with their lead over `quorum_at` if given"""
+        mentions = sorted(self.mentions.get(token, {}).values(), key=lambda m: m["seen_at"])
+        accounts = []
+        for mention in mentions:
+            account = {k: v for k, v in mention.items() if k != "seen_at"}
+            if quorum_at is not None:
+                account["lead_seconds"] = round(quorum_at - mention["seen_at"], 1)
+            accounts.append(account)
+        return accounts
+    
+    async def load(self):
+        """Rebuild the window from the last checkpoint"""
+        self.mentions.clear()
+        self.expiry.clear()
+        async for doc in db.quorum_window.find({}, {"_id": 0}):
+            self.mentions[doc["token_name"]] = {m["username"]: m for m in doc["mentions"]}
+            for mention in doc["mentions"]:
+                self.expiry.append((mention["seen_at"], doc["token_name"], mention["username"]))
+        self.expiry = deque(sorted(self.expiry))
+    
+    async def checkpoint(self):
+        """Persist tokens changed since the last checkpoint"""
+        if not self.dirty:
+            return
+        tokens, self.dirty = self.dirty, set()
+        operations = []
+        for token in tokens:
+            if token in self.mentions:
+                operations.append(ReplaceOne(
+                    {"token_name": token},
+                    {"token_name": token, "mentions": list(self.mentions[token].values())},
+                    upsert=True
+                ))
+            else:
+                operations.append(DeleteOne({"token_name": token}))
+        try:
+            await db.quorum_window.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Quorum window checkpoint failed, will retry: {e}")
+            self.dirty |= tokens
+    
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_seconds)
+            settings = await settings_cache.get()
+            self.evict(settings.get('quorum_window_minutes', 60) * 60)
+            await self.checkpoint()
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.checkpoint()
+
+quorum_window = QuorumWindow(QUORUM_CHECKPOINT_SECONDS)
+
+# Keyed Locks
+class KeyedLocks:
+    """One FIFO lock per key, created on demand and dropped once nobody holds or waits for it.
+    
+    Work for different keys runs concurrently; work for the same key runs one
+    at a time in arrival order.
+    """
+    
+    def __init__(self):
+        self.locks: Dict[str, list] = {}  # key -> [lock, holders and waiters]
+    
+    @asynccontextmanager
+    async def hold(self, key: str):
+        entry = self.locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.locks[key]
+    
+    async def run(self, key: str, coro):
+        async with self.hold(key):
+            return await coro
+
+alert_locks = KeyedLocks()  # "name:<token>" and "ca:<contract>" - alert updates for one key never race
+
+# Alert Lanes
+class AlertLanes:
+    """Prioritized alert processing: a "ca" lane and a "name" lane.
+    
+    Each lane has its own workers and its own pooled HTTP connections, so a
+    flood of ticker spam can't take the capacity CA alerts need. Name workers
+    also hold off while CA work is queued, and the name queue is bounded -
+    work beyond it is shed. Before start() (tests, benchmarks) work runs inline.
+    """
+    
+    def __init__(self, workers: Dict[str, int], connections: Dict[str, int], name_queue_size: int):
+        self.workers = workers
+        self.connections = connections
+        self.queues = {"ca": asyncio.Queue(), "name": asyncio.Queue(maxsize=name_queue_size)}
+        self.ca_idle = asyncio.Event()
+        self.ca_idle.set()
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.counts = {lane: {"processed": 0, "failed": 0, "shed": 0} for lane in self.queues}
+        self._tasks: List[asyncio.Task] = []
+    
+    def submit(self, lane: str, key: str, factory) -> asyncio.Future:
+        """Queue factory() to run under alert_locks[key]; the future resolves when it has"""
+        if not self._tasks:
+            return asyncio.ensure_future(alert_locks.run(key, factory()))
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queues[lane].put_nowait((key, factory, future))
+        except asyncio.QueueFull:
+            self.counts[lane]["shed"] += 1
+            future.set_result(None)
+            return future
+        if lane == "ca":
+            self.ca_idle.clear()
+        return future
+    
+    async def worker(self, lane: str):
+        queue = self.queues[lane]
+        while True:
+            if lane == "name":
+                await self.ca_idle.wait()
+            # No await between taking a job and queueing on its lock - keeps per-key arrival order
+            key, factory, future = await queue.get()
+            try:
+                result = await alert_locks.run(key, factory())
+                self.counts[lane]["processed"] += 1
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                self.counts[lane]["failed"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+                if lane == "ca" and queue.empty():
+                    self.ca_idle.set()
+    
+    @asynccontextmanager
+    async def http(self, lane: str):
+        """The lane's pooled HTTP session, or a throwaway one when the lanes aren't running"""
+        session = self.sessions.get(lane)
+        if session is not None and not session.closed:
+            yield session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            lane: {"workers": self.workers[lane], "connections": self.connections[lane],
+                   "queued": queue.qsize(), **self.counts[lane]}
+            for lane, queue in self.queues.items()
+        }
+    
+    def start(self):
+        if self._tasks:
+            return
+        for lane, workers in self.workers.items():
+            self.sessions[lane] = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connections[lane]))
+            self._tasks.extend(asyncio.create_task(self.worker(lane)) for _ in range(workers))
+    
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs no worker took will never run - release whoever awaits them
+        for lane, queue in self.queues.items():
+            while not queue.empty():
+                _, _, future = queue.get_nowait()
+                queue.task_done()
+                future.cancel()
+            if lane == "ca":
+                self.ca_idle.set()
+        for session in self.sessions.values():
+            await session.close()
+        self.sessions = {}
+
+alert_lanes = AlertLanes({"ca": CA_LANE_WORKERS, "name": NAME_LANE_WORKERS},
+                         {"ca": CA_HTTP_CONNECTIONS, "name": NAME_HTTP_CONNECTIONS}, NAME_LANE_QUEUE_SIZE)
+
+# Alert Archiver
+class AlertArchiver:
+    """Moves alerts older than archive_after_days into compressed alerts_archive chunks.
+    
+    Each chunk holds up to ARCHIVE_BATCH_SIZE alerts of one collection as
+    zlib-compressed extended JSON, tagged with its first_seen range so the
+    archive endpoint only decompresses chunks overlapping a query.
+    
+    Every worker schedules runs, but a run first takes the "archiver" lease in
+    the leases collection, so only one worker archives at a time.
+    """
+    
+    def __init__(self, interval_seconds: int):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+    
+    async def acquire_lease(self) -> bool:
+        """Take or extend the archiver lease; False while another worker holds it"""
+        now = datetime.now(timezone.utc)
+        try:
+            await db.leases.update_one(
+                {"_id": "archiver", "$or": [{"owner": WORKER_ID}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": WORKER_ID, "expires_at": now + timedelta(seconds=ARCHIVE_LEASE_SECONDS)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+    
+    async def release_lease(self):
+        await db.leases.delete_one({"_id": "archiver", "owner": WORKER_ID})
+    
+    async def archive(self) -> Optional[Dict[str, int]]:
+        """Archive one round; None when another worker is already archiving"""
+        settings = await settings_cache.get()
+        days = settings.get('archive_after_days', 30)
+        if days <= 0:
+            return {}
+        if not await self.acquire_lease():
+            return None
+        try:
+            return await self._archive(days)
+        finally:
+            await self.release_lease()
+    
+    async def _archive(self, days: int) -> Dict[str, int]:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        
+        await alert_store.flush()
+        archived = {}
+        for collection in ARCHIVE_COLLECTIONS:
+            archived[collection] = 0
+            while True:
+                docs = await db[collection].find({"first_seen": {"$lt": cutoff}}).sort(
+                    [("first_seen", 1), ("_id", 1)]
+                ).limit(ARCHIVE_BATCH_SIZE).to_list(ARCHIVE_BATCH_SIZE)
+                if not docs:
+                    break
+                if not await self.acquire_lease():
+                    raise RuntimeError("Archiver lease lost to another worker")
+                # Insert the chunk before deleting, so a crash can only duplicate - never lose - alerts
+                await db.alerts_archive.insert_one({
+                    "collection": collection,
+                    "first_seen_from": docs[0]["first_seen"],
+                    "first_seen_to": docs[-1]["first_seen"],
+                    "count": len(docs),
+                    "archived_at": datetime.now(timezone.utc),
+                    "payload": zlib.compress(json_util.dumps(docs).encode())
+                })
+                await db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+                for doc in docs:
+                    if doc.get("id"):
+                        snapshot_journal.touch(collection, doc["id"])
+                archived[collection] += len(docs)
+        
+        if any(archived.values()):
+            alert_store.reset()
+            dashboard_counters.invalidate()
+            account_metrics.invalidate()
+            await publish_control("alerts_changed")
+            logger.info(f"🗄️ Archived alerts older than {days} days: {archived}")
+        return archived
+    
+    async def query(self, collection: str, since: Optional[datetime], until: Optional[datetime],
+                    limit: int) -> List[Dict[str, Any]]:
+        """Archived alerts of one collection within [since, until), oldest first"""
+        chunk_filter = {"collection": collection}
+        if since:
+            chunk_filter["first_seen_to"] = {"$gte": since}
+        if until:
+            chunk_filter["first_seen_from"] = {"$lt": until}
+        
+        results = []
+        async for chunk in db.alerts_archive.find(chunk_filter).sort("first_seen_from", 1):
+            for doc in json_util.loads(zlib.decompress(chunk["payload"])):
+                first_seen = doc["first_seen"].replace(tzinfo=timezone.utc) if doc["first_seen"].tzinfo is None else doc["first_seen"]
+                if (since and first_seen < since) or (until and first_seen >= until):
+                    continue
+                results.append(doc)
+                if len(results) >= limit:
+                    return results
+        return results
+    
+    async def run(self):
+        while True:
+            try:
+                await self.archive()
+            except Exception as e:
+                logger.error(f"Alert archival failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+alert_archiver = AlertArchiver(ARCHIVE_INTERVAL_SECONDS)
+
+# Response Cache
+class ResponseCache:
+    """Serialized GET responses keyed by path and query, tagged with the collections they read.
+    
+    Invalidating a tag bumps its generation; entries built under an older
+    generation are misses, and a response computed across an invalidation is
+    never stored. Least recently used entries go once max_bytes is exceeded.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (generations, body, etag, headers)
+        self.generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def generation(self, tags: tuple) -> tuple:
+        return tuple(self.generations.get(tag, 0) for tag in tags)
+    
+    def get(self, key: str, tags: tuple) -> Optional[tuple]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != self.generation(tags):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    
+    def put(self, key: str, generation: tuple, tags: tuple, body: bytes, headers: Dict[str, str]) -> tuple:
+        entry = (generation, body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', headers)
+        if generation != self.generation(tags) or len(body) > self.max_bytes:
+            return entry  # Stale already, or too big to keep - still good for this response
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key)[1])
+        self.entries[key] = entry
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self.size -= len(self.entries.popitem(last=False)[1][1])
+        return entry
+    
+    def invalidate(self, *tags: str):
+        for tag in tags:
+            self.generations[tag] = self.generations.get(tag, 0) + 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def cached_response(*tags: str):
+    """Serve a GET endpoint from response_cache, with a strong ETag and 304 Not Modified"""
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, request: Request, **kwargs):
+            key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+            entry = response_cache.get(key, tags)
+            if entry is None:
+                generation = response_cache.generation(tags)
+                result = await endpoint(*args, **kwargs)
+                if not isinstance(result, Response):
+                    result = MongoJSONResponse(result)
+                if result.status_code != 200:
+                    return result
+                next_cursor = result.headers.get("x-next-cursor")
+                entry = response_cache.put(key, generation, tags, result.body,
+                                           {"X-Next-Cursor": next_cursor} if next_cursor else {})
+            _, body, etag, headers = entry
+            headers = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            return Response(body, media_type="application/json", headers=headers)
+        
+        signature = inspect.signature(endpoint)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        ])
+        return wrapper
+    return decorator
+
+# Event Bus
+class EventBus:
+    """Publish/subscribe between API workers.
+    
+    Handlers get an event dict - channel, message, origin worker, and on shared
+    buses a global seq and stream. The publishing worker runs its handlers right
+    away and ignores its own event when the bus echoes it back.
+    """
+    
+    def __init__(self):
+        self.handlers: Dict[str, List[Any]] = {}
+        self.stream: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def subscribe(self, channel: str, handler):
+        self.handlers.setdefault(channel, []).append(handler)
+    
+    async def deliver(self, event: Dict[str, Any]):
+        for handler in self.handlers.get(event["channel"], []):
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(f"Bus handler for {event['channel']} failed: {e}")
+    
+    def envelope(self, channel: str, message: Dict[str, Any], seq: int) -> Dict[str, Any]:
+        return {"channel": channel, "seq": seq, "stream": self.stream, "origin": WORKER_ID,
+                "payload": dumps_json(message).decode()}
+    
+    async def receive(self, event: Dict[str, Any]):
+        if event.get("origin") == WORKER_ID:
+            return
+        await self.deliver({**event, "message": orjson.loads(event["payload"])})
+    
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        await self.deliver({"channel": channel, "seq": None, "stream": None, "origin": WORKER_ID, "message": message})
+    
+    async def start(self):
+        pass
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+class MongoBus(EventBus):
+    """Events go into bus_events and reach the other workers through a change stream.
+    
+    Without change streams (standalone mongod, embedded storage engines shared by
+    several workers) it polls bus_events by seq, waiting briefly for seqs taken by
+    a publisher that hasn't inserted yet.
+    """
+    
+    def __init__(self, poll_interval_ms: int):
+        super().__init__()
+        self.poll_interval = poll_interval_ms / 1000
+        self.resume_token = None
+    
+    async def next_seq(self) -> int:
+        counter = await db.bus_counters.find_one_and_update(
+            {"_id": "bus"},
+            {"$inc": {"seq": 1}, "$setOnInsert": {"stream": str(uuid.uuid4())}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.stream = counter["stream"]
+        return counter["seq"]
+    
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        event = self.envelope(channel, message, await self.next_seq())
+        await db.bus_events.insert_one({**event, "at": datetime.now(timezone.utc)})
+        await self.deliver({**event, "message": message})
+    
+    async def poll(self):
+        counter = await db.bus_counters.find_one({"_id": "bus"})
+        floor = (counter["seq"] if counter else 0) + 1  # Lowest seq not received yet
+        seen, gap_since = set(), None
+        while True:
+            async for event in db.bus_events.find({"seq": {"$gte": floor}}, {"_id": 0}).sort("seq", 1):
+                if event["seq"] not in seen:
+                    seen.add(event["seq"])
+                    await self.receive(event)
+            while floor in seen:
+                seen.discard(floor)
+                floor += 1
+            if not seen:
+                gap_since = None
+            elif gap_since is None:
+                gap_since = time.monotonic()
+            elif time.monotonic() - gap_since > BUS_GAP_TIMEOUT_SECONDS:
+                floor, gap_since = min(seen), None  # The publisher died between taking a seq and inserting
+            await asyncio.sleep(self.poll_interval)
+    
+    async def run(self):
+        while True:
+            try:
+                async with db.bus_events.watch([{"$match": {"operationType": "insert"}}],
+                                               resume_after=self.resume_token) as stream:
+                    async for change in stream:
+                        self.resume_token = change["_id"]
+                        await self.receive(change["fullDocument"])
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                logger.info(f"Bus change stream unavailable, polling bus_events: {e}")
+                await self.poll()
+            except Exception as e:
+                logger.warning(f"Bus change stream error, reconnecting: {e}")
+                await asyncio.sleep(5)
+    
+    async def start(self):
+        await db.bus_events.create_index("seq")
+        await db.bus_events.create_index("at", expireAfterSeconds=BUS_RETENTION_SECONDS)
+        counter = await db.bus_counters.find_one({"_id": "bus"})
+        self.stream = counter["stream"] if counter else None
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+class LocalRedis:
+    """In-process stand-in for the redis.asyncio calls RedisBus makes (REDIS_URL=memory://).
+    
+    Only reaches subscribers in the same process - for tests and single-worker runs.
+    """
+    
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+    
+    async def incr(self, key: str) -> int:
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+    
+    async def set(self, key: str, value: str, nx: bool = False) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        return True
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self.values.get(key)
+        return None if value is None else str(value).encode()
+    
+    async def publish(self, channel: str, data: bytes) -> int:
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel.encode(), "data": data})
+        return len(queues)
+    
+    def pubsub(self) -> "LocalPubSub":
+        return LocalPubSub(self)
+    
+    async def aclose(self):
+        pass
+
+class LocalPubSub:
+    def __init__(self, redis: LocalRedis):
+        self.redis = redis
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.channels: List[str] = []
+    
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.redis.subscribers.setdefault(channel, []).append(self.queue)
+            self.channels.append(channel)
+    
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+    
+    async def aclose(self):
+        for channel in self.channels:
+            self.redis.subscribers[channel].remove(self.queue)
+        self.channels = []
+
+class RedisBus(EventBus):
+    """Redis (or any server speaking its protocol) pub/sub, with INCR for global seqs"""
+    
+    def __init__(self, url: str, prefix: str):
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self.redis = None
+        self.pubsub = None
+    
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        event = self.envelope(channel, message, await self.redis.incr(f"{self.prefix}:seq"))
+        await self.redis.publish(self.prefix, dumps_json(event))
+        await self.deliver({**event, "message": message})
+    
+    async def run(self):
+        while True:
+            try:
+                async for item in self.pubsub.listen():
+                    if item["type"] == "message":
+                        await self.receive(orjson.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Redis bus error, resubscribing: {e}")
+                await asyncio.sleep(5)
+                await self.pubsub.subscribe(self.prefix)
+    
+    async def start(self):
+        if self.url.startswith("memory://"):
+            self.redis = LocalRedis()
+        else:
+            try:
+                import redis.asyncio as aioredis
+            except ImportError:
+                raise RuntimeError("BUS_BACKEND=redis needs the redis package (pip install redis)")
+            self.redis = aioredis.from_url(self.url)
+        await self.redis.set(f"{self.prefix}:stream", str(uuid.uuid4()), nx=True)
+        self.stream = (await self.redis.get(f"{self.prefix}:stream")).decode()
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.subscribe(self.prefix)
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        await super().stop()
+        if self.redis is not None:
+            await self.pubsub.aclose()
+            await self.redis.aclose()
+            self.redis = None
+
+def create_bus(backend: str) -> EventBus:
+    if backend == "mongo":
+        return MongoBus(BUS_POLL_INTERVAL_MS)
+    if backend == "redis":
+        return RedisBus(REDIS_URL, REDIS_KEY_PREFIX)
+    if backend != "local":
+        raise ValueError(f"Unknown BUS_BACKEND {backend!r} (expected local, mongo or redis)")
+    return EventBus()
+
+bus = create_bus(BUS_BACKEND)
+
+def apply_alert_changes(changes: Optional[Dict[str, Any]]):
+    """Mirror another worker's alert write in this worker's dashboard counters and snapshot journal"""
+    if changes is None:
+        dashboard_counters.invalidate()
+        snapshot_journal.invalidate()
+        return
+    for field, count in changes.get("counters", {}).items():
+        if count:
+            dashboard_counters.add(field, count)
+    for collection, doc_ids in changes.get("journal", {}).items():
+        for doc_id in doc_ids:
+            snapshot_journal.touch(collection, doc_id)
+    # The alert's accounts get new performance metrics
+    for username in changes.get("usernames", []):
+        account_id = account_metrics.account_ids.get(username)
+        if account_id is None:
+            snapshot_journal.invalidate()
+            break
+        snapshot_journal.touch("accounts", account_id)
+
+async def on_alert_event(event: Dict[str, Any]):
+    """Broadcast an alert to this worker's WebSocket clients"""
+    message = dict(event["message"])
+    changes = message.pop("changes", None)  # For the workers only, never broadcast
+    response_cache.invalidate("ca_alerts" if message.get("type") == "ca_alert" else "name_alerts")
+    if event["origin"] != WORKER_ID:
+        apply_alert_changes(changes)
+    if event["seq"] is not None:
+        message = {**message, "seq": event["seq"]}
+    await manager.broadcast(message, event["stream"])
+
+async def on_control_event(event: Dict[str, Any]):
+    """Apply monitoring and data changes made through another worker"""
+    global monitoring_active
+    if event["origin"] == WORKER_ID:
+        return
+    action = event["message"].get("action")
+    apply_control(action)
+    if action in ("monitoring_start", "monitoring_stop"):
+        # One browser monitor at a time: the worker that took the latest start runs it
+        monitoring_active = False
+        await settings_cache.refresh()
+    elif action == "settings_changed":
+        await settings_cache.refresh()
+    elif action == "accounts_changed":
+        dashboard_counters.invalidate()
+        snapshot_journal.invalidate()
+    elif action == "restored":
+        alert_store.reset()
+        snapshot_journal.invalidate()
+        dashboard_counters.invalidate()
+        account_metrics.invalidate()
+        await settings_cache.refresh()
+
+async def on_trending_event(event: Dict[str, Any]):
+    """Pass a trending spike to this worker's WebSocket clients - live only, never replayed"""
+    await manager.notify(event["message"])
+
+bus.subscribe("alerts", on_alert_event)
+bus.subscribe("trending", on_trending_event)
+bus.subscribe("control", on_control_event)
+
+def apply_control(action: str):
+    """Effects of a control action shared by the publishing worker and the rest"""
+    response_cache.invalidate(*CONTROL_CACHE_TAGS.get(action, ()))
+    if action == "restoring":
+        restore_gate.clear()
+    elif action == "restored":
+        restore_gate.set()
+    if action in ("accounts_changed", "restored", "monitoring_start", "monitoring_stop"):
+        monitor_wakeup.set()
+
+async def publish_control(action: str):
+    apply_control(action)
+    await bus.publish("control", {"action": action})
+
+async def ensure_name_alert_expiry():
+    """Expire name alerts stored below quorum at their expires_at.
+    
+    Alerts are only written once they reach quorum, so just documents left over
+    from before that carry expires_at. They are stamped once, with the threshold
+    and name_alert_ttl_hours in force then; settings changed later never delete
+    an alert, and joining an alert clears its expires_at.
+    """
+    indexes = await db.name_alerts.index_information()
+    if LEGACY_NAME_ALERT_TTL_INDEX in indexes:
+        await db.name_alerts.drop_index(LEGACY_NAME_ALERT_TTL_INDEX)
+    await db.name_alerts.create_index("expires_at", name=NAME_ALERT_EXPIRY_INDEX, expireAfterSeconds=0)
+    
+    if await db.migrations.find_one({"_id": NAME_ALERT_EXPIRY_INDEX}):
+        return
+    settings = await settings_cache.get()
+    ttl = timedelta(hours=settings.get('name_alert_ttl_hours', 24))
+    if ttl:
+        unpromoted = db.name_alerts.find(
+            {"quorum_count": {"$lt": settings.get('min_quorum_threshold', 3)}, "expires_at": {"$exists": False}},
+            {"_id": 1, "id": 1, "first_seen": 1}
+        )
+        operations = []
+        async for alert in unpromoted:
+            operations.append(UpdateOne({"_id": alert["_id"]}, {"$set": {"expires_at": alert["first_seen"] + ttl}}))
+            snapshot_journal.touch("name_alerts", alert["id"])
+        if operations:
+            await db.name_alerts.bulk_write(operations, ordered=False)
+            logger.info(f"Stamped {len(operations)} name alerts below quorum to expire")
+    await db.migrations.update_one({"_id": NAME_ALERT_EXPIRY_INDEX},
+                                   {"$set": {"at": datetime.now(timezone.utc)}}, upsert=True)
 
 # Utility Functions
 def validate_solana_contract(address: str) -> bool:
@@ -153,14 +2172,75 @@ def is_pump_fun_contract(tweet_text: str) -> Optional[str]:
             return addr
     return None
 
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    """Encode a keyset position (sort value + _id) as an opaque cursor"""
+    return base64.urlsafe_b64encode(json_util.dumps([sort_value, doc_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        sort_value, doc_id = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [sort_value, doc_id]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str], exclude: tuple = ()) -> Optional[Dict[str, int]]:
+    """Turn a comma-separated field list into a Mongo inclusion projection, minus fields never served"""
+    if not fields:
+        return None
+    projection = {field.strip(): 1 for field in fields.split(',') if field.strip() and field.strip() not in exclude}
+    return projection or {"_id": 1}
+
+async def fetch_page(collection, query: Dict[str, Any], sort_field: str, direction: int,
+                     limit: int, cursor: Optional[str], projection: Optional[Dict[str, int]]):
+    """Keyset-paginated find ordered by (sort_field, _id); returns the page and the next cursor (if any)"""
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        op = "$lt" if direction < 0 else "$gt"
+        query = {"$and": [query, {"$or": [
+            {sort_field: {op: sort_value}},
+            {sort_field: sort_value, "_id": {op: last_id}}
+        ]}]}
+    if projection and all(projection.values()):
+        # Keyset fields are always needed to build the next cursor
+        projection = {**projection, sort_field: 1, "_id": 1}
+    
+    docs = await collection.find(query, projection).sort(
+        [(sort_field, direction), ("_id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1].get(sort_field), docs[-1]["_id"])
+    return docs, next_cursor
+
+def page_response(docs: List[Dict[str, Any]], next_cursor: Optional[str]) -> MongoJSONResponse:
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return MongoJSONResponse(docs, headers=headers)
+
 class TwitterBrowserMonitor:
-    """Real-time browser-based Twitter monitoring - bypasses API limits!"""
+    """Real-time browser-based Twitter monitoring - bypasses API limits!
+    
+    One thread and Chrome driver per account. reconcile() starts and stops only
+    the accounts that changed; a stopped account's driver goes back to a small
+    warm pool, so the next account started skips launching Chrome.
+    """
     
     def __init__(self):
         self.drivers = {}
         self.monitoring_threads = {}
-        self.stop_signals = {}
+        self.stop_signals: Dict[str, threading.Event] = {}
+        self.status: Dict[str, Dict[str, Any]] = {}  # username -> state, started_at, last_refresh, tweets_seen...
+        self.warm_drivers = []
+        self.keep_warm = True
+        self.pool_lock = threading.Lock()
+        self.started = 0
+        self.stopped = 0
+        self.desired = 0
+        self.reconciled_at: Optional[datetime] = None
         self.executor = ThreadPoolExecutor(max_workers=10)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # The app's loop - tweets are processed there
         
     def create_driver(self):
         """Create headless Chrome driver"""
@@ -175,13 +2255,35 @@ class TwitterBrowserMonitor:
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         return driver
+    
+    def acquire_driver(self):
+        """A warm driver from the pool, or a new one; returns (driver, was_warm)"""
+        with self.pool_lock:
+            if self.warm_drivers:
+                return self.warm_drivers.pop(), True
+        return self.create_driver(), False
+    
+    def release_driver(self, driver, healthy: bool):
+        """Park a healthy driver for the next account, or quit it"""
+        if healthy:
+            with self.pool_lock:
+                if self.keep_warm and len(self.warm_drivers) < MONITOR_WARM_DRIVERS:
+                    self.warm_drivers.append(driver)
+                    return
+        try:
+            driver.quit()
+        except Exception:
+            pass
         
     def monitor_twitter_account(self, username: str):
         """Monitor single Twitter account in real-time"""
+        stop = self.stop_signals[username]
+        status = self.status[username]
+        driver, healthy = None, True
         try:
             logger.info(f"🌐 Starting browser monitoring for @{username}")
             
-            driver = self.create_driver()
+            driver, status["warm_start"] = self.acquire_driver()
             self.drivers[username] = driver
             
             # Navigate to Twitter profile
@@ -192,13 +2294,15 @@ class TwitterBrowserMonitor:
             WebDriverWait(driver, 10).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='tweet']"))
             )
+            status["state"] = "running"
             
             seen_tweets = set()
             
-            while not self.stop_signals.get(username, False):
+            while not stop.is_set():
                 try:
                     # Find all tweet elements
                     tweets = driver.find_elements(By.CSS_SELECTOR, "[data-testid='tweet']")
+                    status["last_refresh"] = datetime.now(timezone.utc)
                     
                     for tweet_element in tweets[:5]:  # Check top 5 tweets
                         try:
@@ -211,19 +2315,21 @@ class TwitterBrowserMonitor:
                             
                             if tweet_hash not in seen_tweets:
                                 seen_tweets.add(tweet_hash)
+                                status["tweets_seen"] += 1
                                 logger.info(f"🐦 NEW TWEET @{username}: {tweet_text[:100]}...")
                                 
                                 # Process tweet for token names and contracts
                                 asyncio.run_coroutine_threadsafe(
                                     self.process_tweet_content(username, tweet_text, str(tweet_hash)),
-                                    asyncio.get_event_loop()
+                                    self.loop
                                 )
                                 
                         except NoSuchElementException:
                             continue
                     
                     # Refresh page every 15 seconds to get new tweets - ULTRA FAST!
-                    time.sleep(15)
+                    if stop.wait(15):
+                        break
                     driver.refresh()
                     
                     # Wait for page to reload
@@ -233,58 +2339,179 @@ class TwitterBrowserMonitor:
                     
                 except TimeoutException:
                     logger.warning(f"⚠️ Timeout loading tweets for @{username}, retrying...")
-                    time.sleep(5)
+                    stop.wait(5)
                     continue
                     
         except Exception as e:
             logger.error(f"❌ Browser monitoring error for @{username}: {e}")
+            status["error"] = str(e)
+            healthy = False
         finally:
-            if username in self.drivers:
-                self.drivers[username].quit()
-                del self.drivers[username]
+            self.drivers.pop(username, None)
+            if driver is not None:
+                self.release_driver(driver, healthy)
+            self.stop_signals.pop(username, None)
+            self.monitoring_threads.pop(username, None)  # Last: reconcile may restart the account once this is gone
+            status["state"] = "stopped" if healthy else "error"
             logger.info(f"🛑 Stopped monitoring @{username}")
             
     async def process_tweet_content(self, username: str, tweet_text: str, tweet_id: str):
-        """Process tweet content for token names and contracts"""
+        """Process tweet content for token names and contracts.
+        
+        Every token name and the contract address are handled concurrently, so a
+        tweet alerts in the time of its slowest path - the contract in the
+        high-priority lane. alert_locks keeps the work for one token or contract
+        in arrival order across tweets.
+        """
         tweet_url = f"https://twitter.com/{username}/status/{tweet_id}"
         
-        # Check for token names (Name Alerts)
+        # Contract address (CA Alerts) first, then token names (Name Alerts)
         token_names = await extract_token_names(tweet_text)
-        for token_name in token_names:
-            await process_name_alert(token_name, username, tweet_id, tweet_url)
-        
-        # Check for contract addresses (CA Alerts)
         contract_address = is_pump_fun_contract(tweet_text)
+        
+        paths = []
         if contract_address:
-            await process_ca_alert(contract_address, username, tweet_id, tweet_url, tweet_text)
+            paths.append((f"ca:{contract_address}", alert_lanes.submit(
+                "ca", f"ca:{contract_address}",
+                functools.partial(process_ca_alert, contract_address, username, tweet_id, tweet_url, tweet_text))))
+        for token_name in token_names:
+            paths.append((f"name:{token_name}", alert_lanes.submit(
+                "name", f"name:{token_name}",
+                functools.partial(process_name_alert, token_name, username, tweet_id, tweet_url))))
+        
+        # Every mention feeds the trending sketch, quorum or not
+        for token_name in token_names:
+            spike = trending_tokens.record(token_name)
+            if spike:
+                logger.info(f"📈 TRENDING: {token_name} - {spike['current']} mentions this bucket ({spike['velocity']}x)")
+                await bus.publish("trending", {"type": "trending_spike", "data": spike})
+        
+        results = await asyncio.gather(*(future for _, future in paths), return_exceptions=True)
+        for (key, _), result in zip(paths, results):
+            if isinstance(result, Exception):
+                logger.error(f"Processing {key} from @{username} failed: {result}")
+    
+    def fetch_timeline(self, username: str, max_tweets: int, since: Optional[datetime]) -> List[Dict[str, Any]]:
+        """Scroll a profile and collect its tweets, newest first, down to max_tweets or `since` (blocking)"""
+        driver = self.create_driver()
+        tweets: Dict[str, Dict[str, Any]] = {}
+        try:
+            driver.get(f"https://twitter.com/{username}")
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='tweet']"))
+            )
+            stalled = 0
+            while len(tweets) < max_tweets and stalled < BACKFILL_MAX_STALLED_SCROLLS:
+                found = older = 0
+                for tweet_element in driver.find_elements(By.CSS_SELECTOR, "[data-testid='tweet']"):
+                    try:
+                        tweet_text = tweet_element.find_element(By.CSS_SELECTOR, "[data-testid='tweetText']").text
+                        stamp = tweet_element.find_element(By.CSS_SELECTOR, "time")
+                        tweet_url = stamp.find_element(By.XPATH, "..").get_attribute("href")
+                        created_at = datetime.fromisoformat(stamp.get_attribute("datetime").replace("Z", "+00:00"))
+                    except NoSuchElementException:
+                        continue
+                    tweet_id = tweet_url.rstrip("/").rsplit("/", 1)[-1]
+                    if tweet_id in tweets:
+                        continue
+                    if since and created_at < since:
+                        older += 1  # A pinned tweet can be old - stop only once nothing newer turns up
+                        continue
+                    tweets[tweet_id] = {"tweet_id": tweet_id, "tweet_url": tweet_url, "text": tweet_text,
+                                        "created_at": created_at}
+                    found += 1
+                if older and not found:
+                    break
+                stalled = 0 if found else stalled + 1
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(BACKFILL_SCROLL_PAUSE_SECONDS)
+        except TimeoutException:
+            logger.warning(f"⚠️ Timeout loading timeline for @{username}")
+        finally:
+            driver.quit()
+        return sorted(tweets.values(), key=lambda t: t["created_at"], reverse=True)[:max_tweets]
     
     def start_monitoring(self, usernames: List[str]):
         """Start monitoring multiple Twitter accounts"""
+        self.loop = asyncio.get_running_loop()
+        self.keep_warm = True
         for username in usernames:
             if username not in self.monitoring_threads:
-                self.stop_signals[username] = False
+                self.stop_signals[username] = threading.Event()
+                self.status[username] = {
+                    "state": "starting",
+                    "started_at": datetime.now(timezone.utc),
+                    "last_refresh": None,
+                    "tweets_seen": 0,
+                    "warm_start": False,
+                    "error": None,
+                }
                 thread = threading.Thread(
                     target=self.monitor_twitter_account, 
                     args=(username,),
                     daemon=True
                 )
-                thread.start()
                 self.monitoring_threads[username] = thread
+                self.started += 1
+                thread.start()
                 logger.info(f"✅ Started browser monitoring thread for @{username}")
     
     def stop_monitoring(self, username: str = None):
-        """Stop monitoring specific account or all accounts"""
-        if username:
-            self.stop_signals[username] = True
-            if username in self.drivers:
-                self.drivers[username].quit()
-        else:
-            # Stop all monitoring
-            for user in list(self.stop_signals.keys()):
-                self.stop_signals[user] = True
-            for driver in self.drivers.values():
-                driver.quit()
-            self.drivers.clear()
+        """Stop monitoring specific account or all accounts.
+        
+        A single account's thread finishes its current check and parks its
+        driver in the warm pool; stopping everything quits all drivers.
+        """
+        targets = [username] if username else list(self.stop_signals)
+        for user in targets:
+            signal = self.stop_signals.get(user)
+            if signal is not None and not signal.is_set():
+                signal.set()
+                self.status[user]["state"] = "stopping"
+                self.stopped += 1
+        if not username:
+            with self.pool_lock:
+                self.keep_warm = False
+                idle, self.warm_drivers = self.warm_drivers, []
+            for driver in idle:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+    
+    def join(self, timeout: float):
+        """Wait for stopping threads to exit (each stops within one check interval)"""
+        deadline = time.monotonic() + timeout
+        for thread in list(self.monitoring_threads.values()):
+            thread.join(max(0, deadline - time.monotonic()))
+    
+    def reconcile(self, desired: set) -> Dict[str, List[str]]:
+        """Start threads for newly desired accounts and stop those no longer desired"""
+        running = {user for user, signal in list(self.stop_signals.items()) if not signal.is_set()}
+        started = sorted(desired - running)
+        stopped = sorted(running - desired)
+        for username in stopped:
+            self.stop_monitoring(username)
+        # An account re-added while its old thread is still stopping is started on a later pass
+        self.start_monitoring([username for username in started if username not in self.monitoring_threads])
+        for username in list(self.status):
+            if username not in desired and username not in self.monitoring_threads:
+                del self.status[username]
+        self.desired = len(desired)
+        self.reconciled_at = datetime.now(timezone.utc)
+        return {"started": started, "stopped": stopped}
+    
+    def stats(self) -> Dict[str, Any]:
+        states = Counter(status["state"] for status in self.status.values())
+        return {
+            "desired": self.desired,
+            "states": dict(states),
+            "warm_drivers": len(self.warm_drivers),
+            "threads_started": self.started,
+            "threads_stopped": self.stopped,
+            "reconciled_at": self.reconciled_at,
+            "accounts": {username: dict(status) for username, status in sorted(self.status.items())},
+        }
 
 # Global browser monitor instance
 browser_monitor = TwitterBrowserMonitor()
@@ -311,7 +2538,7 @@ async def extract_token_names(tweet_text: str) -> List[str]:
 async def search_pump_fun_token(token_name: str) -> Optional[str]:
     """Search pump.fun for ULTRA-FRESH tokens (max 5 minutes old) with the given name"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with alert_lanes.http("name") as session:
             # Search pump.fun API for tokens with this name
             search_url = f"https://frontend-api.pump.fun/coins?offset=0&limit=50&sort=created_timestamp&order=DESC&includeNsfw=true"
             
@@ -355,162 +2582,339 @@ async def search_pump_fun_token(token_name: str) -> Optional[str]:
         logger.error(f"Error searching pump.fun for {token_name}: {e}")
         return None
 
-async def create_version_snapshot() -> Dict[str, Any]:
-    """Create a complete snapshot of current app state"""
-    def convert_objectid(obj):
-        """Convert MongoDB ObjectId to string recursively"""
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        elif isinstance(obj, dict):
-            return {k: convert_objectid(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_objectid(v) for v in obj]
-        else:
-            return obj
-    
-    accounts = await db.twitter_accounts.find().to_list(None)
-    name_alerts = await db.name_alerts.find().to_list(None)
-    ca_alerts = await db.ca_alerts.find().to_list(None)
-    blacklist = await db.blacklist.find().to_list(None)
-    settings = await db.app_settings.find_one() or {}
-    
-    # Convert ObjectIds to strings
+def snapshot_key(doc: Dict[str, Any]) -> str:
+    return doc.get("id") or str(doc["_id"])
+
+def compress_snapshot(data: Dict[str, Any]) -> bytes:
+    return zlib.compress(json_util.dumps(data).encode())
+
+def decompress_snapshot(payload: bytes) -> Dict[str, Any]:
+    return json_util.loads(zlib.decompress(payload))
+
+async def build_base_snapshot() -> Dict[str, Any]:
+    """Complete app state"""
     snapshot = {
-        "accounts": convert_objectid(accounts),
-        "name_alerts": convert_objectid(name_alerts), 
-        "ca_alerts": convert_objectid(ca_alerts),
-        "blacklist": convert_objectid(blacklist),
-        "settings": convert_objectid(settings),
+        key: await db[collection].find().to_list(None)
+        for key, collection in SNAPSHOT_COLLECTIONS.items()
+    }
+    snapshot["settings"] = await settings_cache.get()
+    snapshot["timestamp"] = datetime.now(timezone.utc).isoformat()
+    return snapshot
+
+async def build_delta_snapshot(changed: Dict[str, set]) -> Dict[str, Any]:
+    """Current version of each changed document; changed ids that no longer exist are deletes"""
+    upserts = {}
+    deletes = {}
+    for key, ids in changed.items():
+        if not ids:
+            continue
+        docs = await db[SNAPSHOT_COLLECTIONS[key]].find({"id": {"$in": list(ids)}}).to_list(None)
+        found = {doc["id"] for doc in docs}
+        upserts[key] = docs
+        deletes[key] = [doc_id for doc_id in ids if doc_id not in found]
+    return {
+        "upserts": upserts,
+        "deletes": deletes,
+        "settings": await settings_cache.get(),
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
+
+async def load_version_snapshot(version: Dict[str, Any]) -> Dict[str, Any]:
+    """Materialize the complete app state of a version from its base and deltas"""
+    if version.get("snapshot_data") is not None:
+        return version["snapshot_data"]
+    
+    chain = await db.app_versions.find(
+        {"version_number": {"$gte": version["base_version"], "$lte": version["version_number"]}},
+        {"_id": 0, "version_number": 1, "kind": 1, "payload": 1}
+    ).sort("version_number", 1).to_list(None)
+    if not chain or chain[0].get("kind") != "base":
+        raise HTTPException(status_code=409, detail="Version base snapshot is missing")
     
+    state = {}
+    for link in chain:
+        data = decompress_snapshot(link["payload"])
+        if link["kind"] == "base":
+            state = {key: {snapshot_key(doc): doc for doc in data.get(key, [])} for key in SNAPSHOT_COLLECTIONS}
+        else:
+            for key, doc_ids in data["deletes"].items():
+                for doc_id in doc_ids:
+                    state[key].pop(doc_id, None)
+            for key, docs in data["upserts"].items():
+                for doc in docs:
+                    state[key][snapshot_key(doc)] = doc
+            for key, doc_ids in data.get("present", {}).items():  # Deltas saved before expiry was replayed
+                present = set(doc_ids)
+                state[key] = {doc_id: doc for doc_id, doc in state[key].items() if doc_id in present}
+        settings = data.get("settings") or {}
+        timestamp = data.get("timestamp")
+    
+    # TTL expiry deletes name alerts without passing the journal - replay it from expires_at
+    if timestamp and state.get("name_alerts"):
+        expired_by = datetime.fromisoformat(timestamp).replace(tzinfo=None)
+        state["name_alerts"] = {
+            doc_id: doc for doc_id, doc in state["name_alerts"].items()
+            if not isinstance(doc.get("expires_at"), datetime) or doc["expires_at"].replace(tzinfo=None) >= expired_by
+        }
+    
+    snapshot = {key: list(docs.values()) for key, docs in state.items()}
+    snapshot["settings"] = settings
+    snapshot["timestamp"] = timestamp
     return snapshot
 
+async def prune_versions():
+    """Keep the newest max_versions versions (plus the base they build on) with one ranged delete"""
+    settings = await settings_cache.get()
+    max_versions = max(1, settings.get('max_versions', 20))
+    oldest_kept = await db.app_versions.find_one(
+        {}, {"_id": 0, "version_number": 1, "base_version": 1},
+        sort=[("version_number", -1)], skip=max_versions - 1
+    )
+    if oldest_kept:
+        cutoff = oldest_kept.get("base_version") or oldest_kept["version_number"]
+        await db.app_versions.delete_many({"version_number": {"$lt": cutoff}})
+
+version_lock = asyncio.Lock()
+
+async def save_version(tag: Optional[str] = None) -> Dict[str, Any]:
+    """Store a new version - a delta of what changed since the latest version when possible"""
+    async with version_lock:
+        # Make sure write-behind alert mutations are part of the snapshot
+        await alert_store.flush()
+        
+        for attempt in range(VERSION_SAVE_ATTEMPTS):
+            latest = await db.app_versions.find_one(
+                {}, {"_id": 0, "version_number": 1, "base_version": 1}, sort=[("version_number", -1)]
+            )
+            version_number = latest["version_number"] + 1 if latest else 1
+            anchor, changed = snapshot_journal.take()
+            # Bases at least every max_versions so retention never has to keep a long delta chain
+            settings = await settings_cache.get()
+            base_interval = min(SNAPSHOT_BASE_INTERVAL, max(1, settings.get('max_versions', 20)))
+            incremental = (
+                latest is not None
+                and latest.get("base_version") is not None
+                and anchor == latest["version_number"]
+                and version_number - latest["base_version"] < base_interval
+            )
+            
+            try:
+                if incremental:
+                    kind, base_version = "delta", latest["base_version"]
+                    data = await build_delta_snapshot(changed)
+                else:
+                    kind, base_version = "base", version_number
+                    data = await build_base_snapshot()
+                
+                version = AppVersion(
+                    version_number=version_number,
+                    tag=tag or f"Manual snapshot #{version_number}",
+                    kind=kind,
+                    base_version=base_version,
+                    payload=compress_snapshot(data)
+                )
+                await db.app_versions.insert_one(version.dict(exclude={"snapshot_data"}))
+            except DuplicateKeyError:
+                # Another worker saved this version_number first - the handed-over changes
+                # are lost with our anchor, so retry after it as a full base
+                if attempt == VERSION_SAVE_ATTEMPTS - 1:
+                    raise HTTPException(status_code=409, detail="Concurrent version saves, please retry")
+                continue
+            except Exception:
+                # The handed-over changes are lost - fall back to a full base next time
+                snapshot_journal.invalidate()
+                raise
+            break
+        
+        snapshot_journal.anchor = version_number
+        await prune_versions()
+    await publish_control("versions_changed")
+    
+    return version.dict(exclude={"snapshot_data", "payload"})
+
 # Background monitoring task
+async def reconcile_monitored_accounts():
+    """Diff active accounts against running monitors and apply only the difference"""
+    accounts = await db.twitter_accounts.find({"is_active": True}, {"_id": 0, "username": 1}).to_list(None)
+    changes = browser_monitor.reconcile({account["username"] for account in accounts})
+    if changes["started"] or changes["stopped"]:
+        logger.info(f"🌐 Monitoring reconciled: +{len(changes['started'])} -{len(changes['stopped'])} accounts")
+    await db.monitor_status.replace_one(
+        {"_id": "monitor"},
+        {"_id": "monitor", "worker": WORKER_ID, "active": monitoring_active, "updated_at": datetime.now(timezone.utc),
+         **browser_monitor.stats()},
+        upsert=True
+    )
+
 async def monitor_accounts():
-    """Background task to monitor tracked accounts using BROWSER MONITORING (no API calls)"""
+    """Background task to monitor tracked accounts using BROWSER MONITORING (no API calls).
+    
+    Reconciles whenever accounts change (here or on another worker) and every
+    MONITOR_RECONCILE_SECONDS, so adding or removing an account touches only that
+    account's browser.
+    """
     global monitoring_active
     
     while monitoring_active:
+        monitor_wakeup.clear()
         try:
-            accounts = await db.twitter_accounts.find({"is_active": True}).to_list(None)
-            active_usernames = [account['username'] for account in accounts]
-            
-            if active_usernames:
-                logger.info(f"🌐 Starting browser monitoring for {len(active_usernames)} accounts...")
-                
-                # Start browser monitoring for all active accounts
-                browser_monitor.start_monitoring(active_usernames)
-                
-                # Log monitoring status
-                logger.info(f"✅ Browser monitoring active for: {', '.join(active_usernames)}")
-                
-                # Keep monitoring alive (browser threads handle the actual monitoring)
-                while monitoring_active:
-                    await asyncio.sleep(60)  # Check every minute if monitoring should continue
-                    
-            else:
-                logger.info("No active accounts to monitor")
-                await asyncio.sleep(30)
-                
+            await reconcile_monitored_accounts()
         except Exception as e:
             logger.error(f"Error in monitor_accounts: {e}")
-            await asyncio.sleep(30)
+        try:
+            await asyncio.wait_for(monitor_wakeup.wait(), MONITOR_RECONCILE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
     
     # Cleanup when monitoring stops
     logger.info("🛑 Stopping browser monitoring...")
     browser_monitor.stop_monitoring()
+    await asyncio.to_thread(browser_monitor.join, 30)
+    try:
+        await db.monitor_status.update_one(
+            {"_id": "monitor", "worker": WORKER_ID},
+            {"$set": {"active": False, "updated_at": datetime.now(timezone.utc), **browser_monitor.stats()}}
+        )
+    except Exception as e:
+        logger.error(f"Error saving monitor status: {e}")
     logger.info("✅ Browser monitoring stopped")
 
 async def process_name_alert(token_name: str, username: str, tweet_id: str, tweet_url: str):
-    """Process and create/update name alerts with quorum threshold + pump.fun integration"""
+    """Process and create/update name alerts with windowed quorum threshold + pump.fun integration"""
     
-    # Get current settings for quorum threshold
-    settings = await db.app_settings.find_one() or {}
+    # Get current settings for quorum threshold and window
+    settings = await settings_cache.get()
     min_threshold = settings.get('min_quorum_threshold', 3)  # Default to 3 if not set
+    window_seconds = settings.get('quorum_window_minutes', 60) * 60
+    account = {"username": username, "tweet_id": tweet_id, "tweet_url": tweet_url}
     
-    # Check if alert already exists for this token
-    existing_alert = await db.name_alerts.find_one({"token_name": token_name, "is_active": True})
+    # Count distinct accounts within the window in memory - no database work below quorum
+    if not quorum_window.record(token_name, account, window_seconds):
+        logger.info(f"Account {username} already contributed to {token_name} alert")
+        return
+    window_count = quorum_window.count(token_name)
+    if window_count < min_threshold:
+        logger.info(f"FRESH token {token_name} detected ({window_count}/{min_threshold} accounts needed)")
+        return
     
-    if existing_alert:
-        # Check if this username already contributed to this alert
-        existing_usernames = [acc.get('username') for acc in existing_alert.get('accounts', [])]
+    # Check if a live alert already exists for this token
+    existing_alert = await alert_store.find_name_alert(token_name)
+    retire, action = name_alert_step(existing_alert, username, min_threshold, window_seconds)
+    retired_ids, retired_count = [], 0
+    if retire:
+        await alert_store.deactivate_name_alert(existing_alert)
+        retired_ids.append(existing_alert["id"])
+        if existing_alert.get('quorum_count', 0) >= min_threshold:
+            dashboard_counters.name_alert_retired()
+            retired_count = 1
+    
+    if action == "skip":
+        logger.info(f"Account {username} already contributed to {token_name} alert")
+        return
+    if action == "join":
+        # Update existing alert with new account
+        new_quorum_count = existing_alert.get('quorum_count', 0) + 1
+        await alert_store.add_name_alert_account(existing_alert, account, new_quorum_count)
         
-        if username not in existing_usernames:
-            # Update existing alert with new account
-            new_quorum_count = existing_alert.get('quorum_count', 0) + 1
-            
-            await db.name_alerts.update_one(
-                {"_id": existing_alert["_id"]},
-                {
-                    "$set": {"quorum_count": new_quorum_count},
-                    "$push": {"accounts": {"username": username, "tweet_id": tweet_id, "tweet_url": tweet_url}}
-                }
-            )
-            
-            # Only broadcast if we've reached the minimum threshold
-            if new_quorum_count >= min_threshold:
-                # Search pump.fun for this token when threshold is reached
-                pump_fun_mint = await search_pump_fun_token(token_name)
-                
-                alert_data = {
-                    "id": str(existing_alert["_id"]),
-                    "token_name": token_name,
-                    "quorum_count": new_quorum_count,
-                    "accounts": existing_alert.get('accounts', []) + [{"username": username, "tweet_id": tweet_id, "tweet_url": tweet_url}],
-                    "first_seen": existing_alert.get('first_seen'),
-                    "pump_fun_mint": pump_fun_mint,
-                    "pump_fun_url": f"https://pump.fun/{pump_fun_mint}" if pump_fun_mint else None
-                }
-                
-                # Broadcast update
-                await manager.broadcast({
-                    "type": "name_alert_update",
-                    "data": alert_data
-                })
-                
-                if pump_fun_mint:
-                    logger.info(f"🚀 FRESH Name alert + AXIOM PRO: {token_name} ({new_quorum_count}/{min_threshold}) → https://axiom.trade/terminal/{pump_fun_mint}")
-                else:
-                    logger.info(f"🎯 FRESH Name alert reached: {token_name} ({new_quorum_count}/{min_threshold}) - no pump.fun match")
+        pump_fun_mint = await search_pump_fun_token(token_name)
+        
+        alert_data = {
+            "id": str(existing_alert["_id"]),
+            "token_name": token_name,
+            "quorum_count": new_quorum_count,
+            "accounts": existing_alert.get('accounts', []) + [account],
+            "first_seen": existing_alert.get('first_seen'),
+            "pump_fun_mint": pump_fun_mint,
+            "pump_fun_url": f"https://pump.fun/{pump_fun_mint}" if pump_fun_mint else None
+        }
+        
+        # Broadcast update
+        await bus.publish("alerts", {
+            "type": "name_alert_update",
+            "data": alert_data,
+            "changes": {"journal": {"name_alerts": [existing_alert["id"]]}, "usernames": [username]}
+        })
+        await account_metrics.name_alert_joined(username)
+        
+        if pump_fun_mint:
+            logger.info(f"🚀 FRESH Name alert + AXIOM PRO: {token_name} ({new_quorum_count}/{min_threshold}) → https://axiom.trade/terminal/{pump_fun_mint}")
         else:
-            logger.info(f"Account {username} already contributed to {token_name} alert")
+            logger.info(f"🎯 FRESH Name alert update: {token_name} ({new_quorum_count}/{min_threshold}) - no pump.fun match")
     else:
-        # Create new alert (but don't broadcast until threshold is met)
-        alert = NameAlert(
-            token_name=token_name,
-            quorum_count=1,
-            accounts=[{"username": username, "tweet_id": tweet_id, "tweet_url": tweet_url}]
-        )
-        await db.name_alerts.insert_one(alert.dict())
-        
-        # Only broadcast if threshold is 1 or less (immediate alert)
-        if min_threshold <= 1:
-            pump_fun_mint = await search_pump_fun_token(token_name)
-            alert_dict = alert.dict()
-            alert_dict["pump_fun_mint"] = pump_fun_mint
-            alert_dict["pump_fun_url"] = f"https://pump.fun/{pump_fun_mint}" if pump_fun_mint else None
-            
-            await manager.broadcast({
-                "type": "name_alert",
-                "data": alert_dict
-            })
-            
-            if pump_fun_mint:
-                logger.info(f"🚀 INSTANT FRESH alert + AXIOM PRO: {token_name} → https://axiom.trade/terminal/{pump_fun_mint}")
-            else:
-                logger.info(f"🎯 INSTANT FRESH alert: {token_name} (threshold: {min_threshold})")
+        # Quorum reached within the window - persist and broadcast the alert
+        alert = open_name_alert(quorum_window, token_name, datetime.now(timezone.utc))
+        await alert_store.insert_name_alert(alert.dict())
+        dashboard_counters.name_alert_reached_quorum()
+        
+        pump_fun_mint = await search_pump_fun_token(token_name)
+        alert_dict = alert.dict()
+        alert_dict["pump_fun_mint"] = pump_fun_mint
+        alert_dict["pump_fun_url"] = f"https://pump.fun/{pump_fun_mint}" if pump_fun_mint else None
+        
+        await bus.publish("alerts", {
+            "type": "name_alert",
+            "data": alert_dict,
+            "changes": {
+                "counters": {"total_name_alerts": 1 - retired_count},
+                "journal": {"name_alerts": [alert.id] + retired_ids},
+                "usernames": [account["username"] for account in alert.accounts]
+            }
+        })
+        await account_metrics.name_alert_reached_quorum(alert.accounts)
+        
+        if pump_fun_mint:
+            logger.info(f"🚀 FRESH Name alert + AXIOM PRO: {token_name} ({window_count}/{min_threshold}) → https://axiom.trade/terminal/{pump_fun_mint}")
         else:
-            logger.info(f"FRESH token {token_name} detected (1/{min_threshold} accounts needed)")
+            logger.info(f"🎯 FRESH Name alert reached: {token_name} ({window_count}/{min_threshold}) - no pump.fun match")
+
+def name_alert_step(alert: Optional[Dict[str, Any]], username: str, min_threshold: int, window_seconds: int,
+                    now: Optional[datetime] = None) -> Tuple[bool, str]:
+    """What a mention that brought its token to quorum does to the token's latest alert.
+    
+    Returns (retire, action): whether to deactivate the stale alert first, then
+    "create" a new alert, "join" the existing one, or "skip" a repeat account.
+    Shared by live processing and backfill, so both raise the same alerts.
+    """
+    retire = alert is not None and is_stale_name_alert(alert, min_threshold, window_seconds, now)
+    if alert is None or retire:
+        return retire, "create"
+    if any(acc.get('username') == username for acc in alert.get('accounts', [])):
+        return False, "skip"
+    return False, "join"
+
+def open_name_alert(window: QuorumWindow, token_name: str, reached_at: datetime) -> NameAlert:
+    """A new alert holding the accounts in the token's quorum window, earliest first"""
+    return NameAlert(
+        token_name=token_name,
+        first_seen=reached_at,
+        last_seen=reached_at,
+        quorum_count=window.count(token_name),
+        accounts=window.accounts(token_name, reached_at.timestamp())
+    )
+
+def is_stale_name_alert(alert: Dict[str, Any], min_threshold: int, window_seconds: int,
+                        now: Optional[datetime] = None) -> bool:
+    """Alerts below quorum, or without activity inside the current window, no longer count"""
+    if alert.get('quorum_count', 0) < min_threshold:
+        return True
+    last_seen = alert.get('last_seen') or alert.get('first_seen')
+    if last_seen is None:
+        return False
+    if last_seen.tzinfo is None:
+        last_seen = last_seen.replace(tzinfo=timezone.utc)
+    return ((now or datetime.now(timezone.utc)) - last_seen).total_seconds() > window_seconds
 
-async def is_new_token(contract_address: str) -> bool:
-    """Check if this contract is within the configured age limit - catch ultra-fresh launches"""
+async def is_new_token(contract_address: str, at: Optional[float] = None) -> bool:
+    """Check if this contract is within the configured age limit - catch ultra-fresh launches.
+    
+    The age is measured at `at` (epoch seconds, default now) - backfill asks about old tweets.
+    """
     try:
         # Get user's preferred max age setting
-        settings = await db.app_settings.find_one() or {}
+        settings = await settings_cache.get()
         max_age_minutes = settings.get('max_token_age_minutes', 10)  # Default 10 minutes
         
-        async with aiohttp.ClientSession() as session:
+        async with alert_lanes.http("ca") as session:
             # Check Solscan API for token creation time
             solscan_url = f"https://public-api.solscan.io/account/{contract_address}"
             
@@ -521,8 +2925,7 @@ async def is_new_token(contract_address: str) -> bool:
                     # Get token creation timestamp
                     created_time = data.get('createdTime')
                     if created_time:
-                        import time
-                        current_time = time.time()
+                        current_time = at or time.time()
                         token_age_minutes = (current_time - created_time) / 60
                         
                         # Only alert if token is within user's age limit
@@ -552,8 +2955,7 @@ async def process_ca_alert(contract_address: str, username: str, tweet_id: str,
     """Process and create INSTANT CA alerts for NEW TOKENS ONLY"""
     
     # Check if CA alert already exists
-    existing_ca = await db.ca_alerts.find_one({"contract_address": contract_address})
-    if existing_ca:
+    if await alert_store.ca_alert_exists(contract_address):
         logger.info(f"CA alert already exists for {contract_address}")
         return  # Only one alert per CA
     
@@ -577,34 +2979,270 @@ async def process_ca_alert(contract_address: str, username: str, tweet_id: str,
         tweet_url=tweet_url
     )
     
-    await db.ca_alerts.insert_one(alert.dict())
+    await alert_store.insert_ca_alert(alert.dict())
+    dashboard_counters.ca_alert_created()
     
     logger.info(f"🚨 NEW MEME COIN ALERT: {token_name} - {contract_address} by @{username}")
     logger.info(f"⚡ Fresh launch detected - Perfect for early trading!")
     
     # Broadcast CA alert IMMEDIATELY
-    await manager.broadcast({
+    await bus.publish("alerts", {
         "type": "ca_alert",
-        "data": alert.dict()
+        "data": alert.dict(),
+        "changes": {"counters": {"total_ca_alerts": 1}, "journal": {"ca_alerts": [alert.id]}, "usernames": [username]}
     })
+    await account_metrics.ca_alert_created(username)
+
+# Historical Backfill
+backfill_executor = ThreadPoolExecutor(max_workers=BACKFILL_WORKERS)  # One browser session per thread
+backfill_tasks: Dict[str, asyncio.Task] = {}  # Running jobs on this worker
+
+def historical_name_alerts(mentions: List[tuple], min_threshold: int, window_seconds: int) -> List[Dict[str, Any]]:
+    """Replay (seen_at, token_name, account) mentions, oldest first, through a private quorum window.
+    
+    Returns every alert the live path would have raised, each superseded one
+    already deactivated - the same episodes process_name_alert produces.
+    """
+    window = QuorumWindow(0)
+    latest: Dict[str, Dict[str, Any]] = {}
+    alerts = []
+    for seen_at, token_name, account in mentions:
+        if not window.record(token_name, account, window_seconds, seen_at.timestamp()):
+            continue
+        if window.count(token_name) < min_threshold:
+            continue
+        alert = latest.get(token_name)
+        retire, action = name_alert_step(alert, account["username"], min_threshold, window_seconds, seen_at)
+        if retire:
+            alert["is_active"] = False
+        if action == "join":
+            alert["accounts"].append(account)
+            alert["quorum_count"] += 1
+            alert["last_seen"] = seen_at
+        elif action == "create":
+            alert = open_name_alert(window, token_name, seen_at).dict()
+            latest[token_name] = alert
+            alerts.append(alert)
+    return alerts
+
+async def apply_backfill(tweets: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Turn backfilled tweets into historical alerts - bulk inserts, nothing broadcast"""
+    settings = await settings_cache.get()
+    min_threshold = settings.get('min_quorum_threshold', 3)
+    window_seconds = settings.get('quorum_window_minutes', 60) * 60
+    
+    mentions = []
+    first_mentions: Dict[str, Dict[str, Any]] = {}  # contract -> earliest tweet
+    for tweet in sorted(tweets, key=lambda t: t["created_at"]):
+        account = {"username": tweet["username"], "tweet_id": tweet["tweet_id"], "tweet_url": tweet["tweet_url"]}
+        for token_name in await extract_token_names(tweet["text"]):
+            mentions.append((tweet["created_at"], token_name, account))
+        contract_address = is_pump_fun_contract(tweet["text"])
+        if contract_address and contract_address not in first_mentions:
+            first_mentions[contract_address] = tweet
+    name_alerts = historical_name_alerts(mentions, min_threshold, window_seconds)
+    
+    # Token age as of the tweet, with the CA lane's connection budget
+    slots = asyncio.Semaphore(CA_HTTP_CONNECTIONS)
+    async def was_new(contract_address: str, tweet: Dict[str, Any]) -> bool:
+        async with slots:
+            return await is_new_token(contract_address, tweet["created_at"].timestamp())
+    fresh = await asyncio.gather(*(was_new(c, t) for c, t in first_mentions.items()))
+    candidates = {c: t for (c, t), is_new in zip(first_mentions.items(), fresh) if is_new}
+    
+    tokens = list({alert["token_name"] for alert in name_alerts})
+    keys = sorted([f"name:{token}" for token in tokens] + [f"ca:{contract}" for contract in candidates])
+    async with AsyncExitStack() as stack:
+        # Same keyed locks as live processing - a live alert can't be created halfway through
+        for key in keys:
+            await stack.enter_async_context(alert_locks.hold(key))
+        await alert_store.flush()
+        
+        live = await db.name_alerts.find(
+            {"token_name": {"$in": tokens}, "is_active": True}, {"_id": 0, "token_name": 1}
+        ).to_list(None)
+        live_tokens = {doc["token_name"] for doc in live}
+        for alert in name_alerts:
+            alert["backfilled"] = True
+            if alert["token_name"] in live_tokens:
+                alert["is_active"] = False
+        
+        existing = await db.ca_alerts.find(
+            {"contract_address": {"$in": list(candidates)}}, {"_id": 0, "contract_address": 1}
+        ).to_list(None)
+        existing_contracts = {doc["contract_address"] for doc in existing}
+        ca_alerts = []
+        for contract_address, tweet in candidates.items():
+            if contract_address in existing_contracts:
+                continue
+            token_names = await extract_token_names(tweet["text"])
+            ca_alerts.append({**CAAlert(
+                contract_address=contract_address,
+                token_name=token_names[0] if token_names else "NEW",
+                first_seen=tweet["created_at"],
+                pump_fun_url=f"https://pump.fun/{contract_address}",
+                solscan_url=f"https://solscan.io/account/{contract_address}",
+                account_username=tweet["username"],
+                tweet_id=tweet["tweet_id"],
+                tweet_url=tweet["tweet_url"]
+            ).dict(), "backfilled": True})
+        
+        for collection, docs in (("name_alerts", name_alerts), ("ca_alerts", ca_alerts)):
+            for i in range(0, len(docs), BACKFILL_INSERT_BATCH):
+                await db[collection].insert_many(docs[i:i + BACKFILL_INSERT_BATCH], ordered=False)
+            for doc in docs:
+                snapshot_journal.touch(collection, doc["id"])
+        for token in tokens:
+            alert_store.forget(token)  # Reload from the database on the next mention
+    
+    # Recent mentions keep counting toward the live quorum
+    cutoff = time.time() - window_seconds
+    for seen_at, token_name, account in mentions:
+        if seen_at.timestamp() >= cutoff:
+            quorum_window.record(token_name, account, window_seconds, seen_at.timestamp())
+    
+    if name_alerts or ca_alerts:
+        dashboard_counters.invalidate()
+        await publish_control("alerts_changed")
+        account_metrics.invalidate()
+    return {"name_alerts": len(name_alerts), "ca_alerts": len(ca_alerts)}
+
+class BackfillJob:
+    """Fetches timelines in parallel on backfill_executor, then applies them as historical alerts.
+    
+    Progress is mirrored to backfill_jobs so any worker can report it.
+    """
+    
+    def __init__(self, usernames: List[str], max_tweets: int, since: Optional[datetime]):
+        self.usernames = usernames
+        self.max_tweets = max_tweets
+        self.since = since
+        self.state = {
+            "id": str(uuid.uuid4()),
+            "status": "running",
+            "accounts": len(usernames),
+            "accounts_done": 0,
+            "accounts_failed": 0,
+            "tweets": 0,
+            "name_alerts": 0,
+            "ca_alerts": 0,
+            "max_tweets": max_tweets,
+            "since": since,
+            "started_at": datetime.now(timezone.utc),
+            "finished_at": None
+        }
+    
+    async def save(self):
+        await db.backfill_jobs.replace_one({"id": self.state["id"]}, self.state, upsert=True)
+    
+    async def fetch(self, username: str, tweets: List[Dict[str, Any]], done: List[str]):
+        loop = asyncio.get_running_loop()
+        try:
+            timeline = await loop.run_in_executor(
+                backfill_executor, browser_monitor.fetch_timeline, username, self.max_tweets, self.since
+            )
+        except Exception as e:
+            logger.warning(f"Backfill of @{username} failed: {e}")
+            self.state["accounts_failed"] += 1
+        else:
+            tweets.extend({**tweet, "username": username} for tweet in timeline)
+            done.append(username)
+            self.state["accounts_done"] += 1
+            self.state["tweets"] += len(timeline)
+        await self.save()
+    
+    async def run(self):
+        tweets: List[Dict[str, Any]] = []
+        done: List[str] = []
+        try:
+            await self.save()
+            await asyncio.gather(*(self.fetch(username, tweets, done) for username in self.usernames))
+            self.state.update(await apply_backfill(tweets))
+            if done:
+                await db.twitter_accounts.update_many(
+                    {"username": {"$in": done}}, {"$set": {"backfilled_at": datetime.now(timezone.utc)}}
+                )
+                async for account in db.twitter_accounts.find({"username": {"$in": done}}, {"_id": 0, "id": 1}):
+                    snapshot_journal.touch("accounts", account["id"])
+                await publish_control("accounts_changed")
+            self.state["status"] = "completed"
+            logger.info(f"📚 Backfill {self.state['id']}: {self.state['tweets']} tweets from "
+                        f"{len(done)} accounts, {self.state['name_alerts']} name / {self.state['ca_alerts']} CA alerts")
+        except asyncio.CancelledError:
+            self.state["status"] = "interrupted"
+            raise
+        except Exception as e:
+            logger.error(f"Backfill {self.state['id']} failed: {e}")
+            self.state["status"] = "failed"
+        finally:
+            self.state["finished_at"] = datetime.now(timezone.utc)
+            backfill_tasks.pop(self.state["id"], None)
+            await asyncio.shield(self.save())
+
+async def start_backfill_job(usernames: List[str], max_tweets: Optional[int] = None,
+                             since: Optional[datetime] = None) -> Dict[str, Any]:
+    settings = await settings_cache.get()
+    if since is None:
+        since = datetime.now(timezone.utc) - timedelta(days=settings.get('backfill_days', 7))
+    elif since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)  # Tweet timestamps are aware - a naive bound can't compare
+    else:
+        since = since.astimezone(timezone.utc)
+    job = BackfillJob(usernames, max_tweets or settings.get('backfill_max_tweets', 200), since)
+    backfill_tasks[job.state["id"]] = asyncio.create_task(job.run())
+    return job.state
+
+async def backfill_new_accounts(usernames: List[str]):
+    """Queue a backfill for freshly added accounts when the setting is on"""
+    settings = await settings_cache.get()
+    if usernames and settings.get('backfill_new_accounts', True):
+        await start_backfill_job(usernames)
 
 # WebSocket route (add to main app, not router)
 @app.websocket("/api/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, encoding: str = "json", last_seq: Optional[int] = None,
+                             stream: Optional[str] = None):
+    if encoding not in WS_ENCODINGS:
+        encoding = "json"
     try:
-        await manager.connect(websocket)
+        await manager.connect(websocket, encoding)
         logging.info(f"WebSocket connected: {websocket.client}")
         
-        # Send initial connection confirmation
-        await websocket.send_json({"type": "connection", "status": "connected"})
+        # Send initial connection confirmation with the current position in the broadcast stream
+        manager.send(websocket, {"type": "connection", "status": "connected",
+                                 "stream": manager.events.stream, "seq": manager.events.seq})
+        if last_seq is not None:
+            manager.resume(websocket, last_seq, stream)
         
         while True:
             # Keep connection alive and listen for messages
             data = await websocket.receive_text()
             logging.info(f"Received WebSocket message: {data}")
             
+            try:
+                request = orjson.loads(data)
+            except orjson.JSONDecodeError:
+                request = None
+            request_type = request.get("type") if isinstance(request, dict) else None
+            
+            if request_type in ("subscribe", "unsubscribe"):
+                # Server-side filtering - unsubscribe goes back to receiving everything
+                try:
+                    fields = {k: v for k, v in request.items() if k != "type"} if request_type == "subscribe" else {}
+                    subscription = Subscription(**fields)
+                except ValueError as e:
+                    manager.send(websocket, {"type": "error", "message": f"Invalid subscription: {e}"})
+                    continue
+                manager.subscribe(websocket, subscription)
+                manager.send(websocket, {"type": "subscribed", "subscription": subscription.dict()})
+                continue
+            
+            if request_type == "resume" and isinstance(request.get("last_seq"), int):
+                manager.resume(websocket, request["last_seq"], request.get("stream"))
+                continue
+            
             # Echo back to confirm connection
-            await websocket.send_json({"type": "echo", "message": data})
+            manager.send(websocket, {"type": "echo", "message": data})
             
     except WebSocketDisconnect:
         logging.info(f"WebSocket disconnected: {websocket.client}")
@@ -615,65 +3253,121 @@ async def websocket_endpoint(websocket: WebSocket):
 
 # API Routes
 
-@api_router.post("/accounts/bulk-import")
-async def bulk_import_accounts(data: dict):
-    """Bulk import Twitter accounts from pasted text"""
-    accounts_text = data.get('accounts_text', '')
-    
-    if not accounts_text.strip():
-        raise HTTPException(status_code=400, detail="No account data provided")
-    
-    # Split by lines and clean up
-    lines = accounts_text.strip().split('\n')
-    
-    # Clean and validate usernames
-    clean_usernames = []
-    for line in lines:
+def parse_usernames(accounts_text: str) -> List[str]:
+    """Split pasted or CSV text into clean usernames"""
+    usernames = []
+    for line in accounts_text.split('\n'):
         # Handle Excel copy-paste which might have tabs, commas, or spaces
         usernames_in_line = line.replace('\t', ' ').replace(',', ' ').split()
         
         for username in usernames_in_line:
-            username = username.strip().replace('@', '')
-            if username and len(clean_usernames) < 200:  # Limit to 200 accounts
-                clean_usernames.append(username)
-    
-    # Remove duplicates from input
-    clean_usernames = list(set(clean_usernames))
+            username = username.strip().strip('"').replace('@', '')
+            if username:
+                usernames.append(username)
+    return usernames
+
+async def import_usernames(usernames: List[str]) -> Dict[str, Any]:
+    """Insert untracked usernames with one existence query and one bulk insert"""
+    existing = await db.twitter_accounts.find(
+        {"username": {"$in": usernames}}, {"_id": 0, "username": 1}
+    ).to_list(None)
+    existing_usernames = {doc["username"] for doc in existing}
     
-    if not clean_usernames:
-        raise HTTPException(status_code=400, detail="No valid usernames found in the provided text")
+    new_accounts = [TwitterAccount(username=u).dict() for u in usernames if u not in existing_usernames]
+    accounts_added = 0
+    rejected = set()
+    if new_accounts:
+        for account in new_accounts:
+            snapshot_journal.touch("accounts", account["id"])
+        try:
+            result = await db.twitter_accounts.insert_many(new_accounts, ordered=False)
+            accounts_added = len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Lost a race with a concurrent insert - the unique index rejected those usernames
+            accounts_added = e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                existing_usernames.add(new_accounts[error["index"]]["username"])
+                rejected.add(new_accounts[error["index"]]["username"])
+        dashboard_counters.accounts_added(accounts_added)
     
-    # Save to database
+    return {
+        "accounts_added": accounts_added,
+        "added_usernames": [a["username"] for a in new_accounts if a["username"] not in rejected],
+        "existing_accounts": [u for u in usernames if u in existing_usernames]
+    }
+
+async def import_username_batches(batches) -> Dict[str, Any]:
+    """Import an (async) stream of username batches, de-duplicating across the whole stream"""
+    seen = set()
     accounts_added = 0
+    added_usernames = []
     existing_accounts = []
     
-    for username in clean_usernames:
-        existing = await db.twitter_accounts.find_one({"username": username})
-        if not existing:
-            account = TwitterAccount(username=username)
-            await db.twitter_accounts.insert_one(account.dict())
-            accounts_added += 1
-        else:
-            existing_accounts.append(username)
+    async for batch in batches:
+        batch = [u for u in dict.fromkeys(batch) if u not in seen]
+        seen.update(batch)
+        if not batch:
+            continue
+        result = await import_usernames(batch)
+        accounts_added += result["accounts_added"]
+        added_usernames.extend(result["added_usernames"])
+        existing_accounts.extend(result["existing_accounts"])
+    
+    if not seen:
+        raise HTTPException(status_code=400, detail="No valid usernames found in the provided text")
     
     # Create version snapshot after import
     if accounts_added > 0:
-        snapshot = await create_version_snapshot()
-        version_count = await db.app_versions.count_documents({})
-        version = AppVersion(
-            version_number=version_count + 1,
-            snapshot_data=snapshot,
-            tag=f"Bulk imported {accounts_added} accounts"
-        )
-        await db.app_versions.insert_one(version.dict())
+        await publish_control("accounts_changed")
+        await save_version(f"Bulk imported {accounts_added} accounts")
+        await backfill_new_accounts(added_usernames)
     
     return {
         "accounts_imported": accounts_added, 
-        "total_provided": len(clean_usernames),
+        "total_provided": len(seen),
         "duplicates_skipped": len(existing_accounts),
         "existing_accounts": existing_accounts[:10]  # Show first 10 duplicates
     }
 
+@api_router.post("/accounts/bulk-import")
+async def bulk_import_accounts(data: dict):
+    """Bulk import Twitter accounts from pasted text"""
+    accounts_text = data.get('accounts_text', '')
+    
+    if not accounts_text.strip():
+        raise HTTPException(status_code=400, detail="No account data provided")
+    
+    usernames = parse_usernames(accounts_text)
+    
+    async def batches():
+        for i in range(0, len(usernames), IMPORT_BATCH_SIZE):
+            yield usernames[i:i + IMPORT_BATCH_SIZE]
+    
+    return await import_username_batches(batches())
+
+@api_router.post("/accounts/import")
+async def import_accounts_file(file: UploadFile = File(...)):
+    """Stream-import Twitter accounts from an uploaded text/CSV file of any size"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    
+    async def batches():
+        pending = []
+        remainder = ''
+        while True:
+            chunk = await file.read(IMPORT_CHUNK_BYTES)
+            text = remainder + decoder.decode(chunk, final=not chunk)
+            if chunk:
+                # Hold back the trailing partial line until the next chunk arrives
+                text, _, remainder = text.rpartition('\n')
+            pending.extend(parse_usernames(text))
+            if len(pending) >= IMPORT_BATCH_SIZE or not chunk:
+                yield pending
+                pending = []
+            if not chunk:
+                break
+    
+    return await import_username_batches(batches())
+
 @api_router.post("/accounts/add")
 async def add_single_account(username: str):
     """Add a single Twitter account"""
@@ -690,35 +3384,51 @@ async def add_single_account(username: str):
     
     # Add account
     account = TwitterAccount(username=username)
-    await db.twitter_accounts.insert_one(account.dict())
+    snapshot_journal.touch("accounts", account.id)
+    try:
+        await db.twitter_accounts.insert_one(account.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Account already exists")
+    dashboard_counters.accounts_added()
+    await publish_control("accounts_changed")
+    await backfill_new_accounts([username])
     
     return {"message": "Account added successfully", "username": username}
 
 @api_router.delete("/accounts/{account_id}")
 async def remove_account(account_id: str):
     """Remove a Twitter account"""
-    result = await db.twitter_accounts.delete_one({"id": account_id})
+    removed = await db.twitter_accounts.find_one_and_delete({"id": account_id}, {"is_active": 1})
+    snapshot_journal.touch("accounts", account_id)
     
-    if result.deleted_count == 0:
+    if removed is None:
         raise HTTPException(status_code=404, detail="Account not found")
+    if removed.get("is_active", True):
+        dashboard_counters.accounts_removed()
+    await publish_control("accounts_changed")
     
     return {"message": "Account removed successfully"}
 
 @api_router.get("/accounts")
-async def get_accounts():
-    """Get all tracked accounts"""
-    accounts = await db.twitter_accounts.find().to_list(None)
-    # Convert ObjectIds to strings
-    def convert_objectid(obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        elif isinstance(obj, dict):
-            return {k: convert_objectid(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_objectid(v) for v in obj]
-        else:
-            return obj
-    return convert_objectid(accounts)
+@cached_response("accounts")
+async def get_accounts(limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get tracked accounts, one keyset page at a time"""
+    # lead_samples only feeds median_lead_seconds
+    projection = parse_fields(fields, exclude=("lead_samples",)) or {"lead_samples": 0}
+    accounts, next_cursor = await fetch_page(db.twitter_accounts, {}, "added_at", 1, limit, cursor, projection)
+    return page_response(accounts, next_cursor)
+
+@api_router.get("/accounts/leaderboard")
+@cached_response("accounts")
+async def get_account_leaderboard(sort: str = "first_calls", limit: int = 50):
+    """Accounts ranked by a performance metric, best first"""
+    if sort not in LEADERBOARD_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(LEADERBOARD_SORTS)}")
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
+    accounts = await db.twitter_accounts.find(
+        {}, {"_id": 0, "id": 1, "username": 1, "is_active": 1, "performance": 1}
+    ).sort([(f"performance.{sort}", -1), ("_id", 1)]).limit(limit).to_list(None)
+    return [{"rank": rank, **account} for rank, account in enumerate(accounts, 1)]
 
 @api_router.post("/monitoring/start")
 async def start_monitoring(background_tasks: BackgroundTasks):
@@ -736,6 +3446,8 @@ async def start_monitoring(background_tasks: BackgroundTasks):
         {"$set": {"monitoring_enabled": True}},
         upsert=True
     )
+    await settings_cache.refresh()
+    await publish_control("monitoring_start")
     
     return {"status": "Monitoring started"}
 
@@ -750,105 +3462,240 @@ async def stop_monitoring():
         {"$set": {"monitoring_enabled": False}},
         upsert=True
     )
+    await settings_cache.refresh()
+    await publish_control("monitoring_stop")
     
     return {"status": "Monitoring stopped"}
 
+@api_router.get("/monitoring/status")
+async def get_monitoring_status():
+    """Monitored accounts and their browser state, as seen by the worker running the monitor"""
+    if monitoring_active:
+        return {"worker": WORKER_ID, "active": True, **browser_monitor.stats()}
+    status = await db.monitor_status.find_one({"_id": "monitor"}, {"_id": 0})
+    return status or {"worker": None, "active": False, **browser_monitor.stats()}
+
 @api_router.get("/alerts/name")
-async def get_name_alerts():
-    """Get all name alerts that meet the quorum threshold"""
-    settings = await db.app_settings.find_one() or {}
+@cached_response("name_alerts", "settings")
+async def get_name_alerts(limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get name alerts that meet the quorum threshold, newest first"""
+    settings = await settings_cache.get()
     min_threshold = settings.get('min_quorum_threshold', 3)
     
     # Only return alerts that meet the minimum threshold
-    alerts = await db.name_alerts.find({
+    alerts, next_cursor = await fetch_page(db.name_alerts, {
         "is_active": True,
         "quorum_count": {"$gte": min_threshold}
-    }).sort("first_seen", -1).to_list(None)
-    
-    # Convert ObjectIds to strings
-    for alert in alerts:
-        if '_id' in alert:
-            alert['_id'] = str(alert['_id'])
-        # Convert any datetime objects to ISO strings
-        if isinstance(alert.get('first_seen'), datetime):
-            alert['first_seen'] = alert['first_seen'].isoformat()
-    
-    return alerts
+    }, "first_seen", -1, limit, cursor, parse_fields(fields))
+    return page_response(alerts, next_cursor)
 
 @api_router.get("/alerts/ca")
-async def get_ca_alerts():
-    """Get all CA alerts"""
-    alerts = await db.ca_alerts.find().sort("first_seen", -1).to_list(None)
-    
-    # Convert ObjectIds to strings
-    for alert in alerts:
-        if '_id' in alert:
-            alert['_id'] = str(alert['_id'])
-        # Convert any datetime objects to ISO strings
-        if isinstance(alert.get('first_seen'), datetime):
-            alert['first_seen'] = alert['first_seen'].isoformat()
+@cached_response("ca_alerts")
+async def get_ca_alerts(limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get CA alerts, newest first"""
+    alerts, next_cursor = await fetch_page(db.ca_alerts, {}, "first_seen", -1, limit, cursor, parse_fields(fields))
+    return page_response(alerts, next_cursor)
+
+async def dashboard_stats() -> Dict[str, Any]:
+    settings = await settings_cache.get()
+    counters = await dashboard_counters.get()
     
-    return alerts
+    return {
+        **counters,
+        "monitoring_active": settings.get("monitoring_enabled", False),
+        "min_quorum_threshold": settings.get('min_quorum_threshold', 3)
+    }
 
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats():
     """Get dashboard statistics"""
-    settings = await db.app_settings.find_one() or {}
-    min_threshold = settings.get('min_quorum_threshold', 3)
+    return await dashboard_stats()
+
+@api_router.get("/updates")
+async def get_updates(since: Optional[str] = None, wait: float = 0):
+    """Alerts created or updated after the `since` cursor, plus the dashboard counters.
     
-    total_accounts = await db.twitter_accounts.count_documents({"is_active": True})
-    # Only count name alerts that meet the threshold
-    total_name_alerts = await db.name_alerts.count_documents({
-        "is_active": True,
-        "quorum_count": {"$gte": min_threshold}
-    })
-    total_ca_alerts = await db.ca_alerts.count_documents({})
+    Deltas come from the broadcast replay log, so a poll costs no database query.
+    A missing or unusable cursor (first call, restart, older than the log) gets a
+    reset: the first page of each alert list. With wait > 0 an empty delta is held
+    open until an alert is broadcast or `wait` seconds pass.
+    """
+    events = manager.events
+    stream, _, seq = (since or "").rpartition(":")
+    missed = events.since(int(seq), stream) if seq.isdigit() else None
+    if missed == [] and wait > 0:
+        try:
+            await asyncio.wait_for(events.updated.wait(), min(wait, UPDATES_MAX_WAIT_SECONDS))
+        except asyncio.TimeoutError:
+            pass
+        missed = events.since(int(seq), stream)
+    cursor = f"{events.stream}:{events.seq}"
     
-    return {
-        "total_accounts": total_accounts,
-        "total_name_alerts": total_name_alerts,
-        "total_ca_alerts": total_ca_alerts,
-        "monitoring_active": settings.get("monitoring_enabled", False),
-        "min_quorum_threshold": min_threshold
-    }
+    if missed is None:
+        settings = await settings_cache.get()
+        name_alerts, _ = await fetch_page(db.name_alerts, {
+            "is_active": True,
+            "quorum_count": {"$gte": settings.get('min_quorum_threshold', 3)}
+        }, "first_seen", -1, DEFAULT_PAGE_LIMIT, None, None)
+        ca_alerts, _ = await fetch_page(db.ca_alerts, {}, "first_seen", -1, DEFAULT_PAGE_LIMIT, None, None)
+    else:
+        # Latest state per token for name alerts; both lists newest first, like the listings
+        latest: Dict[str, Dict[str, Any]] = {}
+        ca_alerts = []
+        for event in missed:
+            message = event[0]
+            data = message.get("data") or {}
+            if message.get("type") == "name_alert":
+                latest.pop(data["token_name"], None)
+                latest[data["token_name"]] = data
+            elif message.get("type") == "name_alert_update":
+                # Updates carry the Mongo _id as their id - keep the alert's own
+                update = {k: v for k, v in data.items() if k != "id"}
+                latest[data["token_name"]] = {**latest.pop(data["token_name"], {}), **update}
+            elif message.get("type") == "ca_alert":
+                ca_alerts.append(data)
+        name_alerts = list(reversed(latest.values()))
+        ca_alerts.reverse()
+    
+    return MongoJSONResponse({
+        "cursor": cursor,
+        "reset": missed is None,
+        "name_alerts": name_alerts,
+        "ca_alerts": ca_alerts,
+        "stats": await dashboard_stats()
+    })
+
+@api_router.get("/trending")
+async def get_trending(limit: int = 20):
+    """Fastest-rising token names over the sliding window, from the worker processing tweets"""
+    limit = max(1, min(limit, TRENDING_TOP_K))
+    if trending_tokens.top:
+        return {"worker": WORKER_ID, **trending_tokens.stats(), "tokens": trending_tokens.trending()[:limit]}
+    saved = await db.trending_tokens.find_one({"_id": "trending"}, {"_id": 0})
+    if saved is None:
+        return {"worker": None, **trending_tokens.stats(), "tokens": []}
+    return {**saved, "tokens": saved["tokens"][:limit]}
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Response cache size and hit rate"""
+    return response_cache.stats()
+
+@api_router.post("/backfill")
+async def start_backfill(request: BackfillRequest):
+    """Backfill historical tweets for accounts as alerts, without broadcasting them"""
+    usernames = request.usernames
+    if usernames is None:
+        pending = await db.twitter_accounts.find({"backfilled_at": None}, {"_id": 0, "username": 1}).to_list(None)
+        usernames = [doc["username"] for doc in pending]
+    if not usernames:
+        raise HTTPException(status_code=400, detail="No accounts to backfill")
+    return await start_backfill_job(usernames, request.max_tweets, request.since)
+
+@api_router.get("/backfill/{job_id}")
+async def get_backfill(job_id: str):
+    """Backfill job progress"""
+    job = await db.backfill_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Backfill job not found")
+    return job
+
+@api_router.get("/lanes/stats")
+async def get_lane_stats():
+    """Alert processing lane queues and throughput"""
+    return alert_lanes.stats()
+
+@api_router.get("/ws/stats")
+async def get_websocket_stats():
+    """Per-client WebSocket queue depth, drops and send lag"""
+    return manager.stats()
 
 @api_router.get("/versions")
-async def get_versions():
-    """Get all app versions"""
-    versions = await db.app_versions.find().sort("version_number", -1).to_list(None)
-    # Convert ObjectIds to strings
-    def convert_objectid(obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        elif isinstance(obj, dict):
-            return {k: convert_objectid(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_objectid(v) for v in obj]
-        else:
-            return obj
-    return convert_objectid(versions)
+@cached_response("versions")
+async def get_versions(limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None,
+                       fields: Optional[str] = None, include_snapshot: bool = False):
+    """Get app versions, newest first (snapshot payloads only on request)"""
+    projection = parse_fields(fields, exclude=("payload", "snapshot_data"))  # Raw snapshots aren't JSON
+    if projection is None:
+        projection = {} if include_snapshot else {"snapshot_data": 0, "payload": 0}
+    elif include_snapshot:
+        projection = {**projection, "version_number": 1, "base_version": 1, "payload": 1, "snapshot_data": 1}
+    versions, next_cursor = await fetch_page(db.app_versions, {}, "version_number", -1, limit, cursor, projection)
+    if include_snapshot:
+        for version in versions:
+            version["snapshot_data"] = await load_version_snapshot(version)
+            version.pop("payload", None)
+    return page_response(versions, next_cursor)
 
 @api_router.post("/versions/create")
 async def create_version(tag: Optional[str] = None):
     """Create a new version snapshot"""
-    snapshot = await create_version_snapshot()
-    version_count = await db.app_versions.count_documents({})
+    return await save_version(tag)
+
+async def copy_indexes(source, target):
+    """Create the secondary indexes of source on target"""
+    async for index in source.list_indexes():
+        if index["name"] == "_id_":
+            continue
+        options = {k: v for k, v in index.items() if k not in ("v", "key", "ns")}
+        await target.create_index(list(index["key"].items()), **options)
+
+restore_gate = asyncio.Event()  # Cleared while a restore (on any worker) swaps collections
+restore_gate.set()
+
+@app.middleware("http")
+async def hold_reads_during_restore(request: Request, call_next):
+    """Reads wait for a restore's swap phase, so they don't mix old and restored collections"""
+    if request.method == "GET" and not restore_gate.is_set():
+        try:
+            await asyncio.wait_for(restore_gate.wait(), RESTORE_GATE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    return await call_next(request)
+
+async def restore_snapshot(snapshot: Dict[str, Any]):
+    """Replace live collections with snapshot contents via staging collections.
     
-    version = AppVersion(
-        version_number=version_count + 1,
-        snapshot_data=snapshot,
-        tag=tag or f"Manual snapshot #{version_count + 1}"
-    )
-    await db.app_versions.insert_one(version.dict())
+    Every collection is indexed and then filled under a staging name first; if
+    anything fails there, the staging collections are dropped and the live data
+    is untouched. Each collection is then swapped in with an atomic
+    renameCollection(dropTarget=True), and the settings written last.
+    
+    The swap as a whole is not atomic: between the first rename and the
+    settings write, the collections hold a mix of old and restored state.
+    restore_gate is closed on every worker for that window, but
+    requests already running and alert processing can still observe it.
+    """
+    staged = []
+    try:
+        for key, collection in SNAPSHOT_COLLECTIONS.items():
+            staging = db[f"{collection}{RESTORE_STAGING_SUFFIX}"]
+            await staging.drop()
+            await db.create_collection(staging.name)
+            staged.append((staging, collection))
+            # Indexes first - a unique violation fails here, before anything is swapped
+            await copy_indexes(db[collection], staging)
+            docs = snapshot.get(key) or []
+            for i in range(0, len(docs), RESTORE_BATCH_SIZE):
+                await staging.insert_many(docs[i:i + RESTORE_BATCH_SIZE], ordered=False)
+    except Exception:
+        for staging, _ in staged:
+            await staging.drop()
+        raise
     
-    # Clean old versions (keep last 20)
-    all_versions = await db.app_versions.find().sort("version_number", -1).to_list(None)
-    if len(all_versions) > 20:
-        versions_to_delete = all_versions[20:]
-        for old_version in versions_to_delete:
-            await db.app_versions.delete_one({"_id": old_version["_id"]})
+    # Swap phase - each rename is atomic and only touches metadata; "restored" reopens the gate
+    await publish_control("restoring")
+    for position, (staging, collection) in enumerate(staged):
+        try:
+            await staging.rename(collection, dropTarget=True)
+        except Exception:
+            for unswapped, _ in staged[position:]:
+                await unswapped.drop()
+            raise
     
-    return version.dict()
+    if snapshot.get("settings"):
+        settings = {k: v for k, v in snapshot["settings"].items() if k != "_id"}  # Legacy snapshots carry _id
+        await db.app_settings.replace_one({}, settings, upsert=True)
 
 @api_router.post("/versions/{version_id}/restore")
 async def restore_version(version_id: str):
@@ -857,75 +3704,134 @@ async def restore_version(version_id: str):
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
     
-    snapshot = version["snapshot_data"]
-    
-    # Clear current data
-    await db.twitter_accounts.delete_many({})
-    await db.name_alerts.delete_many({})
-    await db.ca_alerts.delete_many({})
-    await db.blacklist.delete_many({})
-    
-    # Restore snapshot data
-    if snapshot.get("accounts"):
-        await db.twitter_accounts.insert_many(snapshot["accounts"])
-    if snapshot.get("name_alerts"):
-        await db.name_alerts.insert_many(snapshot["name_alerts"])
-    if snapshot.get("ca_alerts"):
-        await db.ca_alerts.insert_many(snapshot["ca_alerts"])
-    if snapshot.get("blacklist"):
-        await db.blacklist.insert_many(snapshot["blacklist"])
-    if snapshot.get("settings"):
-        await db.app_settings.replace_one({}, snapshot["settings"], upsert=True)
+    snapshot = await load_version_snapshot(version)
+    async with version_lock:
+        await alert_store.flush()
+        try:
+            await restore_snapshot(snapshot)
+        finally:
+            # Even a failed swap may have replaced some collections - drop all cached state
+            await settings_cache.refresh()
+            alert_store.reset()
+            snapshot_journal.invalidate()
+            dashboard_counters.invalidate()
+            account_metrics.invalidate()
+            await publish_control("restored")
     
     return {"status": "Version restored successfully"}
 
+# Collections available to the streaming export, with the field used for time-range filters
+EXPORT_COLLECTIONS = {
+    "name_alerts": "first_seen",
+    "ca_alerts": "first_seen",
+    "accounts": "added_at",
+}
+EXPORT_BATCH_LINES = 500
+
 @api_router.get("/export")
 async def export_data():
-    """Export all alerts and performance data"""
-    name_alerts = await db.name_alerts.find().to_list(None)
-    ca_alerts = await db.ca_alerts.find().to_list(None)
-    accounts = await db.twitter_accounts.find().to_list(None)
-    
-    # Convert ObjectIds to strings
-    def convert_objectid(obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        elif isinstance(obj, dict):
-            return {k: convert_objectid(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_objectid(v) for v in obj]
-        else:
-            return obj
+    """Export all alerts and performance data as one JSON document, streamed a batch at a time"""
+    await alert_store.flush()
     
-    export_data = {
-        "export_timestamp": datetime.now(timezone.utc).isoformat(),
-        "name_alerts": convert_objectid(name_alerts),
-        "ca_alerts": convert_objectid(ca_alerts),
-        "accounts": convert_objectid(accounts)
-    }
+    async def json_chunks():
+        yield b'{"export_timestamp":' + dumps_json(datetime.now(timezone.utc).isoformat())
+        for name in EXPORT_COLLECTIONS:
+            collection = db.twitter_accounts if name == "accounts" else db[name]
+            yield b',"' + name.encode() + b'":['
+            separator, lines = b"", []
+            async for doc in collection.find().batch_size(EXPORT_BATCH_LINES):
+                lines.append(dumps_json(doc))
+                if len(lines) >= EXPORT_BATCH_LINES:
+                    yield separator + b",".join(lines)
+                    separator, lines = b",", []
+            yield (separator + b",".join(lines) if lines else b"") + b"]"
+        yield b"}"
+    
+    return StreamingResponse(json_chunks(), media_type="application/json")
+
+@api_router.get("/export/stream")
+async def export_data_stream(collections: str = "name_alerts,ca_alerts,accounts",
+                             since: Optional[datetime] = None, until: Optional[datetime] = None,
+                             compress: bool = False):
+    """Stream alerts and accounts as NDJSON lines, optionally gzip-compressed"""
+    selected = [c.strip() for c in collections.split(',') if c.strip()]
+    unknown = [c for c in selected if c not in EXPORT_COLLECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown export collections: {', '.join(unknown)}")
+    
+    await alert_store.flush()
+    
+    time_filter = {}
+    if since:
+        time_filter["$gte"] = since
+    if until:
+        time_filter["$lt"] = until
+    
+    async def ndjson_lines():
+        yield dumps_json({
+            "type": "export",
+            "export_timestamp": datetime.now(timezone.utc).isoformat(),
+            "collections": selected
+        }) + b"\n"
+        
+        for name in selected:
+            collection = db.twitter_accounts if name == "accounts" else db[name]
+            query = {EXPORT_COLLECTIONS[name]: time_filter} if time_filter else {}
+            lines = []
+            async for doc in collection.find(query).batch_size(EXPORT_BATCH_LINES):
+                lines.append(dumps_json({"collection": name, "document": doc}))
+                if len(lines) >= EXPORT_BATCH_LINES:
+                    yield b"\n".join(lines) + b"\n"
+                    lines = []
+            if lines:
+                yield b"\n".join(lines) + b"\n"
+    
+    async def gzip_chunks():
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        async for chunk in ndjson_lines():
+            # Sync-flush each batch so clients receive data as soon as it is read
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
     
-    return export_data
+    filename = f"meme_tracker_export_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.ndjson"
+    if compress:
+        return StreamingResponse(gzip_chunks(), media_type="application/gzip",
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'})
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@api_router.get("/archive")
+async def get_archived_alerts(collection: str = "ca_alerts", since: Optional[datetime] = None,
+                              until: Optional[datetime] = None, limit: int = DEFAULT_PAGE_LIMIT):
+    """Query archived alerts by first_seen range"""
+    if collection not in ARCHIVE_COLLECTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown archive collection: {collection}")
+    for bound in (since, until):
+        if bound and bound.tzinfo is None:
+            raise HTTPException(status_code=400, detail="since/until must include a timezone")
+    alerts = await alert_archiver.query(collection, since, until, max(1, min(limit, MAX_PAGE_LIMIT)))
+    return MongoJSONResponse(alerts)
+
+@api_router.post("/archive/run")
+async def run_archival():
+    """Archive old alerts now instead of waiting for the next scheduled run"""
+    archived = await alert_archiver.archive()
+    if archived is None:
+        raise HTTPException(status_code=409, detail="Archival is already running on another worker")
+    return {"archived": archived}
 
 @api_router.get("/settings")
+@cached_response("settings")
 async def get_settings():
     """Get app settings"""
-    settings = await db.app_settings.find_one() or {}
-    # Convert ObjectIds to strings
-    def convert_objectid(obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        elif isinstance(obj, dict):
-            return {k: convert_objectid(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_objectid(v) for v in obj]
-        else:
-            return obj
-    return convert_objectid(settings)
+    return await settings_cache.get()
 
 @api_router.post("/settings")
 async def update_settings(settings: AppSettings):
     """Update app settings"""
     await db.app_settings.replace_one({}, settings.dict(), upsert=True)
+    await settings_cache.refresh()
+    await publish_control("settings_changed")
     return settings.dict()
 
 # Include the router in the main app
@@ -937,6 +3843,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -946,12 +3853,90 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def load_settings_cache():
+    await settings_cache.refresh()
+    settings_cache.start_watching()
+
+@app.on_event("startup")
+async def ensure_indexes():
+    try:
+        await db.twitter_accounts.create_index("username", unique=True)
+    except Exception as e:
+        logger.warning(f"Could not create unique username index (duplicate accounts?): {e}")
+    
+    # Keyset pagination indexes for the listing endpoints
+    await db.twitter_accounts.create_index([("added_at", 1), ("_id", 1)])
+    await db.name_alerts.create_index([("first_seen", -1), ("_id", -1)])
+    await db.name_alerts.create_index([("token_name", 1), ("is_active", 1)])
+    await db.quorum_window.create_index("token_name", unique=True)
+    await db.alerts_archive.create_index([("collection", 1), ("first_seen_from", 1)])
+    await ensure_name_alert_expiry()
+    await db.ca_alerts.create_index([("first_seen", -1), ("_id", -1)])
+    await db.app_versions.create_index([("version_number", -1), ("_id", -1)])
+    try:
+        await db.app_versions.create_index("version_number", unique=True)
+    except Exception as e:
+        logger.warning(f"Could not create unique version_number index (duplicate versions?): {e}")
+    for field in LEADERBOARD_SORTS:
+        await db.twitter_accounts.create_index([(f"performance.{field}", -1), ("_id", 1)])
+    if WS_REPLAY_PERSIST:
+        await db.ws_events.create_index([("stream", 1), ("seq", 1)])
+
+@app.on_event("startup")
+async def start_alert_store():
+    alert_store.start()
+
+@app.on_event("startup")
+async def start_quorum_window():
+    await quorum_window.load()
+    quorum_window.start()
+
+@app.on_event("startup")
+async def start_account_metrics():
+    account_metrics.start()
+
+@app.on_event("startup")
+async def start_trending_tokens():
+    trending_tokens.start()
+
+@app.on_event("startup")
+async def start_alert_lanes():
+    alert_lanes.start()
+
+@app.on_event("startup")
+async def start_alert_archiver():
+    alert_archiver.start()
+
+@app.on_event("startup")
+async def start_websocket_dispatcher():
+    await manager.events.load()
+    manager.start()
+
+@app.on_event("startup")
+async def start_event_bus():
+    await bus.start()
+    if bus.stream is not None and bus.stream != manager.events.stream:
+        manager.events.restart(bus.stream)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     global monitoring_active
     monitoring_active = False
+    monitor_wakeup.set()
+    settings_cache.stop_watching()
+    alert_archiver.stop()
+    for task in list(backfill_tasks.values()):
+        task.cancel()
+    await alert_lanes.stop()
+    account_metrics.stop()
+    trending_tokens.stop()
+    await bus.stop()
+    await manager.stop()
+    await quorum_window.stop()
+    await alert_store.stop()
     client.close()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8001, ws_per_message_deflate=WS_PER_MESSAGE_DEFLATE)
\ No newline at end of file
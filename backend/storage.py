@@ -0,0 +1,1201 @@
+"""
+Embedded storage engines for the tracker backend.
+
+server.py talks to a Mongo-style database handle (`db.<collection>.find(...)`).
+Besides Motor/MongoDB, this module provides two engines implementing the subset
+of the Motor collection API the server uses, selected with STORAGE_BACKEND:
+
+- sqlite: one table per collection in a WAL-mode SQLite file, for single-node
+  low-latency deployments. Filters, sorts and limits on top-level fields are
+  translated to SQL over json_extract() expression indexes; anything else is
+  evaluated in Python on the candidate rows.
+- memory: documents in plain dicts, for tests and benchmarks.
+
+Only the operators server.py uses are emulated, each with MongoDB's semantics
+(tests/test_storage.py checks them against MongoDB); anything else raises
+OperationFailure rather than silently behaving differently:
+
+- filters: field equality, $ne, $gt, $gte, $lt, $lte, $in, $exists, $and, $or
+- updates: $set, $setOnInsert, $unset, $inc, $push (with $each and $slice),
+  and whole-document replacement
+
+The memory engine runs its operations inline on the event loop. The sqlite engine
+runs every operation on one dedicated thread, which serializes access to the
+connection and keeps disk I/O off the loop.
+"""
+import asyncio
+import base64
+import copy
+import itertools
+import json
+import re
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+EPOCH = datetime(1970, 1, 1)
+TTL_MONITOR_SECONDS = 60  # Same cadence as MongoDB's TTL monitor
+CURSOR_BATCH_SIZE = 500  # Documents an async-for cursor reads per batch
+
+# Documents and values
+def normalize(value):
+    """Copy a value the way MongoDB stores it: naive UTC datetimes with millisecond precision"""
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+def type_rank(value) -> int:
+    """BSON comparison order between types"""
+    if value is None:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, bytes):
+        return 6
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+def sort_value(value):
+    """Key ordering values like MongoDB: by BSON type, then within the type"""
+    rank = type_rank(value)
+    if rank == 4:
+        # Embedded documents compare field by field: type, then name, then value
+        return rank, tuple((type_rank(v), k, sort_value(v)) for k, v in value.items())
+    if rank == 5:
+        return rank, tuple(sort_value(v) for v in value)
+    if rank == 6:
+        return rank, (len(value), value)
+    if rank == 10:
+        return rank, repr(value)
+    return rank, value
+
+def resolve(value, parts: List[str]) -> List[Any]:
+    """Values at a dotted path, descending into arrays like MongoDB does"""
+    if not parts:
+        return [value]
+    if isinstance(value, dict):
+        return resolve(value[parts[0]], parts[1:]) if parts[0] in value else []
+    if isinstance(value, list):
+        if parts[0].isdigit():
+            index = int(parts[0])
+            return resolve(value[index], parts[1:]) if index < len(value) else []
+        found = []
+        for item in value:
+            if isinstance(item, dict):
+                found.extend(resolve(item, parts))
+        return found
+    return []
+
+def get_path(doc: Dict[str, Any], path: str):
+    values = resolve(doc, path.split("."))
+    return values[0] if values else None
+
+def set_path(doc: Dict[str, Any], path: str, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+        if not isinstance(doc, dict):
+            raise OperationFailure(f"Cannot create field '{last}' in element {{{part}: {doc!r}}}", code=28)
+    doc[last] = value
+
+def unset_path(doc: Dict[str, Any], path: str):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+def is_operators(condition) -> bool:
+    return isinstance(condition, dict) and bool(condition) and all(k.startswith("$") for k in condition)
+
+def is_number(value) -> bool:
+    return type_rank(value) == 2
+
+# Query matching - filters are compiled once per operation into predicates
+def candidates(values: List[Any]) -> List[Any]:
+    """Array fields match on the array itself or on any element"""
+    found = list(values)
+    for value in values:
+        if isinstance(value, list):
+            found.extend(value)
+    return found
+
+def compile_in(options) -> Callable[[List[Any]], bool]:
+    options = [normalize(o) for o in options]
+    keys = {sort_value(o) for o in options}
+    missing_ok = None in options
+    return lambda values: (not values and missing_ok) or any(sort_value(v) in keys for v in candidates(values))
+
+def compile_compare(op: str, operand) -> Callable[[List[Any]], bool]:
+    operand = normalize(operand)
+    if operand is None:
+        # Only the inclusive bounds match null, and with it a missing field
+        return compile_in([None]) if op in ("$gte", "$lte") else lambda values: False
+    key = sort_value(operand)
+    test = {"$gt": lambda k: k > key, "$gte": lambda k: k >= key,
+            "$lt": lambda k: k < key, "$lte": lambda k: k <= key}[op]
+    return lambda values: any(type_rank(v) == key[0] and test(sort_value(v)) for v in candidates(values))
+
+def compile_condition(condition) -> Callable[[List[Any]], bool]:
+    """Predicate over the values found at a field path"""
+    if not is_operators(condition):
+        return compile_in([condition])
+    tests = []
+    for op, operand in condition.items():
+        if op == "$ne":
+            tests.append(lambda values, test=compile_in([operand]): not test(values))
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            tests.append(compile_compare(op, operand))
+        elif op == "$in":
+            if not isinstance(operand, (list, tuple)):
+                raise OperationFailure("$in needs an array", code=2)
+            tests.append(compile_in(operand))
+        elif op == "$exists":
+            tests.append(lambda values, wanted=bool(operand): bool(values) == wanted)
+        else:
+            raise OperationFailure(f"unknown operator: {op}", code=2)
+    return lambda values: all(test(values) for test in tests)
+
+def compile_query(query: Optional[Dict[str, Any]]) -> Callable[[Dict[str, Any]], bool]:
+    tests = []
+    for key, condition in (query or {}).items():
+        if key in ("$and", "$or"):
+            if not isinstance(condition, (list, tuple)) or not condition:
+                raise OperationFailure(f"{key} must be a nonempty array", code=2)
+            subqueries = [compile_query(q) for q in condition]
+            combine = all if key == "$and" else any
+            tests.append(lambda doc, subqueries=subqueries, combine=combine: combine(q(doc) for q in subqueries))
+        elif key.startswith("$"):
+            raise OperationFailure(f"unknown top level operator: {key}", code=2)
+        else:
+            parts, test = key.split("."), compile_condition(condition)
+            tests.append(lambda doc, parts=parts, test=test: test(resolve(doc, parts)))
+    return lambda doc: all(test(doc) for test in tests)
+
+def matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    return compile_query(query)(doc)
+
+def sort_key(doc: Dict[str, Any], field: str, direction: int):
+    """Arrays sort by their smallest element ascending and their largest descending, an empty one below null"""
+    keys = []
+    for value in resolve(doc, field.split(".")):
+        if isinstance(value, list) and value:
+            keys.extend(sort_value(item) for item in value)
+        elif isinstance(value, list):
+            keys.append((0, None))
+        else:
+            keys.append(sort_value(value))
+    if not keys:
+        return sort_value(None)
+    return min(keys) if direction > 0 else max(keys)
+
+def sort_docs(docs: List[Dict[str, Any]], sort: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    for field, direction in reversed(sort):
+        docs.sort(key=lambda d: sort_key(d, field, direction), reverse=direction < 0)
+    return docs
+
+def project(doc: Dict[str, Any], projection) -> Dict[str, Any]:
+    if not projection:
+        return doc
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if not fields and projection["_id"]:
+        return {"_id": doc["_id"]} if "_id" in doc else {}
+    if fields and all(fields.values()):
+        result = {}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for field in fields:
+            values = resolve(doc, field.split("."))
+            if values:
+                set_path(result, field, values[0])
+        return result
+    result = dict(doc)
+    for field in fields:
+        unset_path(result, field)
+    if not projection.get("_id", 1):
+        result.pop("_id", None)
+    return result
+
+# Updates
+UPDATE_OPERATORS = ("$set", "$setOnInsert", "$unset", "$inc", "$push")
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any], inserting: bool = False) -> Dict[str, Any]:
+    """Return a copy of doc with a replacement or operator update applied"""
+    if not any(key.startswith("$") for key in update):
+        replaced = normalize(update)
+        if "_id" in doc:
+            replaced["_id"] = doc["_id"]
+        return replaced
+
+    doc = copy.deepcopy(doc)
+    for op, fields in update.items():
+        if op not in UPDATE_OPERATORS:
+            raise OperationFailure(f"Unknown modifier: {op}", code=9)
+        for path, value in fields.items():
+            value = normalize(value)
+            found = resolve(doc, path.split("."))
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                set_path(doc, path, value)
+            elif op == "$unset":
+                unset_path(doc, path)
+            elif op == "$inc":
+                if not is_number(value) or (found and not is_number(found[0])):
+                    raise OperationFailure(f"Cannot apply $inc to a value of non-numeric type at '{path}'", code=14)
+                set_path(doc, path, (found[0] if found else 0) + value)
+            elif op == "$push":
+                if found and not isinstance(found[0], list):
+                    raise OperationFailure(f"The field '{path}' must be an array", code=2)
+                items = list(found[0]) if found else []
+                if is_operators(value):
+                    if "$each" not in value or set(value) - {"$each", "$slice"}:
+                        raise OperationFailure(f"Unsupported $push modifiers: {sorted(value)}", code=2)
+                    items.extend(value["$each"])
+                    if "$slice" in value:
+                        limit = value["$slice"]
+                        items = items[limit:] if limit < 0 else items[:limit]
+                else:
+                    items.append(value)
+                set_path(doc, path, items)
+    return doc
+
+def upsert_seed(query: Dict[str, Any], seed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fields an upsert inserts from its filter: equality conditions at the top level and
+    inside $and, never those in $or branches, as MongoDB does"""
+    seed = {} if seed is None else seed
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            for clause in condition:
+                upsert_seed(clause, seed)
+        elif not key.startswith("$") and not is_operators(condition):
+            set_path(seed, key, normalize(condition))
+    return seed
+
+def index_keys(keys) -> List[Tuple[str, int]]:
+    if isinstance(keys, str):
+        return [(keys, 1)]
+    if isinstance(keys, dict):
+        return list(keys.items())
+    return [tuple(k) for k in keys]
+
+def write_error(index: int, error: DuplicateKeyError, op) -> Dict[str, Any]:
+    return {"index": index, "code": error.code, "errmsg": str(error), "op": op}
+
+class EmbeddedCursor:
+    """The chainable part of the Motor cursor API: sort, limit, batch_size, to_list, async for"""
+
+    def __init__(self, collection, query, projection=None, sort=None, skip=0, limit=0):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self._sort = index_keys(sort) if sort else []
+        self._skip = skip
+        self._limit = limit
+        self._batch_size = CURSOR_BATCH_SIZE
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = [(key_or_list, direction or 1)] if isinstance(key_or_list, str) else index_keys(key_or_list)
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int):
+        self._batch_size = batch_size or CURSOR_BATCH_SIZE
+        return self
+
+    def _docs(self, length=None) -> List[Dict[str, Any]]:
+        limit = self._limit
+        if length:
+            limit = min(limit, length) if limit else length
+        self.collection.expire()
+        return [project(doc, self.projection)
+                for doc in self.collection.scan(self.query, self._sort, self._skip, limit)]
+
+    async def to_list(self, length=None) -> List[Dict[str, Any]]:
+        return await self.collection.run(self._docs, length)
+
+    def _open(self) -> Iterator[Dict[str, Any]]:
+        self.collection.expire()
+        return self.collection.iterate(self.query, self._sort, self._skip, self._limit)
+
+    def _next_batch(self, docs: Iterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [project(doc, self.projection) for doc in itertools.islice(docs, self._batch_size)]
+
+    async def __aiter__(self):
+        # Documents are read batch_size at a time, like a server cursor's getMore
+        docs = await self.collection.run(self._open)
+        while True:
+            batch = await self.collection.run(self._next_batch, docs)
+            if not batch:
+                return
+            for doc in batch:
+                yield doc
+            await asyncio.sleep(0)  # Inline engines would otherwise hold the loop for the whole result
+
+class EmbeddedCollection:
+    """Motor-compatible collection over an engine's scan/insert/replace/delete primitives"""
+
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self._expired_at = 0.0
+
+    # Engine primitives
+    def scan(self, query, sort, skip=0, limit=0) -> Iterable[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def iterate(self, query, sort, skip=0, limit=0) -> Iterator[Dict[str, Any]]:
+        """scan() results produced lazily, for cursors read in batches"""
+        return iter(self.scan(query, sort, skip, limit))
+
+    def count(self, query) -> int:
+        return sum(1 for _ in self.scan(query, []))
+
+    def insert(self, doc: Dict[str, Any]):
+        raise NotImplementedError
+
+    def replace(self, doc: Dict[str, Any]):
+        raise NotImplementedError
+
+    def remove(self, doc_id):
+        raise NotImplementedError
+
+    def transaction(self):
+        return self.database.transaction()
+
+    async def run(self, fn, *args):
+        """Run a synchronous engine operation where the engine wants it"""
+        return await self.database.client.run(fn, *args)
+
+    # Indexes are kept in the database's index registry
+    def indexes(self) -> Dict[str, Dict[str, Any]]:
+        return self.database.indexes(self.name)
+
+    def expire(self):
+        """Delete documents past a TTL index's expireAfterSeconds, at most once per TTL_MONITOR_SECONDS"""
+        now = time.monotonic()
+        if now - self._expired_at < TTL_MONITOR_SECONDS:
+            return
+        self._expired_at = now
+        for spec in self.indexes().values():
+            if spec.get("expireAfterSeconds") is None:
+                continue
+            field = spec["key"][0][0]
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=spec["expireAfterSeconds"])
+            query = {"$and": [{field: {"$lt": cutoff}}, spec.get("partialFilterExpression") or {}]}
+            with self.transaction():
+                for doc in list(self.scan(query, [])):
+                    self.remove(doc["_id"])
+
+    def _update(self, query, update, upsert, multi) -> UpdateResult:
+        self.expire()
+        matched = modified = 0
+        upserted_id = None
+        with self.transaction():
+            for doc in list(self.scan(query, [], 0, 0 if multi else 1)):
+                updated = apply_update(doc, update)
+                matched += 1
+                if updated != doc:
+                    self.replace(updated)
+                    modified += 1
+            if not matched and upsert:
+                doc = apply_update(upsert_seed(query), update, inserting=True)
+                doc.setdefault("_id", ObjectId())
+                self.insert(doc)
+                upserted_id = doc["_id"]
+        raw = {"n": matched + (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    def _count(self, filter) -> int:
+        self.expire()
+        return self.count(filter)
+
+    def _delete(self, filter, multi: bool) -> DeleteResult:
+        self.expire()
+        with self.transaction():
+            docs = list(self.scan(filter, [], 0, 0 if multi else 1))
+            for doc in docs:
+                self.remove(doc["_id"])
+        return DeleteResult({"n": len(docs)}, True)
+
+    def _find_one_and_delete(self, filter, projection, sort):
+        self.expire()
+        with self.transaction():
+            docs = list(self.scan(filter, index_keys(sort) if sort else [], 0, 1))
+            if not docs:
+                return None
+            self.remove(docs[0]["_id"])
+        return project(docs[0], projection)
+
+    def _find_one_and_update(self, filter, update, projection, sort, upsert, return_document):
+        self.expire()
+        with self.transaction():
+            docs = list(self.scan(filter, index_keys(sort) if sort else [], 0, 1))
+            if docs:
+                before = docs[0]
+                after = apply_update(before, update)
+                self.replace(after)
+            elif upsert:
+                before = None
+                after = apply_update(upsert_seed(filter), update, inserting=True)
+                after.setdefault("_id", ObjectId())
+                self.insert(after)
+            else:
+                return None
+        doc = after if return_document == ReturnDocument.AFTER else before
+        return project(doc, projection) if doc is not None else None
+
+    def _bulk_write(self, requests, ordered: bool) -> BulkWriteResult:
+        result = {"writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+                  "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        with self.transaction():
+            for index, request in enumerate(requests):
+                try:
+                    if isinstance(request, InsertOne):
+                        request._doc.setdefault("_id", ObjectId())
+                        self.insert(normalize(request._doc))
+                        result["nInserted"] += 1
+                    elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                        outcome = self._update(request._filter, request._doc, request._upsert,
+                                               multi=isinstance(request, UpdateMany))
+                        if outcome.upserted_id is not None:
+                            result["nUpserted"] += 1
+                            result["upserted"].append({"index": index, "_id": outcome.upserted_id})
+                        else:
+                            result["nMatched"] += outcome.matched_count
+                        result["nModified"] += outcome.modified_count
+                    elif isinstance(request, (DeleteOne, DeleteMany)):
+                        outcome = self._delete(request._filter, multi=isinstance(request, DeleteMany))
+                        result["nRemoved"] += outcome.deleted_count
+                    else:
+                        raise TypeError(f"{request!r} is not a valid request")
+                except DuplicateKeyError as e:
+                    result["writeErrors"].append(write_error(index, e, getattr(request, "_doc", None)))
+                    if ordered:
+                        break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    def _create_index(self, keys, name: Optional[str], unique: bool, options) -> str:
+        keys = index_keys(keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        spec = {"key": keys, "v": 2, **({"unique": True} if unique else {}), **options}
+        existing = self.indexes().get(name)
+        if existing is not None:
+            if existing != spec:
+                raise OperationFailure(f"An existing index has the same name as the requested index: {name}",
+                                       code=86)
+            return name
+        self.database.create_index(self.name, name, spec)
+        return name
+
+    def _drop_index(self, name: str):
+        if name not in self.indexes():
+            raise OperationFailure(f"index not found with name [{name}]", code=27)
+        self.database.drop_index(self.name, name)
+
+    def _index_information(self) -> Dict[str, Dict[str, Any]]:
+        return {"_id_": {"v": 2, "key": [("_id", 1)]}, **copy.deepcopy(self.indexes())}
+
+    # Motor API
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0) -> EmbeddedCursor:
+        return EmbeddedCursor(self, filter, projection, sort, skip, limit)
+
+    async def find_one(self, filter=None, projection=None, sort=None, skip=0):
+        docs = await self.find(filter, projection, sort, skip, 1).to_list(1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter, **kwargs) -> int:
+        return await self.run(self._count, filter)
+
+    async def insert_one(self, document: Dict[str, Any]) -> InsertOneResult:
+        document.setdefault("_id", ObjectId())
+        await self.run(self.insert, normalize(document))
+        return InsertOneResult(document["_id"], True)
+
+    async def insert_many(self, documents, ordered: bool = True) -> InsertManyResult:
+        documents = list(documents)
+        await self.bulk_write([InsertOne(doc) for doc in documents], ordered=ordered)
+        return InsertManyResult([doc["_id"] for doc in documents], True)
+
+    async def update_one(self, filter, update, upsert: bool = False) -> UpdateResult:
+        return await self.run(self._update, filter, update, upsert, False)
+
+    async def update_many(self, filter, update, upsert: bool = False) -> UpdateResult:
+        return await self.run(self._update, filter, update, upsert, True)
+
+    async def replace_one(self, filter, replacement, upsert: bool = False) -> UpdateResult:
+        return await self.run(self._update, filter, replacement, upsert, False)
+
+    async def delete_one(self, filter) -> DeleteResult:
+        return await self.run(self._delete, filter, False)
+
+    async def delete_many(self, filter) -> DeleteResult:
+        return await self.run(self._delete, filter, True)
+
+    async def find_one_and_delete(self, filter, projection=None, sort=None):
+        return await self.run(self._find_one_and_delete, filter, projection, sort)
+
+    async def find_one_and_update(self, filter, update, projection=None, sort=None, upsert: bool = False,
+                                  return_document=ReturnDocument.BEFORE):
+        return await self.run(self._find_one_and_update, filter, update, projection, sort, upsert, return_document)
+
+    async def bulk_write(self, requests, ordered: bool = True) -> BulkWriteResult:
+        return await self.run(self._bulk_write, list(requests), ordered)
+
+    async def create_index(self, keys, name: Optional[str] = None, unique: bool = False, **options) -> str:
+        return await self.run(self._create_index, keys, name, unique, options)
+
+    async def drop_index(self, name: str):
+        await self.run(self._drop_index, name)
+
+    async def index_information(self) -> Dict[str, Dict[str, Any]]:
+        return await self.run(self._index_information)
+
+    async def list_indexes(self):
+        for name, spec in (await self.index_information()).items():
+            yield {**spec, "key": dict(spec["key"]), "name": name}
+
+    async def drop(self):
+        await self.run(self.database.drop_collection_now, self.name)
+
+    async def rename(self, new_name: str, dropTarget: bool = False):
+        await self.run(self.database.rename_collection, self.name, new_name, dropTarget)
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("Change streams are only supported by the MongoDB storage backend", code=40573)
+
+class EmbeddedDatabase:
+    """Collection factory plus the per-database index registry"""
+
+    collection_class = EmbeddedCollection
+
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+        self._collections: Dict[str, EmbeddedCollection] = {}
+
+    def __getitem__(self, name: str) -> EmbeddedCollection:
+        if name not in self._collections:
+            self._collections[name] = self.collection_class(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> EmbeddedCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def create_collection(self, name: str) -> EmbeddedCollection:
+        await self.client.run(self.ensure_collection, name)
+        return self[name]
+
+
+class EmbeddedClient:
+    database_class = EmbeddedDatabase
+
+    def __init__(self):
+        self._databases: Dict[str, EmbeddedDatabase] = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._databases:
+            self._databases[name] = self.database_class(self, name)
+        return self._databases[name]
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+    def close(self):
+        pass
+
+# In-memory engine
+def lookup_keys(value) -> List[Any]:
+    """Hash keys a field value is found under - arrays are also indexed by element"""
+    keys = [sort_value(value)]
+    if isinstance(value, list):
+        keys.extend(sort_value(item) for item in value)
+    return keys
+
+class MemoryCollection(EmbeddedCollection):
+    """Documents keyed by _id, plus a hash lookup per index's leading top-level field"""
+
+    @property
+    def store(self) -> Dict[Any, Dict[str, Any]]:
+        return self.database.ensure_collection(self.name)
+
+    def candidates(self, query) -> Iterable[Dict[str, Any]]:
+        """Narrow a scan through a hash lookup on an equality or $in condition"""
+        store = self.database.collections.get(self.name, {})
+        lookups = self.database.lookups.get(self.name, {})
+        for field, condition in (query or {}).items():
+            if field != "_id" and field not in lookups:
+                continue
+            if is_operators(condition):
+                values = condition.get("$in")
+                if not isinstance(values, (list, tuple)):
+                    continue
+            else:
+                values = [condition]
+            values = normalize(values)
+            if field == "_id":
+                return [store[v] for v in values if not isinstance(v, (dict, list)) and v in store]
+            ids = {}
+            for value in values:
+                ids.update(lookups[field].get(sort_value(value), {}))
+            return [store[doc_id] for doc_id in ids]
+        return store.values()
+
+    def scan(self, query, sort, skip=0, limit=0):
+        return list(self.iterate(query, sort, skip, limit))
+
+    def iterate(self, query, sort, skip=0, limit=0):
+        # Matches are collected as references; each is copied only when it is read
+        test = compile_query(query)
+        docs = [doc for doc in self.candidates(query) if test(doc)]
+        if sort:
+            sort_docs(docs, sort)
+        docs = docs[skip:skip + limit] if limit else docs[skip:]
+        return (copy.deepcopy(doc) for doc in docs)
+
+    def unique_keys(self, doc):
+        for name, spec in self.indexes().items():
+            if spec.get("unique"):
+                yield name, tuple(repr(sort_value(get_path(doc, field))) for field, _ in spec["key"])
+
+    def check_unique(self, doc):
+        taken = self.database.unique.setdefault(self.name, {})
+        for name, key in self.unique_keys(doc):
+            owner = taken.get((name, key))
+            if owner is not None and owner != doc["_id"]:
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.database.name}.{self.name} index: {name}",
+                    11000)
+
+    def index_doc(self, doc, add: bool):
+        taken = self.database.unique.setdefault(self.name, {})
+        for name, key in self.unique_keys(doc):
+            if add:
+                taken[(name, key)] = doc["_id"]
+            else:
+                taken.pop((name, key), None)
+        for field, lookup in self.database.lookups.get(self.name, {}).items():
+            for key in lookup_keys(doc.get(field)):
+                ids = lookup.setdefault(key, {})
+                if add:
+                    ids[doc["_id"]] = None
+                else:
+                    ids.pop(doc["_id"], None)
+                    if not ids:
+                        del lookup[key]
+
+    def insert(self, doc):
+        if doc["_id"] in self.store:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.database.name}.{self.name} index: _id_", 11000)
+        self.check_unique(doc)
+        self.store[doc["_id"]] = doc
+        self.index_doc(doc, add=True)
+
+    def replace(self, doc):
+        self.check_unique(doc)
+        self.index_doc(self.store[doc["_id"]], add=False)
+        self.store[doc["_id"]] = doc
+        self.index_doc(doc, add=True)
+
+    def remove(self, doc_id):
+        doc = self.store.pop(doc_id, None)
+        if doc is not None:
+            self.index_doc(doc, add=False)
+
+class MemoryDatabase(EmbeddedDatabase):
+    collection_class = MemoryCollection
+
+    def __init__(self, client, name: str):
+        super().__init__(client, name)
+        self.collections: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self.index_specs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.unique: Dict[str, Dict[Tuple, Any]] = {}
+        self.lookups: Dict[str, Dict[str, Dict[Any, Dict[Any, None]]]] = {}  # collection -> field -> key -> ids
+
+    def transaction(self):
+        return _NoTransaction()
+
+    def ensure_collection(self, name: str):
+        return self.collections.setdefault(name, {})
+
+    def indexes(self, collection: str):
+        return self.index_specs.get(collection, {})
+
+    def reindex(self, collection: str):
+        self.unique[collection] = {}
+        self.lookups[collection] = {
+            spec["key"][0][0]: {} for spec in self.indexes(collection).values()
+            if "." not in spec["key"][0][0] and spec["key"][0][0] != "_id" and not spec.get("partialFilterExpression")
+        }
+        coll = self[collection]
+        for doc in self.collections.get(collection, {}).values():
+            coll.check_unique(doc)
+            coll.index_doc(doc, add=True)
+
+    def create_index(self, collection: str, name: str, spec: Dict[str, Any]):
+        self.ensure_collection(collection)
+        self.index_specs.setdefault(collection, {})[name] = spec
+        try:
+            self.reindex(collection)
+        except DuplicateKeyError:
+            del self.index_specs[collection][name]
+            self.reindex(collection)
+            raise
+
+    def drop_index(self, collection: str, name: str):
+        del self.index_specs[collection][name]
+        self.reindex(collection)
+
+    def drop_collection_now(self, name: str):
+        for registry in (self.collections, self.index_specs, self.unique, self.lookups):
+            registry.pop(name, None)
+
+    def rename_collection(self, name: str, new_name: str, drop_target: bool):
+        if new_name in self.collections and not drop_target:
+            raise OperationFailure("target namespace exists", code=48)
+        self.drop_collection_now(new_name)
+        for registry in (self.collections, self.index_specs, self.unique, self.lookups):
+            registry[new_name] = registry.pop(name, {})
+
+class MemoryClient(EmbeddedClient):
+    database_class = MemoryDatabase
+
+class _NoTransaction:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+# SQLite engine
+def encode_value(value):
+    if isinstance(value, dict):
+        return {k: encode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [encode_value(v) for v in value]
+    if isinstance(value, datetime):
+        return {"$date": (normalize(value) - EPOCH) // timedelta(milliseconds=1)}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, bytes):
+        return {"$binary": base64.b64encode(value).decode()}
+    return value
+
+def decode_object(obj: Dict[str, Any]):
+    if len(obj) == 1:
+        if "$date" in obj:
+            return EPOCH + timedelta(milliseconds=obj["$date"])
+        if "$oid" in obj:
+            return ObjectId(obj["$oid"])
+        if "$binary" in obj:
+            return base64.b64decode(obj["$binary"])
+    return obj
+
+def dumps_doc(doc: Dict[str, Any]) -> str:
+    return json.dumps(encode_value(doc), separators=(",", ":"))
+
+def loads_doc(text: str) -> Dict[str, Any]:
+    return json.loads(text, object_hook=decode_object)
+
+def id_key(value) -> str:
+    """Text primary key - ObjectId hex sorts in ObjectId order"""
+    return str(value) if isinstance(value, ObjectId) else json.dumps(encode_value(value), sort_keys=True)
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+def field_sql(field: str) -> str:
+    """SQL expression for a top-level field - dates are stored as {"$date": epoch_ms}"""
+    if field == "_id":
+        return "_id"
+    path = '$."' + field.replace('"', '') + '"'
+    return f"coalesce(json_extract(doc, '{path}.\"$date\"'), json_extract(doc, '{path}'))"
+
+def type_sql(field: str) -> str:
+    """SQL expression for the BSON type rank (type_rank()) of a top-level field"""
+    path = '$."' + field.replace('"', '') + '"'
+    return (f"CASE json_type(doc, '{path}') WHEN 'integer' THEN 2 WHEN 'real' THEN 2 WHEN 'text' THEN 3 "
+            f"WHEN 'array' THEN 5 WHEN 'true' THEN 8 WHEN 'false' THEN 8 WHEN 'object' THEN CASE "
+            f"WHEN json_type(doc, '{path}.\"$date\"') = 'integer' THEN 9 "
+            f"WHEN json_type(doc, '{path}.\"$oid\"') = 'text' THEN 7 "
+            f"WHEN json_type(doc, '{path}.\"$binary\"') = 'text' THEN 6 ELSE 4 END ELSE 1 END")
+
+def sql_operand(field: str, value) -> Tuple[Any, Optional[str]]:
+    """SQL parameter and type guard for a scalar the query can be pushed down with, else raise ValueError.
+
+    SQLite orders every number below every string and field_sql() turns dates into
+    epoch milliseconds, while MongoDB only compares values of the same BSON type -
+    so each pushed-down comparison also checks the stored JSON type.
+    """
+    value = normalize(value)
+    if field == "_id":
+        if isinstance(value, (dict, list)):
+            raise ValueError
+        return id_key(value), None
+    path = '$."' + field.replace('"', '') + '"'
+    if isinstance(value, bool):
+        return int(value), f"json_type(doc, '{path}') IN ('true', 'false')"
+    if isinstance(value, (int, float)):
+        return value, f"json_type(doc, '{path}') IN ('integer', 'real')"
+    if isinstance(value, str):
+        return value, f"json_type(doc, '{path}') = 'text'"
+    if isinstance(value, datetime):
+        return (value - EPOCH) // timedelta(milliseconds=1), f"json_type(doc, '{path}.\"$date\"') = 'integer'"
+    raise ValueError
+
+def id_range_operand(value) -> str:
+    """Range bound on _id - only ObjectIds, whose hex keys sort like the ObjectIds themselves"""
+    value = normalize(value)
+    if not isinstance(value, ObjectId):
+        raise ValueError
+    return id_key(value)
+
+def translate(query: Dict[str, Any], array_fields=frozenset()) -> Tuple[List[str], List[Any], bool]:
+    """Translate a filter to SQL where possible.
+
+    Returns (clauses, params, complete). Untranslatable parts are dropped, which
+    only widens the candidate set, so incomplete translations are re-checked in
+    Python. Dotted paths and fields that have held arrays are never pushed down -
+    MongoDB matches those element-wise.
+    """
+    clauses, params, complete = [], [], True
+    for key, condition in (query or {}).items():
+        if key in ("$and", "$or"):
+            parts = [translate(q, array_fields) for q in condition]
+            complete = complete and all(part[2] for part in parts)
+            joiner = " AND " if key == "$and" else " OR "
+            if key == "$or" and any(not part[0] for part in parts):
+                continue  # An unconstrained branch makes the whole $or unconstrained
+            sql = joiner.join("(" + " AND ".join(part[0] or ["1"]) + ")" for part in parts)
+            if sql:
+                clauses.append(f"({sql})")
+                for part in parts:
+                    params.extend(part[1])
+            continue
+        if key.startswith("$") or "." in key or key in array_fields:
+            complete = False
+            continue
+        field = field_sql(key)
+        ops = condition if is_operators(condition) else {"$in": [condition]}
+        for op, operand in ops.items():
+            try:
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    sign = dict(gt='>', gte='>=', lt='<', lte='<=')[op[1:]]
+                    if key == "_id":
+                        params.append(id_range_operand(operand))
+                        clauses.append(f"_id {sign} ?")
+                    else:
+                        param, guard = sql_operand(key, operand)
+                        params.append(param)
+                        clauses.append(f"{field} {sign} ? AND {guard}")
+                elif op == "$in" and isinstance(operand, (list, tuple)):
+                    # One IN list per type guard, so 1 never matches true or a date; null also matches missing
+                    if None in operand and key == "_id":
+                        raise ValueError
+                    groups: Dict[Optional[str], List[Any]] = {}
+                    for value in operand:
+                        if value is not None:
+                            param, guard = sql_operand(key, value)
+                            groups.setdefault(guard, []).append(param)
+                    terms = [f"{field} IS NULL"] if None in operand else []
+                    for guard, values in groups.items():
+                        params.extend(values)
+                        terms.append(f"{field} IN ({', '.join('?' * len(values))})" + (f" AND {guard}" if guard else ""))
+                    if len(terms) > 1:
+                        clauses.append("(" + " OR ".join(f"({term})" for term in terms) + ")")
+                    else:
+                        clauses.append(terms[0] if terms else "0")
+                else:
+                    complete = False
+            except ValueError:
+                complete = False
+    return clauses, params, complete
+
+class SQLiteCollection(EmbeddedCollection):
+    @property
+    def table(self) -> str:
+        return quote(f"{self.database.name}.{self.name}")
+
+    def scan(self, query, sort, skip=0, limit=0):
+        return list(self.iterate(query, sort, skip, limit))
+
+    def iterate(self, query, sort, skip=0, limit=0):
+        # Rows stream from the SQLite cursor unless the sort has to happen in Python
+        if not self.database.has_collection(self.name):
+            return iter([])
+        array_fields = self.database.array_fields(self.name)
+        clauses, params, complete = translate(query or {}, array_fields)
+        sql = f"SELECT doc FROM {self.table}" + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+        conn = self.database.conn
+        if complete and all(self.database.orderable(self.name, field) for field, _ in sort):
+            order = [f"{field_sql(field)} {'DESC' if direction < 0 else 'ASC'}" for field, direction in sort]
+            sql += " ORDER BY " + ", ".join(order + ["rowid"])
+            if limit or skip:
+                sql += " LIMIT ? OFFSET ?"
+                params = params + [limit or -1, skip]
+            return (loads_doc(row[0]) for row in conn.execute(sql, params))
+        test = compile_query(query)
+        docs = (doc for doc in (loads_doc(row[0]) for row in conn.execute(sql + " ORDER BY rowid", params))
+                if test(doc))
+        if sort:
+            docs = list(docs)
+            sort_docs(docs, sort)
+            return iter(docs[skip:skip + limit] if limit else docs[skip:])
+        return itertools.islice(docs, skip, skip + limit if limit else None)
+
+    def count(self, query) -> int:
+        clauses, params, complete = translate(query or {}, self.database.array_fields(self.name))
+        if not complete:
+            return super().count(query)
+        if not self.database.has_collection(self.name):
+            return 0
+        sql = f"SELECT count(*) FROM {self.table}" + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+        return self.database.conn.execute(sql, params).fetchone()[0]
+
+    def execute(self, sql: str, params):
+        try:
+            self.database.conn.execute(sql, params)
+        except sqlite3.IntegrityError as e:
+            index = self.database.index_name(str(e))
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.database.name}.{self.name} index: {index}", 11000)
+
+    def insert(self, doc):
+        self.database.ensure_collection(self.name)
+        self.database.note_fields(self.name, doc)
+        self.execute(f"INSERT INTO {self.table} (_id, doc) VALUES (?, ?)", (id_key(doc["_id"]), dumps_doc(doc)))
+
+    def replace(self, doc):
+        self.database.note_fields(self.name, doc)
+        self.execute(f"UPDATE {self.table} SET doc = ? WHERE _id = ?", (dumps_doc(doc), id_key(doc["_id"])))
+
+    def remove(self, doc_id):
+        self.database.conn.execute(f"DELETE FROM {self.table} WHERE _id = ?", (id_key(doc_id),))
+
+class SQLiteDatabase(EmbeddedDatabase):
+    """Collections are tables named "<database>.<collection>" with an _id key and a JSON doc column"""
+
+    collection_class = SQLiteCollection
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.client.conn
+
+    def table(self, collection: str) -> str:
+        return quote(f"{self.name}.{collection}")
+
+    def transaction(self):
+        return self.client.transaction()
+
+    def has_collection(self, name: str) -> bool:
+        return (self.name, name) in self.client.tables
+
+    def ensure_collection(self, name: str):
+        if not self.has_collection(name):
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table(name)} "
+                              f"(_id TEXT NOT NULL UNIQUE, doc TEXT NOT NULL)")
+            self.client.tables.add((self.name, name))
+
+    def indexes(self, collection: str) -> Dict[str, Dict[str, Any]]:
+        indexes = {}
+        for name, spec in self.conn.execute("SELECT name, spec FROM _indexes WHERE db = ? AND collection = ?",
+                                            (self.name, collection)):
+            spec = loads_doc(spec)
+            indexes[name] = {**spec, "key": [tuple(k) for k in spec["key"]]}
+        return indexes
+
+    def array_fields(self, collection: str) -> frozenset:
+        return self.client.array_fields.get((self.name, collection), frozenset())
+
+    def field_types(self, collection: str, field: str) -> frozenset:
+        """BSON type ranks a top-level field holds - read from the table once, then kept current by note_fields()"""
+        known = self.client.field_types.setdefault((self.name, collection), {})
+        if field not in known:
+            known[field] = frozenset()
+            if self.has_collection(collection):
+                rows = self.conn.execute(f"SELECT DISTINCT {type_sql(field)} FROM {self.table(collection)}")
+                known[field] = frozenset(rank for (rank,) in rows)
+        return known[field]
+
+    def orderable(self, collection: str, field: str) -> bool:
+        """Whether ORDER BY on a field gives MongoDB's order.
+
+        SQLite sorts booleans and dates (as epoch milliseconds) among numbers, and
+        documents as JSON text, so only fields holding a single scalar type besides
+        null are sorted in SQL; _id keys only sort like the values for ObjectIds.
+        """
+        if "." in field or field in self.array_fields(collection):
+            return False
+        types = self.field_types(collection, field) - {1}
+        return len(types) <= 1 and types <= ({7} if field == "_id" else {2, 3, 8, 9})
+
+    def note_fields(self, collection: str, doc: Dict[str, Any]):
+        """Remember top-level fields holding arrays so filters on them stay out of SQL, and new field types"""
+        types = self.client.field_types.get((self.name, collection), {})
+        known = self.array_fields(collection)
+        for field, value in doc.items():
+            if field in types and type_rank(value) not in types[field]:
+                types[field] = types[field] | {type_rank(value)}
+            if isinstance(value, list) and field not in known:
+                self.conn.execute("INSERT OR IGNORE INTO _array_fields (db, collection, field) VALUES (?, ?, ?)",
+                                  (self.name, collection, field))
+                known = self.client.array_fields[(self.name, collection)] = known | {field}
+
+    def index_name(self, message: str) -> str:
+        """Map an SQLite constraint error back to the Mongo index name"""
+        match = re.search(r"index '([^']+)'", message)
+        if match:
+            row = self.conn.execute("SELECT name FROM _indexes WHERE sql_name = ?", (match.group(1),)).fetchone()
+            if row:
+                return row[0]
+        return "_id_"
+
+    def create_index(self, collection: str, name: str, spec: Dict[str, Any]):
+        self.ensure_collection(collection)
+        sql_name = None
+        fields = spec["key"]
+        # TTL and partial indexes are enforced in Python; dotted paths may cross arrays
+        if not spec.get("partialFilterExpression") and all("." not in field for field, _ in fields):
+            sql_name = f"ix_{uuid.uuid4().hex}"
+            columns = ", ".join(f"{field_sql(f)} {'DESC' if d == -1 else 'ASC'}" for f, d in fields)
+            try:
+                self.conn.execute(f"CREATE {'UNIQUE ' if spec.get('unique') else ''}INDEX {quote(sql_name)} "
+                                  f"ON {self.table(collection)} ({columns})")
+            except sqlite3.IntegrityError:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name}.{collection} "
+                                        f"index: {name}", 11000)
+        self.conn.execute("INSERT INTO _indexes (db, collection, name, spec, sql_name) VALUES (?, ?, ?, ?, ?)",
+                          (self.name, collection, name, dumps_doc(spec), sql_name))
+
+    def drop_index(self, collection: str, name: str):
+        row = self.conn.execute("SELECT sql_name FROM _indexes WHERE db = ? AND collection = ? AND name = ?",
+                                (self.name, collection, name)).fetchone()
+        with self.transaction():
+            if row and row[0]:
+                self.conn.execute(f"DROP INDEX IF EXISTS {quote(row[0])}")
+            self.conn.execute("DELETE FROM _indexes WHERE db = ? AND collection = ? AND name = ?",
+                              (self.name, collection, name))
+
+    def drop_collection_now(self, name: str):
+        with self.transaction():
+            self.conn.execute(f"DROP TABLE IF EXISTS {self.table(name)}")
+            self.conn.execute("DELETE FROM _indexes WHERE db = ? AND collection = ?", (self.name, name))
+            self.conn.execute("DELETE FROM _array_fields WHERE db = ? AND collection = ?", (self.name, name))
+        self.client.tables.discard((self.name, name))
+        self.client.array_fields.pop((self.name, name), None)
+        self.client.field_types.pop((self.name, name), None)
+
+    def rename_collection(self, name: str, new_name: str, drop_target: bool):
+        """Atomic: the drop and rename commit together, so readers see the old or new table"""
+        if self.has_collection(new_name) and not drop_target:
+            raise OperationFailure("target namespace exists", code=48)
+        self.ensure_collection(name)
+        with self.transaction():
+            self.conn.execute(f"DROP TABLE IF EXISTS {self.table(new_name)}")
+            self.conn.execute("DELETE FROM _indexes WHERE db = ? AND collection = ?", (self.name, new_name))
+            self.conn.execute(f"ALTER TABLE {self.table(name)} RENAME TO {self.table(new_name)}")
+            self.conn.execute("DELETE FROM _array_fields WHERE db = ? AND collection = ?", (self.name, new_name))
+            for table in ("_indexes", "_array_fields"):
+                self.conn.execute(f"UPDATE {table} SET collection = ? WHERE db = ? AND collection = ?",
+                                  (new_name, self.name, name))
+        self.client.tables.discard((self.name, name))
+        self.client.tables.add((self.name, new_name))
+        self.client.array_fields[(self.name, new_name)] = self.client.array_fields.pop((self.name, name), frozenset())
+        self.client.field_types[(self.name, new_name)] = self.client.field_types.pop((self.name, name), {})
+
+class SQLiteClient(EmbeddedClient):
+    """One SQLite file in WAL mode holding every database and collection"""
+
+    database_class = SQLiteDatabase
+
+    def __init__(self, path: str):
+        super().__init__()
+        # Every statement runs on this one thread, so transactions never interleave
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _indexes (db TEXT NOT NULL, collection TEXT NOT NULL, "
+                          "name TEXT NOT NULL, spec TEXT NOT NULL, sql_name TEXT, PRIMARY KEY (db, collection, name))")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _array_fields (db TEXT NOT NULL, collection TEXT NOT NULL, "
+                          "field TEXT NOT NULL, PRIMARY KEY (db, collection, field))")
+        self.array_fields: Dict[Tuple[str, str], frozenset] = {}
+        for db_name, collection, field in self.conn.execute("SELECT db, collection, field FROM _array_fields"):
+            key = (db_name, collection)
+            self.array_fields[key] = self.array_fields.get(key, frozenset()) | {field}
+        self.field_types: Dict[Tuple[str, str], Dict[str, frozenset]] = {}  # Filled in lazily, see field_types()
+        self.tables = set()
+        for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%.%'"):
+            self.tables.add(tuple(table.split(".", 1)))
+        self._depth = 0
+
+    def transaction(self):
+        return _SQLiteTransaction(self)
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.conn.close()
+
+class _SQLiteTransaction:
+    """Re-entrant BEGIN/COMMIT - nested blocks join the outermost transaction"""
+
+    def __init__(self, client: SQLiteClient):
+        self.client = client
+
+    def __enter__(self):
+        if self.client._depth == 0:
+            self.client.conn.execute("BEGIN")
+        self.client._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.client._depth -= 1
+        if self.client._depth == 0:
+            self.client.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+def create_client(backend: str, sqlite_path: Optional[str] = None) -> EmbeddedClient:
+    if backend == "memory":
+        return MemoryClient()
+    if backend == "sqlite":
+        return SQLiteClient(sqlite_path)
+    raise ValueError(f"Unknown storage backend: {backend}")
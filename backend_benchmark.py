@@ -0,0 +1,375 @@
+"""
+Backend benchmarks for the meme token tracker.
+
+Benchmarks write to a scratch MongoDB database - never point BENCH_DB_NAME at real data:
+
+    MONGO_URL=mongodb://localhost:27017 BENCH_DB_NAME=tracker_bench python backend_benchmark.py [name ...]
+
+The storage benchmark also runs the embedded engines (STORAGE_BACKEND=sqlite / memory)
+and skips MongoDB when no server answers at MONGO_URL.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from motor.motor_asyncio import AsyncIOMotorClient
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ['DB_NAME'] = os.environ.get('BENCH_DB_NAME', 'tracker_bench')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import server  # noqa: E402
+import storage  # noqa: E402
+
+def make_state(accounts=200, name_alerts=50000, ca_alerts=20000):
+    """Synthetic app state shaped like the real collections"""
+    now = datetime.now(timezone.utc)
+    usernames = [f"bench_user_{i}" for i in range(accounts)]
+    return {
+        "accounts": [server.TwitterAccount(username=u).dict() for u in usernames],
+        "name_alerts": [
+            server.NameAlert(
+                token_name=f"TKN{i}",
+                first_seen=now - timedelta(seconds=i),
+                quorum_count=3,
+                accounts=[{"username": usernames[(i + j) % accounts], "tweet_id": str(uuid.uuid4()),
+                           "tweet_url": "https://twitter.com/x/status/1"} for j in range(3)]
+            ).dict()
+            for i in range(name_alerts)
+        ],
+        "ca_alerts": [
+            server.CAAlert(
+                contract_address=f"bench{i:039d}",
+                token_name=f"TKN{i}",
+                first_seen=now - timedelta(seconds=i),
+                pump_fun_url="https://pump.fun/x",
+                solscan_url="https://solscan.io/account/x",
+                account_username=usernames[i % accounts],
+                tweet_id=str(i),
+                tweet_url="https://twitter.com/x/status/1"
+            ).dict()
+            for i in range(ca_alerts)
+        ],
+        "blacklist": [],
+        "settings": server.AppSettings().dict(),
+    }
+
+async def load_state(state):
+    for key, collection in server.SNAPSHOT_COLLECTIONS.items():
+        await server.db[collection].drop()
+        if state[key]:
+            await server.db[collection].insert_many([dict(doc) for doc in state[key]])
+
+async def legacy_restore(snapshot):
+    """The original delete-then-insert restore, kept for comparison"""
+    for key, collection in server.SNAPSHOT_COLLECTIONS.items():
+        await server.db[collection].delete_many({})
+    for key, collection in server.SNAPSHOT_COLLECTIONS.items():
+        if snapshot.get(key):
+            await server.db[collection].insert_many(snapshot[key])
+
+async def watch_counts(collection, seen, stop):
+    """Record every document count a concurrent reader observes"""
+    while not stop.is_set():
+        seen.add(await collection.count_documents({}))
+        await asyncio.sleep(0)
+
+async def bench_restore():
+    """Restore time and observed partial states: legacy delete/insert vs staging + rename"""
+    current = make_state(name_alerts=10000, ca_alerts=5000)
+    snapshot = make_state()
+    expected = {len(current["name_alerts"]), len(snapshot["name_alerts"])}
+
+    for label, restore in (("legacy delete/insert", legacy_restore), ("staging + rename", server.restore_snapshot)):
+        await load_state(current)
+        copy = {key: [dict(doc) for doc in value] if isinstance(value, list) else value
+                for key, value in snapshot.items()}
+
+        seen, stop = set(), asyncio.Event()
+        reader = asyncio.create_task(watch_counts(server.db.name_alerts, seen, stop))
+        started = time.perf_counter()
+        await restore(copy)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await reader
+
+        partial = sorted(seen - expected)
+        print(f"  {label:<22} {elapsed:7.2f}s  partial states observed: "
+              f"{len(partial)}{f' (e.g. {partial[:3]})' if partial else ''}")
+
+    await server.client.drop_database(os.environ['DB_NAME'])
+
+def legacy_listing_body(docs):
+    """The original listing path: recursive ObjectId conversion, then FastAPI's encoder + json"""
+    def convert_objectid(obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        elif isinstance(obj, dict):
+            return {k: convert_objectid(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [convert_objectid(v) for v in obj]
+        else:
+            return obj
+    return JSONResponse(jsonable_encoder(convert_objectid(docs))).body
+
+async def bench_serialization():
+    """Listing response serialization at 10k documents: convert_objectid + json vs orjson"""
+    docs = [dict(doc, _id=ObjectId()) for doc in make_state(name_alerts=10000, ca_alerts=0)["name_alerts"]]
+    rounds = 5
+
+    for label, render in (("convert_objectid + json", legacy_listing_body),
+                          ("orjson MongoJSONResponse", lambda d: server.MongoJSONResponse(d).body)):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            body = render(docs)
+        elapsed = (time.perf_counter() - started) / rounds
+        print(f"  {label:<26} {elapsed * 1000:8.1f} ms/response  ({len(body) / 1024:.0f} KiB)")
+
+async def use_storage(client):
+    """Point the server module at another storage client with fresh in-memory state"""
+    server.client = client
+    server.db = client[os.environ['DB_NAME']]
+    server.alert_store.reset()
+    server.quorum_window.mentions.clear()
+    server.quorum_window.expiry.clear()
+    server.quorum_window.dirty.clear()
+    server.dashboard_counters.invalidate()
+    await server.settings_cache.refresh()
+    await server.ensure_indexes()
+
+async def storage_clients(tmpdir):
+    yield "memory", storage.MemoryClient()
+    yield "sqlite (WAL)", storage.SQLiteClient(os.path.join(tmpdir, "bench.db"))
+    mongo = AsyncIOMotorClient(os.environ['MONGO_URL'], serverSelectionTimeoutMS=1000)
+    try:
+        await mongo.admin.command("ping")
+    except Exception as e:
+        print(f"  {'mongo':<14} skipped - no server at {os.environ['MONGO_URL']} ({type(e).__name__})")
+        return
+    yield "mongo", mongo
+
+async def bench_storage(alerts=500):
+    """End-to-end alert latency per storage backend: tweet handler call to broadcast (network lookups stubbed)"""
+    async def no_pump_fun_match(token_name):
+        return None
+
+    async def always_new(contract_address):
+        return True
+
+    server.search_pump_fun_token = no_pump_fun_match
+    server.is_new_token = always_new
+    quorum = server.AppSettings().min_quorum_threshold
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        async for label, client in storage_clients(tmpdir):
+            await client.drop_database(os.environ['DB_NAME'])
+            await use_storage(client)
+            latencies = {"ca_alert": [], "name_alert": [], "name_alert_update": []}
+            for i in range(alerts):
+                started = time.perf_counter()
+                await server.process_ca_alert(f"bench{i:039d}", "bench_user_0", str(i), "https://x.com/x/status/1",
+                                              f"$TKN{i} just launched")
+                latencies["ca_alert"].append(time.perf_counter() - started)
+                for j in range(quorum + 1):
+                    started = time.perf_counter()
+                    await server.process_name_alert(f"TKN{i}", f"bench_user_{j}", f"{i}-{j}", "https://x.com/x/status/1")
+                    if j == quorum - 1:
+                        latencies["name_alert"].append(time.perf_counter() - started)
+                    elif j == quorum:
+                        latencies["name_alert_update"].append(time.perf_counter() - started)
+            await server.alert_store.flush()
+            await client.drop_database(os.environ['DB_NAME'])
+            client.close()
+
+            print(f"  {label:<14} " + "  ".join(
+                f"{kind} p50 {statistics.median(values) * 1000:6.3f} ms / p99 "
+                f"{statistics.quantiles(values, n=100)[98] * 1000:6.3f} ms"
+                for kind, values in latencies.items()))
+
+async def legacy_process_tweet(username, tweet_text, tweet_id):
+    """The original per-tweet handler: each token name, then the contract, one after another"""
+    tweet_url = f"https://twitter.com/{username}/status/{tweet_id}"
+    for token_name in await server.extract_token_names(tweet_text):
+        await server.process_name_alert(token_name, username, tweet_id, tweet_url)
+    contract_address = server.is_pump_fun_contract(tweet_text)
+    if contract_address:
+        await server.process_ca_alert(contract_address, username, tweet_id, tweet_url, tweet_text)
+
+async def bench_tweets(tweets=20, lookup_ms=50):
+    """Per-tweet latency for one CA and three tickers with lookups stubbed at lookup_ms: sequential vs concurrent"""
+    async def slow_pump_fun(token_name):
+        await asyncio.sleep(lookup_ms / 1000)
+        return None
+
+    async def slow_is_new(contract_address):
+        await asyncio.sleep(lookup_ms / 1000)
+        return True
+
+    server.search_pump_fun_token = slow_pump_fun
+    server.is_new_token = slow_is_new
+    monitor = server.TwitterBrowserMonitor()
+    await use_storage(storage.MemoryClient())
+    await server.db.app_settings.replace_one({}, server.AppSettings(min_quorum_threshold=1).dict(), upsert=True)
+    await server.settings_cache.refresh()
+
+    for label, handler in (("sequential", legacy_process_tweet), ("concurrent + keyed locks", monitor.process_tweet_content)):
+        latencies = []
+        for i in range(tweets):
+            contract = server.base58.b58encode(os.urandom(32)).decode()
+            text = f"$AAA $BBB $CCC new launch {contract}"
+            started = time.perf_counter()
+            await handler(f"bench_user_{i}", text, f"{label}-{i}")
+            latencies.append(time.perf_counter() - started)
+        print(f"  {label:<26} p50 {statistics.median(latencies) * 1000:7.1f} ms/tweet")
+    server.client.close()
+
+def ticker(i):
+    """A distinct $TICKER per i, so flood tweets don't queue on each other's keyed locks"""
+    letters = ""
+    while True:
+        i, digit = divmod(i, 26)
+        letters += chr(65 + digit)
+        if not i:
+            return f"$SP{letters}"
+
+async def bench_lanes(spam_tweets=400, ca_tweets=20, lookup_ms=50):
+    """CA alert latency during a ticker flood: one shared lookup pool vs priority lanes (lookups stubbed at lookup_ms)"""
+    pools = {}
+
+    async def slow_pump_fun(token_name):
+        async with pools["name"]:
+            await asyncio.sleep(lookup_ms / 1000)
+        return None
+
+    async def slow_is_new(contract_address):
+        async with pools["ca"]:
+            await asyncio.sleep(lookup_ms / 1000)
+        return True
+
+    server.search_pump_fun_token = slow_pump_fun
+    server.is_new_token = slow_is_new
+    monitor = server.TwitterBrowserMonitor()
+
+    for label, lanes in (("shared pool", False), ("priority lanes", True)):
+        await use_storage(storage.MemoryClient())
+        await server.db.app_settings.replace_one({}, server.AppSettings(min_quorum_threshold=1).dict(), upsert=True)
+        await server.settings_cache.refresh()
+        if lanes:
+            pools = {"ca": asyncio.Semaphore(server.CA_HTTP_CONNECTIONS),
+                     "name": asyncio.Semaphore(server.NAME_HTTP_CONNECTIONS)}
+            server.alert_lanes.start()
+        else:
+            shared = asyncio.Semaphore(server.CA_HTTP_CONNECTIONS + server.NAME_HTTP_CONNECTIONS)
+            pools = {"ca": shared, "name": shared}
+
+        flood = [asyncio.create_task(monitor.process_tweet_content(f"spammer_{i}", f"{ticker(i)} to the moon", f"spam-{i}"))
+                 for i in range(spam_tweets)]
+        await asyncio.sleep(0)
+        latencies = []
+        for i in range(ca_tweets):
+            contract = server.base58.b58encode(os.urandom(32)).decode()
+            started = time.perf_counter()
+            await monitor.process_tweet_content("caller", f"new launch {contract}", f"ca-{i}")
+            latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        await asyncio.gather(*flood)
+        drained = time.perf_counter() - started
+
+        if lanes:
+            await server.alert_lanes.stop()
+        server.client.close()
+        print(f"  {label:<16} CA alert p50 {statistics.median(latencies) * 1000:7.1f} ms / max "
+              f"{max(latencies) * 1000:7.1f} ms  (flood drained {drained:.1f}s after the last CA)")
+
+async def bench_backfill(accounts=200, tweets_per_account=200, fetch_seconds=0.25):
+    """Backfill of 200 accounts x 200 tweets, browser fetch stubbed at fetch_seconds per timeline"""
+    now = datetime.now(timezone.utc)
+    tickers = [ticker(i) for i in range(50)]
+
+    def fake_timeline(username, max_tweets, since):
+        time.sleep(fetch_seconds)
+        i = int(username.rsplit("_", 1)[1])
+        return [{"tweet_id": f"{i}-{j}", "tweet_url": f"https://x.com/{username}/status/{j}",
+                 "text": f"{tickers[(i + j) % len(tickers)]} looks early",
+                 "created_at": now - timedelta(minutes=j * 7 + i % 13)}
+                for j in range(max_tweets)]
+
+    async def always_new(contract_address, at=None):
+        return True
+
+    server.browser_monitor.fetch_timeline = fake_timeline
+    server.is_new_token = always_new
+    await use_storage(storage.MemoryClient())
+    usernames = [f"bench_user_{i}" for i in range(accounts)]
+    await server.db.twitter_accounts.insert_many([server.TwitterAccount(username=u).dict() for u in usernames])
+
+    started = time.perf_counter()
+    job = server.BackfillJob(usernames, tweets_per_account, None)
+    await job.run()
+    elapsed = time.perf_counter() - started
+    state = job.state
+    print(f"  {server.BACKFILL_WORKERS} workers: {elapsed:6.1f}s for {state['tweets']} tweets "
+          f"({state['tweets'] / elapsed:,.0f} tweets/s, {state['name_alerts']} name alerts) - "
+          f"fetching one account at a time would take {accounts * fetch_seconds:.0f}s of browser time alone")
+    server.client.close()
+
+async def bench_trending(mentions=200000, tokens=50000, db_mentions=5000):
+    """Trending detection over a skewed 200k-mention stream: sketch cost and top-10 accuracy vs per-mention upserts"""
+    import random
+    random.seed(7)
+    weights = [1 / (rank + 1) for rank in range(tokens)]  # Zipf-like: a few hot tickers, a long tail of one-offs
+    stream = [f"T{rank}" for rank in random.choices(range(tokens), weights, k=mentions)]
+    detector = server.TrendingTokens(60, 15, server.TRENDING_SKETCH_WIDTH, server.TRENDING_SKETCH_DEPTH,
+                                     server.TRENDING_TOP_K, server.TRENDING_SPIKE_MIN_MENTIONS,
+                                     server.TRENDING_SPIKE_RATIO)
+    now = time.time()
+    started = time.perf_counter()
+    for token in stream:
+        detector.record(token, now)
+    sketch_us = (time.perf_counter() - started) / mentions * 1e6
+
+    exact = {}
+    for token in stream:
+        exact[token] = exact.get(token, 0) + 1
+    true_top = sorted(exact, key=exact.get, reverse=True)[:10]
+    found_top = [row["token_name"] for row in sorted(detector.trending(now), key=lambda row: -row["mentions"])[:10]]
+
+    await use_storage(storage.MemoryClient())
+    await server.db.token_mentions.create_index("token_name", unique=True)
+    started = time.perf_counter()
+    for token in stream[:db_mentions]:
+        await server.db.token_mentions.update_one({"token_name": token}, {"$inc": {"mentions": 1}}, upsert=True)
+    upsert_us = (time.perf_counter() - started) / db_mentions * 1e6
+    documents = await server.db.token_mentions.count_documents({})
+    server.client.close()
+
+    print(f"  sketch   {sketch_us:7.1f} us/mention, {detector.stats()['sketch_bytes'] / 1024:,.0f} KiB fixed, "
+          f"top-10 recall {len(set(true_top) & set(found_top))}/10 over {len(exact):,} distinct tokens")
+    print(f"  upserts  {upsert_us:7.1f} us/mention (indexed embedded store, no network), "
+          f"{documents:,} documents after only {db_mentions:,} mentions")
+
+BENCHMARKS = {
+    "restore": bench_restore,
+    "serialization": bench_serialization,
+    "storage": bench_storage,
+    "tweets": bench_tweets,
+    "lanes": bench_lanes,
+    "backfill": bench_backfill,
+    "trending": bench_trending,
+}
+
+async def main(names):
+    for name in names or BENCHMARKS:
+        print(f"\n⏱️  {name}: {BENCHMARKS[name].__doc__}")
+        await BENCHMARKS[name]()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -87,10 +87,89 @@ class MemeTokenTrackerTester:
         """Test getting settings"""
         return self.run_test("Get Settings", "GET", "settings")
 
+    def test_websocket_stats(self):
+        """Test WebSocket fan-out metrics"""
+        return self.run_test("WebSocket Stats", "GET", "ws/stats")
+
+    def test_updates(self):
+        """Test the delta updates endpoint: a reset first, then an empty delta from its cursor"""
+        success, first = self.run_test("Updates (reset)", "GET", "updates")
+        if not success:
+            return False
+        success = first.get("reset") is True and "stats" in first
+        try:
+            response = requests.get(f"{self.api_url}/updates", params={"since": first["cursor"]}, timeout=10)
+            delta = response.json()
+            success = success and response.status_code == 200 and delta.get("reset") is False
+            details = f"Status: {response.status_code}, Cursor: {delta.get('cursor')}"
+        except Exception as e:
+            success, details = False, f"Exception: {str(e)}"
+        self.log_test("Updates (delta)", success, details)
+        return success
+
+    def test_conditional_get(self):
+        """Test ETag revalidation on a cached listing"""
+        try:
+            url = f"{self.api_url}/accounts"
+            first = requests.get(url, timeout=10)
+            etag = first.headers.get("ETag")
+            second = requests.get(url, headers={"If-None-Match": etag or ""}, timeout=10)
+            
+            success = bool(etag) and second.status_code == 304 and not second.content
+            details = f"ETag: {etag}, Revalidation status: {second.status_code}"
+            
+            self.log_test("Conditional GET (304)", success, details)
+            return success
+            
+        except Exception as e:
+            self.log_test("Conditional GET (304)", False, f"Exception: {str(e)}")
+            return False
+
+    def test_monitoring_status(self):
+        """Test the live monitoring status endpoint"""
+        success, status = self.run_test("Monitoring Status", "GET", "monitoring/status")
+        if success and not {"active", "desired", "states", "accounts"} <= set(status):
+            self.log_test("Monitoring Status (shape)", False, f"Keys: {sorted(status)}")
+            return False
+        return success
+
+    def test_account_leaderboard(self):
+        """Test the account performance leaderboard"""
+        success, leaderboard = self.run_test("Account Leaderboard", "GET", "accounts/leaderboard?sort=median_lead_seconds")
+        if success and any(entry.get("rank") != i for i, entry in enumerate(leaderboard, 1)):
+            self.log_test("Account Leaderboard (ranks)", False, "Ranks are not 1..n")
+            return False
+        return success and self.run_test("Account Leaderboard (bad sort)", "GET", "accounts/leaderboard?sort=bogus", 400)[0]
+
+    def test_trending(self):
+        """Test the trending tokens endpoint"""
+        success, trending = self.run_test("Trending Tokens", "GET", "trending")
+        if success and not isinstance(trending.get("tokens"), list):
+            self.log_test("Trending Tokens (shape)", False, f"Keys: {sorted(trending)}")
+            return False
+        return success
+
     def test_export_data(self):
         """Test data export"""
         return self.run_test("Export Data", "GET", "export")
 
+    def test_export_data_stream(self):
+        """Test streaming NDJSON export"""
+        try:
+            url = f"{self.api_url}/export/stream?collections=accounts,ca_alerts"
+            response = requests.get(url, timeout=10)
+            
+            lines = response.text.splitlines()
+            success = response.status_code == 200 and bool(lines) and json.loads(lines[0]).get("type") == "export"
+            details = f"Status: {response.status_code}, Lines: {len(lines)}"
+            
+            self.log_test("Export Data Stream", success, details)
+            return success
+            
+        except Exception as e:
+            self.log_test("Export Data Stream", False, f"Exception: {str(e)}")
+            return False
+
     def test_import_accounts(self):
         """Test importing accounts from file"""
         # Create a test file with sample Twitter usernames
@@ -533,7 +612,12 @@ class MemeTokenTrackerTester:
         self.test_get_ca_alerts()
         self.test_get_versions()
         self.test_get_settings()
+        self.test_updates()
+        self.test_conditional_get()
+        self.test_account_leaderboard()
+        self.test_trending()
         self.test_export_data()
+        self.test_export_data_stream()
         
         # File upload test
         print("\n📁 Testing File Upload...")
@@ -542,6 +626,7 @@ class MemeTokenTrackerTester:
         # Monitoring tests
         print("\n🔄 Testing Monitoring Controls...")
         self.test_monitoring_controls()
+        self.test_monitoring_status()
         
         # Version management tests
         print("\n📋 Testing Version Management...")
@@ -570,6 +655,7 @@ class MemeTokenTrackerTester:
         print("\n🔐 Testing Validation Logic...")
         self.test_solana_contract_validation()
         self.test_websocket_endpoint()
+        self.test_websocket_stats()
         
         # Print summary
         print("\n" + "=" * 60)
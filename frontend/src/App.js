@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import './App.css';
 import { Button } from './components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from './components/ui/card';
@@ -16,6 +16,15 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Ask for zlib-compressed binary WebSocket frames when the browser can inflate them
+const WS_ENCODING = typeof DecompressionStream !== 'undefined' ? 'zlib' : 'json';
+
+const decodeFrame = async (data) => {
+  if (typeof data === 'string') return data;
+  const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return new Response(stream).text();
+};
+
 function App() {
   const [accounts, setAccounts] = useState([]);
   const [nameAlerts, setNameAlerts] = useState([]);
@@ -33,6 +42,7 @@ function App() {
     desktop_notifications: true,
     monitoring_enabled: false,
     min_quorum_threshold: 3,
+    quorum_window_minutes: 60,
     max_token_age_minutes: 10
   });
   const [uploadStatus, setUploadStatus] = useState('');
@@ -48,18 +58,24 @@ function App() {
   const [selectedAlert, setSelectedAlert] = useState(null);
   const [showAlertModal, setShowAlertModal] = useState(false);
   const [currentTime, setCurrentTime] = useState(new Date());
+  const lastSeq = useRef(null);  // Position in the server's broadcast stream, for resuming after a reconnect
+  const streamId = useRef(null);
 
   // WebSocket connection
   const connectWebSocket = useCallback(() => {
     // Try WebSocket connection first
-    const wsUrl = `${BACKEND_URL.replace('https', 'wss').replace('http', 'ws')}/api/ws`;
+    const resume = lastSeq.current !== null ? `&last_seq=${lastSeq.current}&stream=${streamId.current}` : '';
+    const wsUrl = `${BACKEND_URL.replace('https', 'wss').replace('http', 'ws')}/api/ws?encoding=${WS_ENCODING}${resume}`;
     console.log('Attempting WebSocket connection to:', wsUrl);
     
     const ws = new WebSocket(wsUrl);
+    ws.binaryType = 'arraybuffer';
+    let frames = Promise.resolve();  // Decompression is async - keep messages in arrival order
     
     ws.onopen = () => {
       console.log('WebSocket connected successfully');
       setConnectionStatus('connected');
+      window.pollingLoop = null;  // Live again - stop the polling fallback
       setWebsocket(ws);
       
       // Send a ping to test connection
@@ -67,20 +83,53 @@ function App() {
     };
     
     ws.onmessage = (event) => {
+      frames = frames.then(() => handleFrame(event.data));
+    };
+    
+    const handleFrame = async (data) => {
       try {
-        const message = JSON.parse(event.data);
+        const message = JSON.parse(await decodeFrame(data));
         console.log('WebSocket message received:', message);
         
         if (message.type === 'connection' && message.status === 'connected') {
           console.log('WebSocket connection confirmed by server');
+          if (lastSeq.current === null) {
+            streamId.current = message.stream;
+            lastSeq.current = message.seq;
+          }
+          return;
+        }
+        
+        if (message.type === 'resync') {
+          // Missed more than the server kept - reload the lists once
+          console.log('WebSocket gap too large to replay, reloading alerts');
+          streamId.current = message.stream;
+          lastSeq.current = message.seq;
+          fetchNameAlerts();
+          fetchCaAlerts();
+          fetchStats();
           return;
         }
         
+        if (message.seq !== undefined) {
+          lastSeq.current = Math.max(lastSeq.current ?? 0, message.seq);
+        }
+        
         if (message.type === 'echo') {
           console.log('WebSocket echo received:', message.message);
           return;
         }
         
+        if (message.type === 'trending_spike') {
+          if (settings.desktop_notifications) {
+            new Notification('📈 Trending Token', {
+              body: `${message.data.token_name} - ${message.data.current} mentions in the last ${message.data.bucket_seconds}s (${message.data.velocity}x)`,
+              icon: '/favicon.ico'
+            });
+          }
+          return;
+        }
+        
         // Handle alert messages
         if (message.type === 'name_alert') {
           setNameAlerts(prev => [message.data, ...prev]);
@@ -140,31 +189,76 @@ function App() {
     };
   }, [settings.desktop_notifications, settings.sound_alerts]);
   
+  // Merge a /updates response into the alert lists
+  const applyUpdates = (update) => {
+    setStats(update.stats);
+    if (update.reset) {
+      // A reset only carries the first page of each list - reload them in full
+      fetchNameAlerts();
+      fetchCaAlerts();
+      return;
+    }
+    if (update.name_alerts.length) {
+      setNameAlerts(prev => {
+        const changed = new Map(update.name_alerts.map(alert => [alert.token_name, alert]));
+        const known = new Set(prev.map(alert => alert.token_name));
+        return [
+          ...update.name_alerts.filter(alert => !known.has(alert.token_name)),
+          ...prev.map(alert => changed.has(alert.token_name) ? { ...alert, ...changed.get(alert.token_name) } : alert)
+        ];
+      });
+    }
+    if (update.ca_alerts.length) {
+      setCaAlerts(prev => {
+        const known = new Set(prev.map(alert => alert.id));
+        return [...update.ca_alerts.filter(alert => !known.has(alert.id)), ...prev];
+      });
+    }
+  };
+
   // Fallback polling mechanism if WebSocket fails
   const startPollingFallback = useCallback(() => {
+    if (window.pollingLoop) {
+      return;
+    }
     console.log('Starting polling fallback for real-time updates');
     setConnectionStatus('polling');
+    const loop = {};  // Identifies this loop - a stop followed by a new start must end it
+    window.pollingLoop = loop;
     
-    const pollInterval = setInterval(async () => {
-      try {
-        // Poll for updates every 10 seconds
-        await fetchStats();
-        await fetchNameAlerts();
-        await fetchCaAlerts();
-      } catch (error) {
-        console.error('Polling error:', error);
+    const poll = async () => {
+      let cursor = null;
+      while (window.pollingLoop === loop) {
+        try {
+          // Long-poll: the server answers as soon as an alert arrives, or after 25 seconds without changes
+          const response = await axios.get(`${API}/updates`, { params: { since: cursor, wait: cursor ? 25 : 0 } });
+          cursor = response.data.cursor;
+          applyUpdates(response.data);
+        } catch (error) {
+          console.error('Polling error:', error);
+          await new Promise(resolve => setTimeout(resolve, 10000));
+        }
       }
-    }, 10000);
-    
-    // Store interval ID for cleanup
-    window.pollingInterval = pollInterval;
+    };
+    poll();
   }, []);
 
   // Fetch data functions
+  // Listings are paginated - follow the cursor to load the full list
+  const fetchAllPages = async (path) => {
+    let items = [];
+    let cursor = null;
+    do {
+      const response = await axios.get(`${API}/${path}`, { params: { limit: 1000, cursor } });
+      items = items.concat(response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return items;
+  };
+
   const fetchAccounts = async () => {
     try {
-      const response = await axios.get(`${API}/accounts`);
-      setAccounts(response.data);
+      setAccounts(await fetchAllPages('accounts'));
     } catch (error) {
       console.error('Error fetching accounts:', error);
     }
@@ -172,8 +266,7 @@ function App() {
 
   const fetchNameAlerts = async () => {
     try {
-      const response = await axios.get(`${API}/alerts/name`);
-      setNameAlerts(response.data);
+      setNameAlerts(await fetchAllPages('alerts/name'));
     } catch (error) {
       console.error('Error fetching name alerts:', error);
     }
@@ -181,8 +274,7 @@ function App() {
 
   const fetchCaAlerts = async () => {
     try {
-      const response = await axios.get(`${API}/alerts/ca`);
-      setCaAlerts(response.data);
+      setCaAlerts(await fetchAllPages('alerts/ca'));
     } catch (error) {
       console.error('Error fetching CA alerts:', error);
     }
@@ -190,8 +282,7 @@ function App() {
 
   const fetchVersions = async () => {
     try {
-      const response = await axios.get(`${API}/versions`);
-      setVersions(response.data);
+      setVersions(await fetchAllPages('versions'));
     } catch (error) {
       console.error('Error fetching versions:', error);
     }
@@ -262,21 +353,12 @@ function App() {
     }
   };
 
-  const exportData = async () => {
-    try {
-      const response = await axios.get(`${API}/export`);
-      const dataStr = JSON.stringify(response.data, null, 2);
-      const dataUri = 'data:application/json;charset=utf-8,'+ encodeURIComponent(dataStr);
-      
-      const exportFileDefaultName = `meme_tracker_export_${new Date().toISOString().split('T')[0]}.json`;
-      
-      const linkElement = document.createElement('a');
-      linkElement.setAttribute('href', dataUri);
-      linkElement.setAttribute('download', exportFileDefaultName);
-      linkElement.click();
-    } catch (error) {
-      console.error('Error exporting data:', error);
-    }
+  const exportData = () => {
+    // Streamed straight to disk by the browser - the export is never held in memory
+    const linkElement = document.createElement('a');
+    linkElement.setAttribute('href', `${API}/export/stream?compress=true`);
+    linkElement.setAttribute('download', '');
+    linkElement.click();
   };
 
   const createVersion = async () => {
@@ -466,9 +548,7 @@ function App() {
       if (websocket) {
         websocket.close();
       }
-      if (window.pollingInterval) {
-        clearInterval(window.pollingInterval);
-      }
+      window.pollingLoop = null;
       clearInterval(clockInterval);
     };
   }, [connectWebSocket]);
@@ -591,6 +671,28 @@ function App() {
                           Only show alerts when {settings.min_quorum_threshold}+ different accounts mention the same meme token
                         </p>
                       </div>
+                      <div>
+                        <Label htmlFor="quorum-window" className="text-sm">
+                          Quorum Window
+                        </Label>
+                        <div className="flex items-center gap-3 mt-2">
+                          <Input
+                            id="quorum-window"
+                            type="number"
+                            min="1"
+                            max="1440"
+                            value={settings.quorum_window_minutes}
+                            onChange={(e) => updateSettings({...settings, quorum_window_minutes: parseInt(e.target.value) || 60})}
+                            className="w-20"
+                          />
+                          <span className={`text-sm ${settings.dark_mode ? 'text-gray-300' : 'text-gray-600'}`}>
+                            minutes
+                          </span>
+                        </div>
+                        <p className={`text-xs mt-1 ${settings.dark_mode ? 'text-gray-400' : 'text-gray-500'}`}>
+                          Mentions older than {settings.quorum_window_minutes} minutes no longer count toward the quorum
+                        </p>
+                      </div>
                     </div>
                   </div>
                 </div>
@@ -1355,7 +1457,7 @@ function App() {
               <CardContent>
                 <div className="space-y-4">
                   <p className={settings.dark_mode ? 'text-gray-300' : 'text-gray-600'}>
-                    Export all alerts, performance data, and account information as JSON.
+                    Export all alerts, performance data, and account information as gzip-compressed NDJSON.
                   </p>
                   <Button onClick={exportData} size="lg">
                     <Download className="w-5 h-5 mr-2" />
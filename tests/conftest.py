@@ -0,0 +1,23 @@
+"""
+Shared setup for the backend tests: server.py imports on the in-memory engine,
+and each test that touches the database gets an empty one.
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("DB_NAME", "test")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import storage  # noqa: E402
+
+@pytest.fixture
+def memory_db(monkeypatch):
+    """A fresh in-memory database in place of server.db"""
+    import server
+    client = storage.create_client("memory")
+    monkeypatch.setattr(server, "db", client["test"])
+    yield client["test"]
+    client.close()
@@ -0,0 +1,79 @@
+"""
+Broadcast sequencing and replay: what a resuming client gets back, and when it
+has to resync instead.
+
+    python -m pytest tests/test_event_log.py
+"""
+import asyncio
+
+import server
+
+def run(coro):
+    return asyncio.run(coro)
+
+def seqs(events):
+    return None if events is None else [event[0]["seq"] for event in events]
+
+def alert(n):
+    return {"type": "ca_alert", "data": {"id": f"a{n}"}}
+
+def test_since_replays_only_what_is_still_buffered():
+    log = server.EventLog(3, persist=False)
+    for n in range(5):
+        log.append(alert(n))
+    assert log.seq == 5 and log.evicted == 2
+    assert seqs(log.since(2, log.stream)) == [3, 4, 5]
+    assert seqs(log.since(4, log.stream)) == [5]
+    assert seqs(log.since(5, log.stream)) == []
+    # Gone from the buffer, ahead of the log, or from another stream: resync
+    assert log.since(1, log.stream) is None
+    assert log.since(6, log.stream) is None
+    assert log.since(4, "other") is None
+
+def test_bus_seqs_are_kept_and_replayed_in_order():
+    log = server.EventLog(10, persist=False)
+    log.append({**alert(1), "seq": 7}, "bus")
+    log.append({**alert(2), "seq": 5}, "bus")  # Another worker's earlier seq arriving late
+    assert log.stream == "bus" and log.seq == 7
+    assert seqs(log.since(0, "bus")) == [5, 7]
+    assert seqs(log.since(5, "bus")) == [7]
+    log.append({**alert(3), "seq": 1}, "restarted")
+    assert log.stream == "restarted" and seqs(log.since(0, "restarted")) == [1]
+
+def test_long_poll_wakes_on_append():
+    async def scenario():
+        log = server.EventLog(10, persist=False)
+        waiter = asyncio.create_task(log.updated.wait())
+        await asyncio.sleep(0)
+        log.append(alert(1))
+        await asyncio.wait_for(waiter, 1)
+    run(scenario())
+
+def test_load_after_restart_resyncs_clients_older_than_the_history(memory_db):
+    async def scenario():
+        before = server.EventLog(3, persist=True)
+        for n in range(6):
+            before.append(alert(n))
+            await before.save()
+        after = server.EventLog(3, persist=True)
+        await after.load()
+        assert after.stream == before.stream
+        assert (after.seq, after.evicted) == (6, 3)
+        assert seqs(after.since(3, after.stream)) == [4, 5, 6]
+        assert after.since(2, after.stream) is None
+        assert after.since(1, after.stream) is None
+    run(scenario())
+
+def test_load_takes_the_newest_stream_only(memory_db):
+    async def scenario():
+        await memory_db.ws_events.insert_many([
+            {"stream": "old", "seq": 90, "message": {**alert(90), "seq": 90}},
+            {"stream": "new", "seq": 4, "message": {**alert(4), "seq": 4}},
+            {"stream": "new", "seq": 5, "message": {**alert(5), "seq": 5}},
+        ])
+        log = server.EventLog(10, persist=True)
+        await log.load()
+        assert (log.stream, log.seq, log.evicted) == ("new", 5, 3)
+        assert seqs(log.since(3, "new")) == [4, 5]
+        assert log.since(2, "new") is None
+    run(scenario())
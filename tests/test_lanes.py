@@ -0,0 +1,108 @@
+"""
+Keyed locks and the prioritized alert lanes: per-key ordering, CA work
+holding off name work, and name work shed beyond the queue bound.
+
+    python -m pytest tests/test_lanes.py
+"""
+import asyncio
+
+import server
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+def test_same_key_runs_in_arrival_order_other_keys_concurrently():
+    async def scenario():
+        locks = server.KeyedLocks()
+        log, running = [], set()
+        peak = [0]
+        async def job(key, name, delay):
+            running.add(name)
+            peak[0] = max(peak[0], len(running))
+            await asyncio.sleep(delay)
+            running.discard(name)
+            log.append(name)
+        await asyncio.gather(
+            locks.run("name:PEPE", job("name:PEPE", "pepe-1", 0.03)),
+            locks.run("name:PEPE", job("name:PEPE", "pepe-2", 0.0)),
+            locks.run("ca:X", job("ca:X", "ca-1", 0.01)),
+            locks.run("name:PEPE", job("name:PEPE", "pepe-3", 0.0)),
+        )
+        assert [name for name in log if name.startswith("pepe")] == ["pepe-1", "pepe-2", "pepe-3"]
+        assert log.index("ca-1") < log.index("pepe-1")  # Not queued behind another key
+        assert peak[0] == 2
+        assert locks.locks == {}
+    run(scenario())
+
+def test_lanes_run_inline_until_started():
+    async def scenario():
+        lanes = server.AlertLanes({"ca": 1, "name": 1}, {"ca": 1, "name": 1}, 4)
+        async def job():
+            return "done"
+        assert await lanes.submit("name", "name:PEPE", job) == "done"
+    run(scenario())
+
+def test_name_work_beyond_the_queue_is_shed():
+    async def scenario():
+        lanes = server.AlertLanes({"ca": 1, "name": 1}, {"ca": 1, "name": 1}, 2)
+        lanes.start()
+        release = asyncio.Event()
+        async def blocked():
+            await release.wait()
+            return "blocked"
+        async def quick():
+            return "quick"
+        first = lanes.submit("name", "name:A", blocked)
+        await settle()  # The worker holds the first job, the queue is empty
+        queued = [lanes.submit("name", f"name:{key}", quick) for key in "BC"]
+        shed = lanes.submit("name", "name:D", quick)
+        assert shed.done() and shed.result() is None
+        assert lanes.stats()["name"]["shed"] == 1
+        release.set()
+        assert await first == "blocked"
+        assert await asyncio.gather(*queued) == ["quick", "quick"]
+        await lanes.stop()
+    run(scenario())
+
+def test_name_workers_hold_off_while_ca_work_is_pending():
+    async def scenario():
+        lanes = server.AlertLanes({"ca": 1, "name": 1}, {"ca": 1, "name": 1}, 10)
+        lanes.start()
+        await settle()
+        release, log = asyncio.Event(), []
+        async def ca_job():
+            await release.wait()
+            log.append("ca")
+        def name_job(name):
+            async def job():
+                log.append(name)
+            return job
+        ca = lanes.submit("ca", "ca:X", ca_job)
+        first = lanes.submit("name", "name:A", name_job("name-1"))  # Already being awaited by the idle worker
+        second = lanes.submit("name", "name:B", name_job("name-2"))
+        await settle()
+        assert log == ["name-1"]
+        release.set()
+        await asyncio.gather(ca, first, second)
+        assert log == ["name-1", "ca", "name-2"]
+        await lanes.stop()
+    run(scenario())
+
+def test_stop_cancels_jobs_no_worker_took():
+    async def scenario():
+        lanes = server.AlertLanes({"ca": 1, "name": 1}, {"ca": 1, "name": 1}, 10)
+        lanes.start()
+        release = asyncio.Event()
+        async def blocked():
+            await release.wait()
+        running = lanes.submit("ca", "ca:X", blocked)
+        await settle()
+        waiting = lanes.submit("ca", "ca:Y", blocked)
+        await lanes.stop()
+        assert running.cancelled() and waiting.cancelled()
+        assert lanes.ca_idle.is_set() and lanes.stats()["ca"]["queued"] == 0
+    run(scenario())
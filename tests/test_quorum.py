@@ -0,0 +1,124 @@
+"""
+Windowed name-alert quorum: the in-memory window, and backfill raising the
+same alerts as live processing.
+
+    python -m pytest tests/test_quorum.py
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+
+T0 = 1_700_000_000.0
+WINDOW = 600
+
+def run(coro):
+    return asyncio.run(coro)
+
+def account(username):
+    return {"username": username, "tweet_id": f"{username}-1", "tweet_url": f"https://x.com/{username}/status/1"}
+
+def test_counts_each_account_once():
+    window = server.QuorumWindow(0)
+    assert window.record("PEPE", account("a"), WINDOW, T0)
+    assert window.record("PEPE", account("b"), WINDOW, T0 + 1)
+    assert not window.record("PEPE", account("a"), WINDOW, T0 + 2)
+    assert window.count("PEPE") == 2
+    assert window.count("BONK") == 0
+
+def test_mentions_leave_the_window():
+    window = server.QuorumWindow(0)
+    window.record("PEPE", account("a"), WINDOW, T0)
+    window.record("PEPE", account("b"), WINDOW, T0 + 300)
+    window.evict(WINDOW, T0 + WINDOW + 1)
+    assert [a["username"] for a in window.accounts("PEPE")] == ["b"]
+    window.evict(WINDOW, T0 + 300 + WINDOW + 1)
+    assert window.count("PEPE") == 0 and "PEPE" not in window.mentions
+
+def test_repeat_mention_keeps_the_account_in_the_window():
+    window = server.QuorumWindow(0)
+    window.record("PEPE", account("a"), WINDOW, T0)
+    window.record("PEPE", account("a"), WINDOW, T0 + 500)
+    # The first mention's expiry entry is superseded, not applied
+    window.evict(WINDOW, T0 + WINDOW + 1)
+    assert window.count("PEPE") == 1
+    window.evict(WINDOW, T0 + 500 + WINDOW + 1)
+    assert window.count("PEPE") == 0
+
+def test_older_backfilled_mention_does_not_move_the_account():
+    window = server.QuorumWindow(0)
+    window.record("PEPE", account("a"), WINDOW, T0 + 100)
+    assert not window.record("PEPE", account("a"), WINDOW, T0 + 50)
+    assert window.mentions["PEPE"]["a"]["seen_at"] == T0 + 100
+
+def test_accounts_are_earliest_first_with_lead():
+    window = server.QuorumWindow(0)
+    window.record("PEPE", account("b"), WINDOW, T0 + 30)
+    window.record("PEPE", account("a"), WINDOW, T0)
+    accounts = window.accounts("PEPE", quorum_at=T0 + 60)
+    assert [(a["username"], a["lead_seconds"]) for a in accounts] == [("a", 60.0), ("b", 30.0)]
+    assert "seen_at" not in accounts[0]
+
+def test_checkpoint_and_load(memory_db):
+    async def scenario():
+        window = server.QuorumWindow(0)
+        window.record("PEPE", account("a"), WINDOW, T0)
+        window.record("PEPE", account("b"), WINDOW, T0 + 10)
+        window.record("BONK", account("a"), WINDOW, T0 + 20)
+        await window.checkpoint()
+        window.evict(WINDOW, T0 + 5 + WINDOW)
+        await window.checkpoint()  # PEPE keeps b, BONK keeps a
+
+        restored = server.QuorumWindow(0)
+        await restored.load()
+        assert {token: sorted(m) for token, m in restored.mentions.items()} == {"PEPE": ["b"], "BONK": ["a"]}
+        restored.evict(WINDOW, T0 + 20 + WINDOW + 1)
+        assert restored.mentions == {}
+    run(scenario())
+
+# (offset seconds, token, username): one episode that grows past quorum, a repeat
+# account, an alert that goes stale and is replaced, and a token that never gets there
+MENTIONS = [
+    (0, "PEPE", "a"), (60, "PEPE", "b"), (90, "BONK", "a"), (120, "PEPE", "a"),
+    (180, "PEPE", "c"), (240, "PEPE", "d"), (250, "PEPE", "b"), (300, "BONK", "b"),
+    (2000, "PEPE", "e"), (2030, "PEPE", "f"), (2060, "PEPE", "a"), (2100, "PEPE", "g"),
+]
+
+def alert_summary(alert):
+    first_seen = alert["first_seen"].replace(tzinfo=None)
+    return (alert["token_name"], first_seen, alert["quorum_count"], alert["is_active"],
+            [(a["username"], a.get("lead_seconds")) for a in alert["accounts"]])
+
+def test_backfill_raises_the_alerts_live_processing_does(memory_db, monkeypatch):
+    clock = [T0]
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock[0], tz)
+    async def no_pump_fun(token_name):
+        return None
+    monkeypatch.setattr(server.time, "time", lambda: clock[0])
+    monkeypatch.setattr(server, "datetime", FrozenDatetime)
+    monkeypatch.setattr(server, "search_pump_fun_token", no_pump_fun)
+    monkeypatch.setattr(server, "quorum_window", server.QuorumWindow(0))
+    monkeypatch.setattr(server.settings_cache, "_settings", {"min_quorum_threshold": 3, "quorum_window_minutes": 10})
+
+    async def live():
+        for offset, token_name, username in MENTIONS:
+            clock[0] = T0 + offset
+            await server.process_name_alert(token_name, username, f"{username}-1",
+                                            f"https://x.com/{username}/status/1")
+        return await memory_db.name_alerts.find({}, {"_id": 0}).sort("first_seen", 1).to_list(None)
+    live_alerts = run(live())
+
+    historical = server.historical_name_alerts(
+        [(datetime.fromtimestamp(T0 + offset, timezone.utc), token_name, account(username))
+         for offset, token_name, username in MENTIONS],
+        min_threshold=3, window_seconds=WINDOW)
+
+    assert [alert_summary(a) for a in historical] == [alert_summary(a) for a in live_alerts]
+    start = datetime.fromtimestamp(T0, timezone.utc).replace(tzinfo=None)
+    assert [alert_summary(a)[1:4] for a in historical] == [
+        (start + timedelta(seconds=180), 4, False),
+        (start + timedelta(seconds=2060), 4, True),
+    ]
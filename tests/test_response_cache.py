@@ -0,0 +1,82 @@
+"""
+Response cache: tag generations, byte-bounded LRU, and the ETag/304 handling
+of cached_response.
+
+    python -m pytest tests/test_response_cache.py
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import server
+
+TAGS = ("name_alerts",)
+
+def test_invalidating_a_tag_turns_its_entries_into_misses():
+    cache = server.ResponseCache(1024)
+    cache.put("/a", cache.generation(TAGS), TAGS, b"[1]", {})
+    cache.put("/b", cache.generation(("ca_alerts",)), ("ca_alerts",), b"[2]", {})
+    assert cache.get("/a", TAGS)[1] == b"[1]"
+    cache.invalidate("name_alerts")
+    assert cache.get("/a", TAGS) is None
+    assert cache.get("/b", ("ca_alerts",))[1] == b"[2]"
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_response_computed_across_an_invalidation_is_not_stored():
+    cache = server.ResponseCache(1024)
+    generation = cache.generation(TAGS)
+    cache.invalidate("name_alerts")  # A write lands while the endpoint runs
+    entry = cache.put("/a", generation, TAGS, b"[1]", {})
+    assert entry[1] == b"[1]" and entry[2].startswith('"')
+    assert cache.get("/a", TAGS) is None and cache.size == 0
+
+def test_least_recently_used_entries_go_first_once_over_budget():
+    cache = server.ResponseCache(10)
+    for key in ("/a", "/b"):
+        cache.put(key, cache.generation(TAGS), TAGS, b"1234", {})
+    cache.get("/a", TAGS)
+    cache.put("/c", cache.generation(TAGS), TAGS, b"1234", {})
+    assert list(cache.entries) == ["/a", "/c"] and cache.size == 8
+    cache.put("/big", cache.generation(TAGS), TAGS, b"x" * 11, {})
+    assert "/big" not in cache.entries
+
+def test_etag_matching():
+    assert server.etag_matches('"abc"', '"abc"')
+    assert server.etag_matches('W/"abc", "def"', '"abc"')
+    assert server.etag_matches("*", '"abc"')
+    assert not server.etag_matches('"def"', '"abc"')
+    assert not server.etag_matches(None, '"abc"')
+
+def test_cached_endpoint_serves_hits_304s_and_recomputes_after_invalidation(monkeypatch):
+    cache = server.ResponseCache(1024)
+    monkeypatch.setattr(server, "response_cache", cache)
+    calls = []
+    app = FastAPI()
+
+    @app.get("/items")
+    @server.cached_response(*TAGS)
+    async def items(limit: int = 2):
+        calls.append(limit)
+        return {"items": list(range(limit)), "version": len(calls)}
+
+    client = TestClient(app)
+    first = client.get("/items")
+    etag = first.headers["etag"]
+    assert first.json() == {"items": [0, 1], "version": 1}
+    assert client.get("/items").json()["version"] == 1
+    assert client.get("/items", params={"limit": 3}).json()["version"] == 2  # Keyed by query
+    assert client.get("/items", headers={"If-None-Match": etag}).status_code == 304
+    assert calls == [2, 3]
+
+    cache.invalidate(*TAGS)
+    refreshed = client.get("/items", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200 and refreshed.json()["version"] == 3
+    assert refreshed.headers["etag"] != etag
+
+def test_control_actions_invalidate_their_tags(monkeypatch):
+    cache = server.ResponseCache(1024)
+    monkeypatch.setattr(server, "response_cache", cache)
+    cache.put("/accounts", cache.generation(("accounts",)), ("accounts",), b"[]", {})
+    cache.put("/versions", cache.generation(("versions",)), ("versions",), b"[]", {})
+    server.apply_control("performance_changed")
+    assert cache.get("/accounts", ("accounts",)) is None
+    assert cache.get("/versions", ("versions",)) is not None
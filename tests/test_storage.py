@@ -0,0 +1,365 @@
+"""
+Embedded storage engines against MongoDB semantics.
+
+Each test runs on the memory and sqlite engines and checks the operators
+server.py relies on against the result MongoDB gives for the same call. With
+TEST_MONGO_URL set, the same tests also run against that MongoDB server.
+
+    python -m pytest tests/test_storage.py
+    TEST_MONGO_URL=mongodb://localhost:27017 python -m pytest tests/test_storage.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from pymongo import InsertOne, MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import storage  # noqa: E402
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+MONGO_URL = os.environ.get("TEST_MONGO_URL")
+ENGINES = ["memory", "sqlite"]
+
+@pytest.fixture(params=ENGINES + [
+    pytest.param("mongo", marks=pytest.mark.skipif(not MONGO_URL, reason="TEST_MONGO_URL is not set"))])
+def db(request, tmp_path):
+    if request.param == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        name = f"storage_test_{uuid.uuid4().hex[:12]}"
+        client = AsyncIOMotorClient(MONGO_URL)
+        yield client[name]
+        client.close()
+        MongoClient(MONGO_URL).drop_database(name)
+        return
+    client = storage.create_client(request.param, str(tmp_path / "test.db"))
+    yield client["test"]
+    client.close()
+
+@pytest.fixture(params=ENGINES)
+def engine_db(request, tmp_path):
+    """Only the embedded engines - for behaviour a MongoDB server has on its own schedule or not at all"""
+    client = storage.create_client(request.param, str(tmp_path / "test.db"))
+    yield client["test"]
+    client.close()
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def ids(cursor):
+    return [doc["_id"] for doc in await cursor.to_list(None)]
+
+MIXED = [
+    {"_id": 1, "v": 5},
+    {"_id": 2, "v": 10.5},
+    {"_id": 3, "v": "abc"},
+    {"_id": 4, "v": NOW},
+    {"_id": 5, "v": True},
+    {"_id": 6, "v": None},
+    {"_id": 7},
+    {"_id": 8, "v": {"n": 1}},
+    {"_id": 9, "v": datetime(1970, 1, 1, 0, 0, 1, tzinfo=timezone.utc)},
+    {"_id": 10, "v": 1000},
+]
+
+@pytest.mark.parametrize("indexed", [False, True])
+@pytest.mark.parametrize("query, expected", [
+    ({"v": {"$gt": 4}}, [1, 2, 10]),
+    ({"v": {"$gte": 5, "$lt": 11}}, [1, 2]),
+    ({"v": {"$lte": 0}}, []),
+    ({"v": {"$gt": ""}}, [3]),
+    ({"v": {"$lt": NOW}}, [9]),
+    ({"v": {"$gte": NOW - timedelta(days=1)}}, [4]),
+    ({"v": 1000}, [10]),
+    ({"v": 1}, []),
+    ({"v": True}, [5]),
+    ({"v": {"$in": [5, "abc", True]}}, [1, 3, 5]),
+    ({"v": {"$in": [1, 1000]}}, [10]),
+    ({"v": None}, [6, 7]),
+    ({"v": {"$in": [None, 5]}}, [1, 6, 7]),
+    ({"v": {"$ne": 5}}, [2, 3, 4, 5, 6, 7, 8, 9, 10]),
+    ({"v": {"$ne": None}}, [1, 2, 3, 4, 5, 8, 9, 10]),
+    ({"v": {"$exists": False}}, [7]),
+    ({"v": {"$exists": True, "$lt": 100}}, [1, 2]),
+    ({"v": {"$gte": None}}, [6, 7]),
+    ({"v": {"$lt": None}}, []),
+    ({"v": {"$gt": {"m": 5}}}, [8]),
+    ({"$or": [{"v": "abc"}, {"_id": {"$in": [1, 2]}}]}, [1, 2, 3]),
+])
+def test_comparisons_stay_within_bson_type(db, indexed, query, expected):
+    async def scenario():
+        await db.items.insert_many([dict(doc) for doc in MIXED])
+        if indexed:
+            await db.items.create_index("v")
+        assert sorted(await ids(db.items.find(query))) == expected
+        assert await db.items.count_documents(query) == len(expected)
+    run(scenario())
+
+ARRAYS = [
+    {"_id": 1, "tags": ["a", "b"]},
+    {"_id": 2, "tags": "a"},
+    {"_id": 3, "tags": []},
+    {"_id": 4, "tags": None},
+    {"_id": 5},
+]
+
+@pytest.mark.parametrize("query, expected", [
+    ({"tags": "a"}, [1, 2]),
+    ({"tags": ["a", "b"]}, [1]),
+    ({"tags": []}, [3]),
+    ({"tags": None}, [4, 5]),
+    ({"tags": {"$ne": "a"}}, [3, 4, 5]),
+    ({"tags": {"$in": ["b", None]}}, [1, 4, 5]),
+    ({"tags": {"$gt": "a"}}, [1]),
+    ({"tags": {"$exists": True}}, [1, 2, 3, 4]),
+])
+def test_array_fields_match_on_any_element(db, query, expected):
+    async def scenario():
+        await db.items.insert_many([dict(doc) for doc in ARRAYS])
+        assert sorted(await ids(db.items.find(query))) == expected
+        assert await db.items.count_documents(query) == len(expected)
+    run(scenario())
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_sort_follows_bson_type_order(db, indexed):
+    async def scenario():
+        await db.items.insert_many([dict(doc) for doc in MIXED])
+        if indexed:
+            await db.items.create_index([("v", 1), ("_id", 1)])
+        # null and missing, numbers, strings, documents, booleans, dates
+        assert await ids(db.items.find({}).sort([("v", 1), ("_id", 1)])) == [6, 7, 1, 2, 10, 3, 8, 5, 9, 4]
+        assert await ids(db.items.find({}).sort([("v", -1), ("_id", 1)])) == [4, 9, 5, 8, 3, 10, 2, 1, 6, 7]
+    run(scenario())
+
+def test_sort_order_holds_once_a_field_changes_type(db):
+    async def scenario():
+        await db.items.create_index("v")
+        await db.items.insert_many([{"_id": i, "v": 10 - i} for i in range(3)])
+        assert await ids(db.items.find({}).sort("v", 1)) == [2, 1, 0]
+        await db.items.insert_many([{"_id": 3, "v": "a"}, {"_id": 4, "v": False}, {"_id": 5, "v": NOW}])
+        assert await ids(db.items.find({}).sort("v", 1)) == [2, 1, 0, 3, 4, 5]
+        assert await ids(db.items.find({}).sort("v", -1).limit(2)) == [5, 4]
+    run(scenario())
+
+def test_sort_on_arrays_and_documents(db):
+    async def scenario():
+        await db.items.insert_many([{"_id": 1, "v": [1, 9]}, {"_id": 2, "v": 5}, {"_id": 3, "v": []}, {"_id": 4}])
+        # Ascending by the smallest element, descending by the largest; an empty array sorts below null
+        assert await ids(db.items.find({}).sort("v", 1)) == [3, 4, 1, 2]
+        assert await ids(db.items.find({}).sort("v", -1)) == [1, 2, 4, 3]
+        await db.docs.insert_many([{"_id": 1, "v": {"n": 2}}, {"_id": 2, "v": {"m": 5}}, {"_id": 3, "v": {"n": 1}}])
+        assert await ids(db.docs.find({}).sort("v", 1)) == [2, 3, 1]
+    run(scenario())
+
+def test_keyset_page_with_and_or(db):
+    async def scenario():
+        docs = [{"_id": ObjectId(), "first_seen": NOW - timedelta(minutes=i // 2)} for i in range(6)]
+        await db.alerts.insert_many([dict(doc) for doc in docs])
+        await db.alerts.create_index([("first_seen", -1), ("_id", -1)])
+        newest_first = sorted(docs, key=lambda d: (d["first_seen"], d["_id"]), reverse=True)
+        cursor = newest_first[2]
+        query = {"$and": [{}, {"$or": [
+            {"first_seen": {"$lt": cursor["first_seen"]}},
+            {"first_seen": cursor["first_seen"], "_id": {"$lt": cursor["_id"]}},
+        ]}]}
+        page = await ids(db.alerts.find(query).sort([("first_seen", -1), ("_id", -1)]).limit(2))
+        assert page == [d["_id"] for d in newest_first[3:5]]
+    run(scenario())
+
+def test_sort_on_dotted_path_with_projection(db):
+    async def scenario():
+        await db.accounts.insert_many([
+            {"_id": 1, "username": "a", "performance": {"first_calls": 2}},
+            {"_id": 2, "username": "b", "performance": {"first_calls": 7}},
+            {"_id": 3, "username": "c", "performance": {}},
+        ])
+        docs = await db.accounts.find({}, {"_id": 0, "username": 1}).sort(
+            [("performance.first_calls", -1), ("_id", 1)]).limit(2).to_list(None)
+        assert docs == [{"username": "b"}, {"username": "a"}]
+    run(scenario())
+
+def test_update_operators(db):
+    async def scenario():
+        await db.alerts.insert_one({"_id": 1, "quorum_count": 1, "accounts": [{"username": "a"}]})
+        result = await db.alerts.update_one({"_id": 1}, {
+            "$set": {"quorum_count": 2, "last_seen": NOW},
+            "$push": {"accounts": {"username": "b"}},
+        })
+        assert (result.matched_count, result.modified_count) == (1, 1)
+        doc = await db.alerts.find_one({"_id": 1})
+        assert doc["quorum_count"] == 2
+        assert doc["last_seen"] == NOW.replace(tzinfo=None)
+        assert [a["username"] for a in doc["accounts"]] == ["a", "b"]
+        # Array fields match element-wise
+        assert await ids(db.alerts.find({"accounts.username": {"$in": ["b"]}})) == [1]
+        assert await db.alerts.count_documents({"accounts.username": "c"}) == 0
+    run(scenario())
+
+def test_update_operator_edge_cases(db):
+    async def scenario():
+        await db.items.insert_one({"_id": 1, "name": "a", "tags": ["x"]})
+        await db.items.update_one({"_id": 1}, {
+            "$inc": {"count": 2},
+            "$push": {"history": {"$each": [1, 2, 3], "$slice": -2}, "tags": "y"},
+            "$set": {"stats.calls": 1},
+            "$setOnInsert": {"created": True},
+        })
+        assert await db.items.find_one({"_id": 1}) == {
+            "_id": 1, "name": "a", "tags": ["x", "y"], "count": 2, "history": [2, 3], "stats": {"calls": 1}}
+        await db.items.update_one({"_id": 1}, {"$push": {"history": {"$each": [4], "$slice": 0}}})
+        assert (await db.items.find_one({"_id": 1}))["history"] == []
+        result = await db.items.update_one({"_id": 1}, {"$unset": {"missing": ""}})
+        assert (result.matched_count, result.modified_count) == (1, 0)
+        with pytest.raises(OperationFailure):
+            await db.items.update_one({"_id": 1}, {"$inc": {"name": 1}})
+        with pytest.raises(OperationFailure):
+            await db.items.update_one({"_id": 1}, {"$push": {"name": "b"}})
+        with pytest.raises(OperationFailure):
+            await db.items.update_one({"_id": 1}, {"$set": {"name.first": "b"}})
+        assert (await db.items.find_one({"_id": 1}))["name"] == "a"
+    run(scenario())
+
+def test_upsert_seeds_from_equality_fields_outside_or(db):
+    async def scenario():
+        await db.items.update_one({"a": 1, "b": {"$gt": 2}, "n.m": 1, "$and": [{"c": 3}, {"d": {"$in": [4, 5]}}],
+                                   "$or": [{"e": 5}, {"f": 6}]},
+                                  {"$set": {"x": 1}}, upsert=True)
+        doc = await db.items.find_one({}, {"_id": 0})
+        assert doc == {"a": 1, "n": {"m": 1}, "c": 3, "x": 1}
+        # A replacement upsert only takes the _id from its filter
+        await db.items.replace_one({"_id": "r", "k": 1}, {"v": 2}, upsert=True)
+        assert await db.items.find_one({"_id": "r"}) == {"_id": "r", "v": 2}
+    run(scenario())
+
+@pytest.mark.parametrize("call", [
+    lambda c: c.find({"v": {"$regex": "^a"}}).to_list(None),
+    lambda c: c.find({"v": {"$eq": 1}}).to_list(None),
+    lambda c: c.count_documents({"$nor": [{"v": 1}]}),
+    lambda c: c.count_documents({"v": {"$in": 1}}),
+    lambda c: c.update_one({"_id": 1}, {"$addToSet": {"tags": "a"}}),
+    lambda c: c.update_one({"_id": 1}, {"$push": {"tags": {"$each": ["a"], "$sort": 1}}}),
+])
+def test_operators_server_py_does_not_use_are_refused(engine_db, call):
+    async def scenario():
+        await engine_db.items.insert_one({"_id": 1, "v": 1})
+        with pytest.raises(OperationFailure):
+            await call(engine_db.items)
+    run(scenario())
+
+def test_counter_upsert(db):
+    async def scenario():
+        first = await db.counters.find_one_and_update(
+            {"_id": "bus"}, {"$inc": {"seq": 1}, "$setOnInsert": {"stream": "s1"}},
+            upsert=True, return_document=ReturnDocument.AFTER)
+        second = await db.counters.find_one_and_update(
+            {"_id": "bus"}, {"$inc": {"seq": 1}, "$setOnInsert": {"stream": "s2"}},
+            upsert=True, return_document=ReturnDocument.AFTER)
+        assert first == {"_id": "bus", "seq": 1, "stream": "s1"}
+        assert second == {"_id": "bus", "seq": 2, "stream": "s1"}
+        before = await db.counters.find_one_and_update({"_id": "bus"}, {"$inc": {"seq": 1}})
+        assert before["seq"] == 2
+        assert await db.counters.find_one_and_update({"_id": "missing"}, {"$inc": {"seq": 1}}) is None
+    run(scenario())
+
+def test_lease_upsert_conflicts_with_live_owner(db):
+    async def scenario():
+        async def acquire(owner, now):
+            try:
+                await db.leases.update_one(
+                    {"_id": "lease", "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+                    {"$set": {"owner": owner, "expires_at": now + timedelta(minutes=10)}},
+                    upsert=True)
+            except DuplicateKeyError:
+                return False
+            return True
+        assert await acquire("a", NOW)
+        assert await acquire("a", NOW)
+        assert not await acquire("b", NOW)
+        assert await acquire("b", NOW + timedelta(minutes=11))
+        assert (await db.leases.find_one({"_id": "lease"}))["owner"] == "b"
+    run(scenario())
+
+def test_unique_index_violations(db):
+    async def scenario():
+        await db.accounts.create_index("username", unique=True)
+        await db.accounts.insert_one({"username": "a"})
+        with pytest.raises(DuplicateKeyError):
+            await db.accounts.insert_one({"username": "a"})
+        with pytest.raises(BulkWriteError) as error:
+            await db.accounts.bulk_write([InsertOne({"username": "b"}), InsertOne({"username": "a"}),
+                                          InsertOne({"username": "c"})], ordered=False)
+        assert error.value.details["nInserted"] == 2
+        assert [e["index"] for e in error.value.details["writeErrors"]] == [1]
+        result = await db.accounts.bulk_write([UpdateOne({"username": "d"}, {"$set": {"n": 1}}, upsert=True)])
+        assert result.upserted_count == 1
+        assert await db.accounts.count_documents({}) == 4
+    run(scenario())
+
+def test_ttl_index_applies_to_every_operation(engine_db):
+    db = engine_db
+    async def scenario():
+        await db.name_alerts.create_index("first_seen", name="ttl", expireAfterSeconds=3600,
+                                          partialFilterExpression={"quorum_count": {"$lt": 3}})
+        old = datetime.now(timezone.utc) - timedelta(hours=2)
+        await db.name_alerts.insert_many([
+            {"_id": 1, "first_seen": old, "quorum_count": 1},
+            {"_id": 2, "first_seen": old, "quorum_count": 3},
+        ])
+        # Expired documents are gone before the first read, whichever call it is
+        assert await db.name_alerts.find_one_and_delete({"_id": 1}) is None
+        assert await db.name_alerts.find_one_and_delete({"quorum_count": {"$gte": 3}}, {"_id": 1}) == {"_id": 2}
+        assert await db.name_alerts.count_documents({}) == 0
+    run(scenario())
+
+def test_find_one_and_delete_is_sorted(db):
+    async def scenario():
+        await db.jobs.insert_many([{"_id": i, "priority": p} for i, p in enumerate([2, 9, 5])])
+        doc = await db.jobs.find_one_and_delete({"priority": {"$gt": 1}}, sort=[("priority", -1)])
+        assert doc == {"_id": 1, "priority": 9}
+        assert sorted(await ids(db.jobs.find({}))) == [0, 2]
+    run(scenario())
+
+def test_delete_and_replace(db):
+    async def scenario():
+        await db.events.insert_many([{"_id": i, "stream": "old" if i < 3 else "new", "seq": i} for i in range(5)])
+        result = await db.events.delete_many({"$or": [{"stream": {"$ne": "new"}}, {"seq": {"$lt": 4}}]})
+        assert result.deleted_count == 4
+        await db.events.replace_one({"_id": "x"}, {"_id": "x", "seq": 9}, upsert=True)
+        assert await ids(db.events.find({"seq": {"$gte": 4}}).sort("seq", 1)) == [4, "x"]
+    run(scenario())
+
+def test_sqlite_runs_off_the_event_loop(tmp_path):
+    async def scenario():
+        client = storage.SQLiteClient(str(tmp_path / "thread.db"))
+        try:
+            assert await client.run(threading.get_ident) != threading.get_ident()
+            await client["test"].items.insert_one({"_id": 1})
+            assert await client["test"].items.find_one({"_id": 1}) == {"_id": 1}
+        finally:
+            client.close()
+    run(scenario())
+
+def test_async_for_reads_in_batches(engine_db):
+    db = engine_db
+    async def scenario():
+        await db.items.insert_many([{"_id": i, "v": i % 3} for i in range(25)])
+        batches = []
+        run_engine = db.items.run
+        async def counting(fn, *args):
+            result = await run_engine(fn, *args)
+            if isinstance(result, list):
+                batches.append(len(result))
+            return result
+        db.items.run = counting
+        seen = [doc["_id"] async for doc in db.items.find({"v": {"$gt": 0}}, {"v": 0}).batch_size(5)]
+        assert seen == [i for i in range(25) if i % 3]
+        assert batches == [5, 5, 5, 1, 0]
+    run(scenario())
@@ -0,0 +1,111 @@
+"""
+Trending detection: the count-min sketch, spike detection over the bucket
+ring, and spike delivery outside the replay log.
+
+    python -m pytest tests/test_trending.py
+"""
+import asyncio
+import random
+
+import server
+
+T0 = 1_000_000 * 60.0
+
+def run(coro):
+    return asyncio.run(coro)
+
+def detector(**overrides):
+    options = dict(bucket_seconds=60, buckets=5, width=1024, depth=4, top_k=10,
+                   spike_min_mentions=5, spike_ratio=3.0)
+    options.update(overrides)
+    return server.TrendingTokens(**options)
+
+def test_sketch_never_undercounts():
+    sketch = server.CountMinSketch(64, 4)
+    rng = random.Random(7)
+    truth = {}
+    for _ in range(5000):
+        key = f"T{rng.randrange(500)}"
+        truth[key] = truth.get(key, 0) + 1
+        sketch.add(sketch.cells(key))
+    assert all(sketch.estimate(sketch.cells(key)) >= count for key, count in truth.items())
+    assert sketch.estimate(sketch.cells("never-seen")) <= 5000 / 64 * 4
+
+def test_sketch_is_exact_for_a_few_keys_in_a_wide_table():
+    sketch = server.CountMinSketch(4096, 4)
+    for key, count in (("PEPE", 7), ("BONK", 3)):
+        sketch.add(sketch.cells(key), count)
+    assert sketch.estimate(sketch.cells("PEPE")) == 7
+    assert sketch.estimate(sketch.cells("BONK")) == 3
+    sketch.clear()
+    assert sketch.estimate(sketch.cells("PEPE")) == 0
+
+def test_burst_spikes_once_per_bucket_steady_mentions_do_not():
+    trending = detector()
+    spikes = []
+    for minute in range(4):
+        for i in range(4):  # BONK steady at 4 a minute
+            if trending.record("BONK", T0 + minute * 60 + i):
+                spikes.append("BONK")
+    for i in range(8):
+        spike = trending.record("PEPE", T0 + 4 * 60 + i)
+        if spike:
+            spikes.append(spike)
+    assert [s["token_name"] for s in spikes] == ["PEPE"]
+    spike = spikes[0]
+    assert (spike["current"], spike["baseline"], spike["velocity"]) == (5, 0.0, 5.0)
+    # Spikes again in a later bucket if it keeps rising
+    assert any(trending.record("PEPE", T0 + 5 * 60 + i) for i in range(30))
+
+def test_spike_needs_the_ratio_over_the_baseline():
+    trending = detector()
+    for minute in range(4):
+        for i in range(5):
+            trending.record("WIF", T0 + minute * 60 + i)
+    assert not any(trending.record("WIF", T0 + 4 * 60 + i) for i in range(10))
+
+def test_window_slides_out_old_buckets():
+    trending = detector()
+    for i in range(6):
+        trending.record("PEPE", T0 + i)
+    assert trending.trending(T0 + 60)[0]["mentions"] == 6
+    assert trending.trending(T0 + 5 * 60) == []
+    trending.record("BONK", T0 + 60 * 60)  # A jump further than the whole ring
+    assert trending.counts("BONK") == [1, 0, 0, 0, 0]
+
+def test_heavy_hitters_survive_noise():
+    trending = detector(top_k=5)
+    rng = random.Random(1)
+    for i in range(2000):
+        trending.record(f"N{rng.randrange(5000)}", T0 + i * 0.1)
+        if i % 50 == 0:
+            trending.record("PEPE", T0 + i * 0.1)
+    rows = trending.trending(T0 + 200)
+    assert max(rows, key=lambda row: row["mentions"])["token_name"] == "PEPE"
+    assert len(trending.top) <= 5
+
+def test_spikes_reach_websocket_clients_but_not_the_replay_log(monkeypatch):
+    class Client:
+        client = None
+        def __init__(self):
+            self.sent = []
+        async def accept(self):
+            pass
+        async def send_text(self, text):
+            self.sent.append(text)
+
+    async def scenario():
+        manager = server.ConnectionManager(8, "drop_oldest", server.EventLog(10, persist=False))
+        monkeypatch.setattr(server, "manager", manager)
+        manager.start()
+        websocket = Client()
+        await manager.connect(websocket)
+        manager.subscribe(websocket, server.Subscription(topics=["trending"]))
+        updated = manager.events.updated
+        await server.bus.publish("trending", {"type": "trending_spike", "data": {"token_name": "PEPE"}})
+        await asyncio.sleep(0.05)
+        assert [server.orjson.loads(text)["type"] for text in websocket.sent] == ["trending_spike"]
+        assert manager.events.seq == 0 and not manager.events.events
+        assert not updated.is_set()  # /api/updates long-polls keep waiting
+        await manager.stop()
+    run(scenario())
@@ -0,0 +1,164 @@
+"""
+WebSocket fan-out: per-client queues and the slow-client policies.
+
+Clients are stand-ins for Starlette WebSockets that record what they are sent
+and can be made to stall.
+
+    python -m pytest tests/test_websocket.py
+"""
+import asyncio
+import json
+
+import server
+
+def run(coro):
+    return asyncio.run(coro)
+
+class FakeWebSocket:
+    client = None
+
+    def __init__(self, stalled: bool = False):
+        self.sent = []
+        self.closed = None
+        self.unstall = asyncio.Event()
+        if not stalled:
+            self.unstall.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.unstall.wait()
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data):
+        await self.unstall.wait()
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.closed = code
+
+def update(alert_id, quorum):
+    return {"type": "name_alert_update", "data": {"id": alert_id, "token_name": "PEPE", "quorum_count": quorum}}
+
+def frames(client):
+    return [json.loads(frame) for _, _, frame in client.queue]
+
+def test_drop_oldest_keeps_the_newest_frames():
+    client = server.ClientConnection(FakeWebSocket(), 2, "drop_oldest", "json")
+    for n in range(3):
+        assert client.enqueue(json.dumps({"n": n}))
+    assert frames(client) == [{"n": 1}, {"n": 2}]
+    assert client.dropped == 1
+
+def test_coalesce_replaces_superseded_state_in_place():
+    client = server.ClientConnection(FakeWebSocket(), 3, "coalesce", "json")
+    for message in (update("x", 3), {"type": "ca_alert"}, update("y", 3), update("x", 4)):
+        client.enqueue(json.dumps(message), server.coalesce_key(message))
+    assert [(m["type"], m.get("data", {}).get("quorum_count")) for m in frames(client)] == [
+        ("name_alert_update", 4), ("ca_alert", None), ("name_alert_update", 3)]
+    assert client.coalesced == 1
+    # Frames without a key still fall back to dropping the oldest
+    client.enqueue(json.dumps({"type": "ca_alert"}))
+    assert frames(client)[0]["type"] == "ca_alert" and client.dropped == 1
+
+def test_disconnect_policy_refuses_a_full_queue():
+    client = server.ClientConnection(FakeWebSocket(), 1, "disconnect", "json")
+    assert client.enqueue("{}")
+    assert not client.enqueue("{}")
+
+def test_stalled_client_is_disconnected_without_delaying_others():
+    async def scenario():
+        manager = server.ConnectionManager(3, "disconnect", server.EventLog(10, persist=False))
+        manager.start()
+        fast, stalled = FakeWebSocket(), FakeWebSocket(stalled=True)
+        await manager.connect(fast)
+        await manager.connect(stalled)
+        for n in range(5):
+            await manager.broadcast({"type": "ca_alert", "data": {"id": str(n)}})
+            await asyncio.sleep(0.01)
+        assert [m["data"]["id"] for m in fast.sent] == ["0", "1", "2", "3", "4"]
+        assert [m["seq"] for m in fast.sent] == [1, 2, 3, 4, 5]
+        assert stalled not in manager.clients and stalled.closed == 1013
+        assert fast in manager.clients
+        await manager.stop()
+    run(scenario())
+
+def test_send_timeout_closes_the_connection(monkeypatch):
+    monkeypatch.setattr(server, "WS_SEND_TIMEOUT_SECONDS", 0.05)
+    async def scenario():
+        manager = server.ConnectionManager(8, "drop_oldest", server.EventLog(10, persist=False))
+        stalled = FakeWebSocket(stalled=True)
+        await manager.connect(stalled)
+        manager.send(stalled, {"type": "hello"})
+        await asyncio.sleep(0.2)
+        assert stalled not in manager.clients and stalled.closed == 1013
+    run(scenario())
+
+def test_zlib_clients_get_binary_frames():
+    async def scenario():
+        manager = server.ConnectionManager(8, "drop_oldest", server.EventLog(10, persist=False))
+        manager.start()
+        plain, compressed = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(plain)
+        await manager.connect(compressed, "zlib")
+        await manager.broadcast({"type": "ca_alert", "data": {"id": "1"}})
+        await asyncio.sleep(0.05)
+        assert json.loads(server.zlib.decompress(compressed.sent[0])) == plain.sent[0]
+        await manager.stop()
+    run(scenario())
+
+def name_alert(token, usernames, quorum):
+    return {"type": "name_alert", "data": {"token_name": token, "quorum_count": quorum,
+                                           "accounts": [{"username": u} for u in usernames]}}
+
+def ca_alert(token, username):
+    return {"type": "ca_alert", "data": {"token_name": token, "account_username": username}}
+
+def subscription_index(**subscriptions):
+    index = server.SubscriptionIndex()
+    for client, fields in subscriptions.items():
+        index.add(client, server.Subscription(**fields))
+    return index
+
+def test_subscriptions_route_by_topic_token_account_and_quorum():
+    index = subscription_index(
+        everything={},
+        ca_only={"topics": ["ca"]},
+        pepe={"tokens": ["pepe"]},
+        whale={"accounts": ["@Whale"]},
+        strong_names={"topics": ["name"], "min_quorum": 5},
+        trending={"topics": ["trending"]},
+    )
+    assert index.match(name_alert("PEPE", ["whale", "b", "c"], 3)) == {"everything", "pepe", "whale"}
+    assert index.match(name_alert("BONK", ["a", "b", "c", "d", "e"], 5)) == {"everything", "strong_names"}
+    assert index.match(ca_alert("PEPE", "WHALE")) == {"everything", "ca_only", "pepe", "whale"}
+    assert index.match({"type": "trending_spike", "data": {"token_name": "WIF"}}) == {"everything", "whale", "trending"}
+    # Messages without tokens or accounts only filter on type
+    assert index.match({"type": "resync"}) == {"everything", "pepe", "whale"}
+
+def test_resubscribing_replaces_the_previous_filter():
+    index = subscription_index(client={"tokens": ["PEPE"]})
+    index.add("client", server.Subscription(tokens=["BONK"]))
+    assert index.match(name_alert("PEPE", ["a"], 3)) == set()
+    assert index.match(name_alert("BONK", ["a"], 3)) == {"client"}
+    index.remove("client")
+    assert index.match(name_alert("BONK", ["a"], 3)) == set()
+    assert index.by_token == {} and index.subscriptions == {}
+
+def test_broadcasts_reach_only_matching_clients():
+    async def scenario():
+        manager = server.ConnectionManager(8, "drop_oldest", server.EventLog(10, persist=False))
+        manager.start()
+        ca_client, pepe_client = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(ca_client)
+        await manager.connect(pepe_client)
+        manager.subscribe(ca_client, server.Subscription(topics=["ca"]))
+        manager.subscribe(pepe_client, server.Subscription(tokens=["PEPE"]))
+        await manager.broadcast(ca_alert("BONK", "a"))
+        await manager.broadcast(name_alert("PEPE", ["a", "b", "c"], 3))
+        await asyncio.sleep(0.05)
+        assert [m["type"] for m in ca_client.sent] == ["ca_alert"]
+        assert [m["type"] for m in pepe_client.sent] == ["name_alert"]
+        await manager.stop()
+    run(scenario())